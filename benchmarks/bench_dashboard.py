@@ -0,0 +1,221 @@
+# bench_dashboard.py
+"""
+Headless benchmark of the dashboard pipeline on synthetic datasets.
+
+For each size it times CSV ingestion, enrichment, the filter index and views,
+and every section unit (cold, then served from the result cache), without
+Streamlit, and writes a JSON report. Pass an earlier report as --baseline to
+print the change per step. The dataset store (Parquet partitions, persisted
+forecasts) goes to a temporary directory removed at exit, so runs neither
+read nor leave files under data/store.
+
+    python benchmarks/bench_dashboard.py --sizes 10k,100k,1M --output report.json
+    python benchmarks/bench_dashboard.py --sizes 10M --baseline report.json
+"""
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, HERE)
+
+# Read by store.py at import, so set before the dashboard modules are imported
+STORE_DIR = os.environ["MINDSHIFT_STORE_DIR"] = tempfile.mkdtemp(prefix="mindshift-bench-")
+atexit.register(shutil.rmtree, STORE_DIR, ignore_errors=True)
+
+import synthetic
+
+import correlation
+import cube
+import enrich
+import filters
+import forecast
+import guests
+import ingest
+import lifetime
+import sections
+import segmentation
+import streaming
+
+SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6}
+
+# Extra parameters per unit; Dig Deeper runs once per column-type case
+SECTION_PARAMS = {
+    "Dig Deeper": [
+        ("numeric", {"col1": "ADR", "col2": "TotalRevenue"}),
+        ("mixed", {"col1": "Nationality", "col2": "TotalRevenue"}),
+        ("categorical", {"col1": "LoyaltyTier", "col2": "ReservationStatus"}),
+    ],
+}
+
+
+class SyntheticUpload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile (name, size, getvalue, read/seek)."""
+
+    def __init__(self, raw, name):
+        super().__init__(raw)
+        self.name = name
+        self.size = len(raw)
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def clear_caches():
+    """Empties every in-process cache and the forecasts persisted in the temporary store."""
+    for cache in (
+        ingest.memory_cache, enrich.enriched_cache, filters.index_cache, filters.view_cache,
+        cube.cube_cache, sections.result_cache, streaming.summary_cache, streaming.range_cache,
+        correlation.stats_cache, guests.feature_cache, segmentation.model_cache, lifetime.fit_cache,
+        forecast.forecast_cache,
+    ):
+        cache.clear()
+    shutil.rmtree(forecast.FORECAST_DIR, ignore_errors=True)
+
+
+def filter_states(data, index):
+    """(name, date range, selections) for the filter scenarios that are timed."""
+    bounds = index.date_bounds()
+    middle = bounds[0] + (bounds[1] - bounds[0]) / 2
+    one_year = (middle - pd.Timedelta(days=182), middle + pd.Timedelta(days=182))
+    return [
+        ("all", None, {}),
+        ("one_year", one_year, {}),
+        ("one_year_two_nationalities_gold", one_year, {
+            "Nationality": index.values("Nationality")[:2],
+            "LoyaltyTier": ["Gold"],
+        }),
+    ]
+
+
+def bench_size(rows, seed):
+    result = {"rows": rows, "stages": {}, "filters": {}, "sections": {}}
+    stages = result["stages"]
+
+    frame, stages["generate"] = timed(synthetic.generate, rows, seed)
+    raw, stages["to_csv"] = timed(lambda df: df.to_csv(index=False).encode(), frame)
+    del frame
+    result["csv_bytes"] = len(raw)
+    upload = SyntheticUpload(raw, "synthetic.csv")
+    result["streamed"] = ingest.is_streamed(upload)
+
+    clear_caches()
+    data, stages["ingest_cold"] = timed(ingest.load_upload, upload)
+    _, stages["ingest_warm"] = timed(ingest.load_upload, upload)
+    del raw, upload
+    result["loaded_rows"] = len(data)
+    result["memory_bytes"] = int(data.memory_usage(deep=True).sum())
+
+    (data, _, _), stages["enrich_cold"] = timed(enrich.enrich_frame, data)
+    _, stages["enrich_warm"] = timed(enrich.enrich_frame, data)
+
+    index, stages["filter_index"] = timed(filters.get_index, data)
+    views = {}
+    for name, date_range, selections in filter_states(data, index):
+        (view, state), cold = timed(filters.filtered_view, data, index, date_range, selections)
+        _, warm = timed(filters.filtered_view, data, index, date_range, selections)
+        result["filters"][name] = {"cold": cold, "warm": warm, "rows": len(view)}
+        views[name] = (view, state)
+
+    # Sections run on the unfiltered view, the heaviest case
+    view, state = views["all"]
+    ctx = sections.SectionContext(data, view, state)
+    for unit in sections.SECTIONS:
+        for case, params in SECTION_PARAMS.get(unit, [(None, {})]):
+            name = f"{unit} ({case})" if case else unit
+            _, cold = timed(sections.compute, unit, ctx, **params)
+            _, warm = timed(sections.compute, unit, ctx, **params)
+            result["sections"][name] = {"cold": cold, "warm": warm}
+
+    result["sections_cold_total"] = sum(s["cold"] for s in result["sections"].values())
+    # ru_maxrss is in KB on Linux (bytes on macOS); it only grows across sizes
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def flatten(result):
+    """{step: cold seconds} for comparing two reports."""
+    steps = dict(result["stages"])
+    steps.update({f"filter {k}": v["cold"] for k, v in result["filters"].items()})
+    steps.update({f"section {k}": v["cold"] for k, v in result["sections"].items()})
+    return steps
+
+
+def compare(report, baseline):
+    for rows, result in report["results"].items():
+        if rows not in baseline["results"]:
+            continue
+        before, after = flatten(baseline["results"][rows]), flatten(result)
+        print(f"\n{int(rows):,} rows vs baseline")
+        print(f"{'step':<60}{'before (s)':>12}{'after (s)':>12}{'change':>9}")
+        for step, seconds in after.items():
+            if step in before:
+                change = seconds / before[step] if before[step] else float("nan")
+                print(f"{step:<60}{before[step]:>12.4f}{seconds:>12.4f}{change:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10k,100k,1M", help="comma-separated row counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "streaming_threshold_bytes": streaming.STREAMING_THRESHOLD_BYTES,
+        },
+        "results": {},
+    }
+    for size in args.sizes.split(","):
+        rows = parse_size(size)
+        print(f"Benchmarking {rows:,} rows...", flush=True)
+        result = bench_size(rows, args.seed)
+        report["results"][str(rows)] = result
+        print(
+            f"  ingest {result['stages']['ingest_cold']:.2f}s, enrich {result['stages']['enrich_cold']:.2f}s, "
+            f"sections {result['sections_cold_total']:.2f}s (cold)",
+            flush=True,
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
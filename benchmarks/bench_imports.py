@@ -0,0 +1,124 @@
+# bench_imports.py
+"""
+Import-time report: what a new Streamlit worker pays before the first page.
+
+Each target module is imported in a fresh interpreter (the median of --repeat
+runs is reported), along with which heavy libraries that import pulled in.
+The heavy libraries themselves are also timed, on top of pandas and numpy, as
+the cost the first section needing one of them pays. Background imports
+(lazy.warm) are turned off so they do not blur the timings.
+
+Point --src at another checkout (e.g. a git worktree of an older commit) to
+measure it, and pass an earlier report as --baseline to print the change.
+
+    python benchmarks/bench_imports.py --output imports.json
+    git worktree add /tmp/before HEAD~1
+    python benchmarks/bench_imports.py --src /tmp/before/src --output before.json
+    python benchmarks/bench_imports.py --baseline before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import UTC, datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(HERE, "..", "src")
+
+# Importing mindshift runs the dashboard script in Streamlit's bare mode
+TARGETS = ("mindshift", "sections", "analytics", "streaming")
+HEAVY_MODULES = ("plotly.express", "scipy", "sklearn", "statsmodels")
+# Timed on top of pandas and numpy, which every target imports anyway
+LIBRARIES = ("plotly.express", "scipy.optimize", "sklearn.cluster", "statsmodels.tsa.holtwinters")
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+for name in {preload!r}:
+    __import__(name)
+start = time.perf_counter()
+__import__({target!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(target, src, preload=()):
+    """Seconds to import `target` in a fresh interpreter, and the heavy modules it loaded."""
+    code = PROBE.format(src=os.path.abspath(src), preload=tuple(preload), target=target, heavy=HEAVY_MODULES)
+    env = dict(os.environ, MINDSHIFT_WARM_IMPORTS="0", MINDSHIFT_PREWARM_WORKERS="0")
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=src, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    # Streamlit's bare-mode warnings go to stdout too; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(target, src, repeat, preload=()):
+    runs = [probe(target, src, preload) for _ in range(repeat)]
+    return {
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def compare(report, baseline):
+    print("\nImport time vs baseline")
+    print(f"{'module':<40}{'before (s)':>12}{'after (s)':>12}{'change':>9}")
+    for group in ("targets", "libraries"):
+        for name, result in report[group].items():
+            before = baseline.get(group, {}).get(name)
+            if before is None:
+                continue
+            change = result["seconds"] / before["seconds"] if before["seconds"] else float("nan")
+            print(f"{name:<40}{before['seconds']:>12.3f}{result['seconds']:>12.3f}{change:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default=SRC, help="source directory to import from")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="import_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "generated": datetime.now(UTC).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "src": os.path.abspath(args.src),
+            "repeat": args.repeat,
+        },
+        "targets": {},
+        "libraries": {},
+    }
+    print(f"{'module':<40}{'import (s)':>12}  heavy modules loaded")
+    for target in TARGETS:
+        if not os.path.exists(os.path.join(args.src, f"{target}.py")):
+            continue
+        result = measure(target, args.src, args.repeat)
+        report["targets"][target] = result
+        print(f"{target:<40}{result['seconds']:>12.3f}  {', '.join(result['loaded']) or '-'}", flush=True)
+    for library in LIBRARIES:
+        try:
+            result = measure(library, args.src, args.repeat, preload=("numpy", "pandas"))
+        except subprocess.CalledProcessError:
+            continue
+        report["libraries"][library] = result
+        print(f"{library:<40}{result['seconds']:>12.3f}", flush=True)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
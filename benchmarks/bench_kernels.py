@@ -0,0 +1,90 @@
+# bench_kernels.py
+"""
+Micro-benchmark: the vectorized kernels in src/kernels.py against the
+row-by-row DataFrame.apply versions they replaced.
+
+    python benchmarks/bench_kernels.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import kernels
+
+
+def best_of(func, repeat):
+    """Fastest wall time of `repeat` runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    spend = rng.uniform(0, 5000, rows)
+    spend[rng.random(rows) < 0.05] = 0  # some rows without spend
+    return pd.DataFrame({
+        "MarketingSpend": spend,
+        "TotalRevenue": rng.uniform(1e3, 1e5, rows),
+        "VisitCount": rng.integers(1, 6, rows),
+        "MarketingChannel": rng.choice(["Web", "OTA", "Agent", "Social", "Email"], rows),
+    })
+
+
+def cases(frame):
+    """(name, row-loop version, vectorized version) for each kernel."""
+    def looped_group_shares():
+        totals = frame.groupby("MarketingChannel")["TotalRevenue"].sum()
+        return frame.apply(lambda row: row["TotalRevenue"] / totals[row["MarketingChannel"]], axis=1)
+
+    return [
+        (
+            "roi",
+            lambda: frame.apply(
+                lambda row: row["TotalRevenue"] / row["MarketingSpend"] if row["MarketingSpend"] else 0,
+                axis=1,
+            ),
+            lambda: kernels.roi(frame["TotalRevenue"], frame["MarketingSpend"]),
+        ),
+        (
+            "classify_repeat",
+            lambda: frame["VisitCount"].apply(lambda x: "Repeat" if x > 1 else "First-Time"),
+            lambda: kernels.classify_repeat(frame["VisitCount"]),
+        ),
+        (
+            "group_shares",
+            looped_group_shares,
+            lambda: kernels.group_shares(frame["TotalRevenue"], frame["MarketingChannel"]),
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per vectorized kernel (best is kept)")
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    print(f"{args.rows:,} rows")
+    print(f"{'kernel':<18}{'apply (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for name, looped, vectorized in cases(frame):
+        # Results must agree before the timings mean anything
+        expected, actual = looped(), vectorized()
+        np.testing.assert_array_equal(np.asarray(expected), np.asarray(actual))
+        slow = best_of(looped, 1)
+        fast = best_of(vectorized, args.repeat)
+        print(f"{name:<18}{slow:>12.3f}{fast:>16.4f}{slow / fast:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# synthetic.py
+"""
+Deterministic synthetic hotel datasets with the column schema the dashboard
+expects (one row per booking day: dates, ADR, room counts by type, revenues,
+cost columns, guest and company attributes).
+
+The same (rows, seed) always gives the same frame, so benchmark runs on
+different machines or commits are comparable.
+"""
+import numpy as np
+import pandas as pd
+
+NATIONALITIES = ["UAE", "Saudi Arabia", "UK", "India", "USA", "Germany", "France", "China", "Russia", "Egypt"]
+LOYALTY_TIERS = ["Standard", "Silver", "Gold", "Platinum"]
+AGE_GROUPS = ["18-25", "26-35", "36-45", "46-60", "60+"]
+RESERVATION_STATUSES = ["Completed", "Canceled", "No-Show"]
+MARKETING_CHANNELS = ["Website", "OTA", "Travel Agent", "Social Media", "Email"]
+ROOM_TYPES = ["Single", "Double", "Family", "Royal"]
+COMPANIES = [f"Company {c}" for c in "ABCDEFGHIJKL"]
+
+UTILITY_AND_STAFF_COSTS = {
+    "UtilityCostElectricity": (2000, 6000),
+    "UtilityCostWater": (500, 2000),
+    "UtilityCostGas": (300, 1500),
+    "StaffSalaryHousekeeping": (3000, 8000),
+    "StaffSalaryFrontDesk": (2000, 6000),
+    "StaffSalaryMaintenance": (1500, 5000),
+    "StaffSalaryF&B": (3000, 9000),
+    "StaffSalaryMarketing": (1000, 4000),
+    "MaintenanceCost": (500, 4000),
+    "DepreciationCost": (1000, 3000),
+    "MealPlanCost": (500, 5000),
+}
+
+ANCILLARY_REVENUES = {
+    "F&B Revenue": (2000, 20000),
+    "Spa Revenue": (500, 8000),
+    "Event Revenue": (0, 15000),
+    "RestaurantRevenue": (1000, 12000),
+    "MerchandiseRevenue": (100, 3000),
+    "LaundryRevenue": (200, 2500),
+}
+
+START_DATE = "2019-01-01"
+DAYS = 6 * 365
+AVAILABLE_ROOMS = 250
+
+
+def generate(rows, seed=42):
+    """Returns a synthetic bookings frame with `rows` rows; dates are ISO strings, as in an upload."""
+    rng = np.random.default_rng(seed)
+
+    day = rng.integers(0, DAYS, rows)
+    dates = pd.Timestamp(START_DATE) + pd.to_timedelta(day, unit="D")
+    stay = rng.integers(1, 8, rows)
+    # Seasonal occupancy: peaks in the winter months, dips in summer
+    season = 0.65 + 0.25 * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 15) / 365)
+
+    occupied = {
+        "SingleRoomsOccupied": rng.binomial(80, season),
+        "DoubleRoomsOccupied": rng.binomial(90, season),
+        "FamilyRoomsOccupied": rng.binomial(50, season),
+        "RoyalRoomsOccupied": rng.binomial(30, season * 0.8),
+    }
+    occupied_rooms = sum(occupied.values())
+    adr = np.round(rng.normal(450, 90, rows) * (0.8 + 0.4 * season), 2)
+
+    data = {
+        "Date": dates.strftime("%Y-%m-%d"),
+        "CheckInDate": dates.strftime("%Y-%m-%d"),
+        "CheckOutDate": (dates + pd.to_timedelta(stay, unit="D")).strftime("%Y-%m-%d"),
+        "GuestID": np.char.add("G", rng.integers(0, max(rows // 4, 1), rows).astype(str)),
+        "Nationality": rng.choice(NATIONALITIES, rows),
+        "LoyaltyTier": rng.choice(LOYALTY_TIERS, rows, p=[0.4, 0.3, 0.2, 0.1]),
+        "AgeGroup": rng.choice(AGE_GROUPS, rows),
+        "ReservationStatus": rng.choice(RESERVATION_STATUSES, rows, p=[0.85, 0.1, 0.05]),
+        "MarketingChannel": rng.choice(MARKETING_CHANNELS, rows),
+        "RoomType": rng.choice(ROOM_TYPES, rows),
+        "Company": rng.choice(COMPANIES, rows),
+        "CompanyDiscount": np.where(rng.random(rows) < 0.3, np.round(rng.uniform(5, 25, rows), 1), np.nan),
+        "ADR": adr,
+        **occupied,
+        "OccupiedRooms": occupied_rooms,
+        "AvailableRooms": np.full(rows, AVAILABLE_ROOMS),
+        "MarketingSpend": np.round(rng.uniform(500, 6000, rows), 2),
+        "GuestFeedbackScore": np.round(np.clip(rng.normal(7.5, 1.4, rows), 1, 10), 1),
+        "HousekeepingStaffCount": rng.integers(15, 40, rows),
+        "HousekeepingExpenses": np.round(rng.uniform(1000, 5000, rows), 2),
+        "LaundryExpenses": np.round(rng.uniform(150, 2000, rows), 2),
+        "MaintenanceTickets": rng.poisson(4, rows),
+    }
+    for col, (lo, hi) in ANCILLARY_REVENUES.items():
+        data[col] = np.round(rng.uniform(lo, hi, rows), 2)
+    for col, (lo, hi) in UTILITY_AND_STAFF_COSTS.items():
+        data[col] = np.round(rng.uniform(lo, hi, rows), 2)
+
+    frame = pd.DataFrame(data)
+    frame["TotalRevenue"] = np.round(
+        adr * occupied_rooms + frame[list(ANCILLARY_REVENUES)].sum(axis=1).to_numpy(), 2
+    )
+    return frame
@@ -0,0 +1,415 @@
+# analytics.py
+"""
+Headless analytics engine behind the dashboard sections.
+
+Every function takes a bookings frame (already enriched and filtered) plus
+parameters and returns tables or scalars; nothing here imports Streamlit or
+Plotly, so results can be computed off the UI thread, cached, benchmarked or
+reused from scripts. Time series, totals and per-category sums read from a
+TimeCube; functions that need one accept it as `cube` and build it from the
+frame when none is given (for streamed uploads the sections pass the cube over
+every row of the file, the frame being a sample). The guest-centric functions
+take the guest feature table (guests.features) instead of booking rows.
+"""
+import pandas as pd
+
+import kernels
+import lifetime
+from cube import TimeCube
+from forecast import ALL_ROOMS
+
+ROOM_REVENUE_COLUMNS = ["SingleRoomRevenue", "DoubleRoomRevenue", "RoyalRoomRevenue", "FamilyRoomRevenue"]
+ROOM_OCCUPIED_COLUMNS = ["SingleRoomsOccupied", "DoubleRoomsOccupied", "RoyalRoomsOccupied", "FamilyRoomsOccupied"]
+
+DEPARTMENT_COLUMNS = ["F&B Revenue", "Spa Revenue", "RestaurantRevenue", "MerchandiseRevenue", "LaundryRevenue"]
+UPSELL_COLUMNS = ["F&B Revenue", "Spa Revenue", "Event Revenue", "RestaurantRevenue", "MerchandiseRevenue"]
+COMPANY_METRICS = ["TotalRevenue", "CompanyDiscount"]
+ROOM_COST_METRICS = ["TotalRevenue", "Profit", "RoomCost"]
+
+
+def _has(data, *columns):
+    return all(col in data.columns for col in columns)
+
+
+def _cube(data, cube, dims=(), metrics=None):
+    return cube if cube is not None else TimeCube.from_frame(data, metrics=metrics, dims=dims, dropna=False)
+
+
+def _total(cube, metric, how="sum"):
+    """Sum (or mean) of `metric` over every row of the cube."""
+    return cube.totals([metric], how=how)[metric].iloc[0]
+
+
+def value_counts(data, col, cube=None):
+    """
+    Rows per value of `col` as a [col, Count] table, most frequent first
+    (empty categories left out). `cube` must have the `col` dim.
+    """
+    if cube is None:
+        counts = data[col].value_counts().loc[lambda c: c > 0].reset_index()
+        counts.columns = [col, "Count"]
+        return counts
+    counts = cube.totals({"Count": (col, "rows")}, by=[col])
+    return counts[counts["Count"] > 0].sort_values("Count", ascending=False, kind="stable", ignore_index=True)
+
+
+# ----------------------------- OVERVIEW --------------------------------
+def overview(data, rows=10):
+    return {"head": data.head(rows), "stats": data.describe()}
+
+
+# ------------------------- REVENUE ANALYSIS ----------------------------
+def revenue_summary(data, cube=None):
+    """Total revenue, weekly revenue and revenue per room type and year."""
+    cube = _cube(data, cube)
+    result = {"total_revenue": None, "weekly": None}
+    if "TotalRevenue" in data.columns:
+        result["total_revenue"] = _total(cube, "TotalRevenue")
+    if _has(data, "Date", "TotalRevenue"):
+        result["weekly"] = cube.rollup("W", ["TotalRevenue"], label="Week")
+    result["rooms_per_year"] = (
+        cube.rollup("Y", ROOM_REVENUE_COLUMNS, start_column="Start")
+        .assign(Year=lambda df: df["Start"].dt.year)
+        .drop(columns=["Period", "Start"])
+        .melt(id_vars=["Year"], var_name="RoomType", value_name="Revenue")
+    )
+    return result
+
+
+# -------------------------- SEASONALITY --------------------------------
+def seasonality(data, cube=None):
+    """
+    Revenue per calendar month (summed over years) and per (Year, Month), with
+    the peak and lowest months; month names are taken from each period's start.
+    """
+    revenue_by_month = (
+        _cube(data, cube)
+        .rollup("M", ["TotalRevenue"], start_column="Start")
+        .assign(Year=lambda df: df["Start"].dt.year, Month=lambda df: df["Start"].dt.month_name())
+    )
+    monthly = revenue_by_month.groupby("Month")["TotalRevenue"].sum().reset_index()
+    result = {"monthly": monthly, "monthly_by_year": None, "peak_month": None, "lowest_month": None}
+    if monthly.empty:
+        return result
+    result["monthly_by_year"] = revenue_by_month.groupby(["Year", "Month"])["TotalRevenue"].sum().reset_index()
+    result["peak_month"] = monthly.loc[monthly["TotalRevenue"].idxmax()]
+    result["lowest_month"] = monthly.loc[monthly["TotalRevenue"].idxmin()]
+    return result
+
+
+# --------------------- HOUSEKEEPING & LAUNDRY --------------------------
+def housekeeping_and_laundry(data, cube=None):
+    """Monthly housekeeping expenses and laundry revenue vs. expenses (None when the columns are missing)."""
+    cube = _cube(data, cube)
+    result = {"housekeeping": None, "laundry": None}
+    if "HousekeepingExpenses" in data.columns:
+        result["housekeeping"] = cube.rollup("M", ["HousekeepingExpenses"], label="Month")
+    if _has(data, "LaundryRevenue", "LaundryExpenses"):
+        result["laundry"] = cube.rollup("M", ["LaundryRevenue", "LaundryExpenses"], label="Month")
+    return result
+
+
+# ------------------------- FEEDBACK ANALYSIS ---------------------------
+def feedback_monthly(data, cube=None):
+    """Monthly average GuestFeedbackScore."""
+    return _cube(data, cube).rollup("M", ["GuestFeedbackScore"], how="mean", label="Month")
+
+
+# --------------------------- CUSTOM CHARTS -----------------------------
+def department_revenue(data, cube=None):
+    """Revenue per department as a [Department, Revenue] table, or None without department columns."""
+    valid_depts = [col for col in DEPARTMENT_COLUMNS if col in data.columns]
+    if not valid_depts:
+        return None
+    breakdown = _cube(data, cube, metrics=valid_depts).totals(valid_depts).iloc[0].reset_index()
+    breakdown.columns = ["Department", "Revenue"]
+    return breakdown
+
+
+# ------------------------------- KPIs ----------------------------------
+def kpis(data, cube=None):
+    """Total revenue, average ADR and occupancy rate (%), or None if a needed column is missing."""
+    if not _has(data, "TotalRevenue", "OccupiedRooms", "AvailableRooms", "ADR"):
+        return None
+    cube = _cube(data, cube)
+    return {
+        "total_revenue": _total(cube, "TotalRevenue"),
+        "avg_adr": _total(cube, "ADR", how="mean"),
+        "occupancy_rate": (_total(cube, "OccupiedRooms") / _total(cube, "AvailableRooms")) * 100,
+    }
+
+
+# ---------------- CANCELLATION & NO-SHOW ANALYSIS ----------------------
+def reservation_status(data, cube=None):
+    """
+    Bookings per ReservationStatus, and per month and status (None without
+    valid dates). `cube` must have the ReservationStatus dim.
+    """
+    cube = _cube(data, cube, dims=("ReservationStatus",), metrics=[])
+    result = {"status_counts": value_counts(data, "ReservationStatus", cube), "monthly_status": None}
+    if "Date" in data.columns and data["Date"].notna().any():
+        result["monthly_status"] = cube.rollup(
+            "M", {"Count": (None, "rows")}, by=["ReservationStatus"], label="Month"
+        )
+    return result
+
+
+# -------------- GUEST RETENTION & REPEAT VISITS ANALYSIS --------------
+def guest_visits(guests):
+    """Visits per GuestID with a Repeat / First-Time GuestType, and guests per type."""
+    visit_counts = guests[["GuestID", "VisitCount"]].copy()
+    visit_counts["GuestType"] = kernels.classify_repeat(visit_counts["VisitCount"])
+    guest_types = visit_counts["GuestType"].value_counts().reset_index()
+    guest_types.columns = ["GuestType", "Count"]
+    return {"visit_counts": visit_counts, "guest_types": guest_types}
+
+
+# --------- MARKETING ROI & CAMPAIGN PERFORMANCE ANALYSIS --------------
+def marketing_roi(data, cube=None):
+    """
+    Overall ROI (revenue / marketing spend, None without spend) and spend,
+    revenue and ROI per MarketingChannel (None without that column). `cube`
+    must have the MarketingChannel dim when the data has that column.
+    """
+    dims = ("MarketingChannel",) if "MarketingChannel" in data.columns else ()
+    cube = _cube(data, cube, dims=dims, metrics=["MarketingSpend", "TotalRevenue"])
+    total_marketing_spend = _total(cube, "MarketingSpend")
+    total_revenue = _total(cube, "TotalRevenue")
+    result = {
+        "roi": total_revenue / total_marketing_spend if total_marketing_spend > 0 else None,
+        "channels": None,
+    }
+    if dims:
+        channels = cube.totals(["MarketingSpend", "TotalRevenue"], by=dims)
+        # ROI is 0 for channels without spend
+        channels["ROI"] = kernels.roi(channels["TotalRevenue"], channels["MarketingSpend"])
+        result["channels"] = channels
+    return result
+
+
+# ---- OPERATIONAL EFFICIENCY & RESOURCE ALLOCATION ANALYSIS -----------
+def operational_efficiency(data, cube=None):
+    """Monthly average staffing vs. occupancy and monthly maintenance tickets (None when missing)."""
+    cube = _cube(data, cube)
+    result = {"staff_vs_occupancy": None, "maintenance": None}
+    if _has(data, "HousekeepingStaffCount", "OccupiedRooms"):
+        result["staff_vs_occupancy"] = cube.rollup(
+            "M", ["HousekeepingStaffCount", "OccupiedRooms"], how="mean", label="Date"
+        )
+    if "MaintenanceTickets" in data.columns:
+        result["maintenance"] = cube.rollup("M", ["MaintenanceTickets"], label="Date")
+    return result
+
+
+# ----------------- ROOM Type Profitability Analysis -------------------
+def room_type_profitability(data, cube=None):
+    """
+    Revenue per room type as a [RoomType, Revenue] table, and the sums of the
+    occupied-room columns and AvailableRooms (each None when columns are missing).
+    """
+    cube = _cube(data, cube)
+    result = {"room_revenue": None, "occupancy": None}
+    if _has(data, *ROOM_REVENUE_COLUMNS):
+        result["room_revenue"] = (
+            cube.totals(ROOM_REVENUE_COLUMNS).iloc[0]
+            .rename_axis("RoomType").reset_index(name="Revenue")
+        )
+    if _has(data, *ROOM_OCCUPIED_COLUMNS, "AvailableRooms"):
+        result["occupancy"] = cube.totals(ROOM_OCCUPIED_COLUMNS + ["AvailableRooms"]).iloc[0]
+    return result
+
+
+# --------------------- CLTV (CUSTOMER LIFETIME VALUE) ------------------
+def cltv(guests, top=10, key=None):
+    """
+    Lifetime value per guest: expected discounted spend over the next
+    lifetime.HORIZON_MONTHS months from the BG/NBD and Gamma-Gamma models,
+    fitted once per `key`. Without stay dates, or with too few repeat guests
+    to fit, CLTV falls back to the total spent so far ("model" says which).
+    Returns every guest ranked by CLTV, the `top` guests and the fitted
+    parameters (None for the fallback).
+    """
+    params = lifetime.get_fit(guests, key) if _has(guests, "AvgSpend", "FirstStay") else None
+    if params is None:
+        ranked = guests[["GuestID", "TotalSpent"]].assign(CLTV=guests["TotalSpent"])
+        ranked = ranked.sort_values("CLTV", ascending=False, ignore_index=True)
+        model = "historical"
+    else:
+        ranked = lifetime.score(guests, params)
+        model = "bgnbd"
+    return {"guests": ranked, "top": ranked.head(top), "model": model, "params": params}
+
+
+# ----------------- UPSELLING & CROSS-SELLING ANALYSIS ------------------
+def upselling(data, corr=None, cube=None):
+    """
+    Revenue per upsell category and each category's correlation with
+    TotalRevenue (None without TotalRevenue); None without upsell columns.
+    `corr` is a correlation matrix covering those columns (e.g. from
+    correlation.correlations); without it they are computed from `data`.
+    """
+    present = [col for col in UPSELL_COLUMNS if col in data.columns]
+    if not present:
+        return None
+    upsell_sums = _cube(data, cube, metrics=present).totals(present).iloc[0].reset_index()
+    upsell_sums.columns = ["UpsellCategory", "TotalRevenue"]
+    correlations = None
+    if "TotalRevenue" in data.columns:
+        if corr is None:
+            corr = data[present + ["TotalRevenue"]].corr()
+        correlations = {col: corr.loc[col, "TotalRevenue"] for col in present}
+    return {"upsell_sums": upsell_sums, "correlations": correlations}
+
+
+# ------------------------ ROOM COST ANALYSIS ---------------------------
+def room_costs(data, cube=None, top=10):
+    """
+    Monthly revenue, profit and room cost, and the `top` room types by profit
+    (None when missing). `cube` must have the RoomType dim when the data has
+    that column.
+    """
+    dims = ("RoomType",) if "RoomType" in data.columns else ()
+    cube = _cube(data, cube, dims=dims, metrics=[m for m in ROOM_COST_METRICS if m in data.columns])
+    result = {"monthly": None, "room_profit": None}
+    if _has(data, "Date", "TotalRevenue", "Profit"):
+        result["monthly"] = cube.rollup("M", ["TotalRevenue", "Profit", "RoomCost"], label="Month")
+    if _has(data, "RoomType", "Profit"):
+        result["room_profit"] = (
+            cube.totals(["Profit"], by=dims)
+            .sort_values("Profit", ascending=False, kind="stable")
+            .head(top)
+            .reset_index(drop=True)
+        )
+    return result
+
+
+# ------------------------ DYNAMIC PRICING SUGGESTIONS ------------------
+def pricing_suggestions(forecast, days=7):
+    """
+    Suggested prices for the `days` days after the data, from a forecast.Forecast:
+    the forecast ADR of all rooms as [Date, Recommended ADR] (None without an
+    ADR forecast), the daily forecast table over the horizon, and per room type
+    the mean forecast ADR and total forecast demand.
+    """
+    table = forecast.horizon(days)
+    overall = table[table["RoomType"] == ALL_ROOMS]
+    predictions = None
+    if overall["ADR"].notna().any():
+        predictions = overall[["Date", "ADR"]].rename(columns={"ADR": "Recommended ADR"}).reset_index(drop=True)
+    by_room = table.groupby("RoomType", sort=False).agg(
+        ForecastADR=("ADR", "mean"), ForecastDemand=("Demand", "sum")
+    ).reset_index()
+    return {"predictions": predictions, "forecast": table, "by_room": by_room}
+
+
+# ------------------------ GUEST PREFERENCES ----------------------------
+def upgrade_recommendations(guests, tier="Platinum", upgrade="Royal Room", rows=10):
+    """
+    Room upgrade suggestions for guests whose latest loyalty tier is `tier`,
+    highest spenders first, or None if there are none.
+    """
+    chosen = guests[guests["LoyaltyTier"] == tier]
+    if chosen.empty:
+        return None
+    if "TotalSpent" in chosen.columns:
+        chosen = chosen.sort_values("TotalSpent", ascending=False, kind="stable")
+    return chosen[["GuestID", "LoyaltyTier"]].head(rows).reset_index(drop=True).assign(UpgradeRecommendation=upgrade)
+
+
+# ------------------------ STORY TELLING --------------------------------
+def story_metrics(data, cube=None):
+    """
+    Headline figures for the narrative; a metric is None when its columns are
+    missing. Totals count every row, dated or not; the dates are those of the
+    dated rows.
+    """
+    cube = _cube(data, cube)
+    result = dict.fromkeys(
+        ["min_date", "max_date", "total_revenue", "total_profit", "available_rooms",
+         "occupancy_rate", "avg_adr", "avg_feedback", "marketing_spend"]
+    )
+    result["total_rows"] = int(cube.base["Rows"].sum())
+
+    bounds = cube.date_bounds()
+    if bounds is not None:
+        result["min_date"], result["max_date"] = (day.date() for day in bounds)
+    if "TotalRevenue" in data.columns:
+        result["total_revenue"] = _total(cube, "TotalRevenue")
+    if "Profit" in data.columns:
+        result["total_profit"] = _total(cube, "Profit")
+    if _has(data, "OccupiedRooms", "AvailableRooms"):
+        result["available_rooms"] = _total(cube, "AvailableRooms")
+        if result["available_rooms"] > 0:
+            result["occupancy_rate"] = _total(cube, "OccupiedRooms") / result["available_rooms"] * 100
+    if "ADR" in data.columns:
+        result["avg_adr"] = _total(cube, "ADR", how="mean")
+    if "GuestFeedbackScore" in data.columns:
+        result["avg_feedback"] = _total(cube, "GuestFeedbackScore", how="mean")
+    if _has(data, "MarketingSpend", "TotalRevenue"):
+        result["marketing_spend"] = _total(cube, "MarketingSpend")
+    return result
+
+
+# ------------------------ DIG DEEPER -----------------------------------
+def compare_columns(data, col1, col2, corr_matrix=None):
+    """
+    Summary of the relationship between two columns. `case` is "numeric"
+    (correlation matrix: `corr_matrix` if given, else computed from `data`),
+    "mixed" (mean of the numeric column per category) or "categorical" (rows
+    per combination).
+    """
+    col1_is_numeric = pd.api.types.is_numeric_dtype(data[col1])
+    col2_is_numeric = pd.api.types.is_numeric_dtype(data[col2])
+
+    if col1_is_numeric and col2_is_numeric:
+        if corr_matrix is None:
+            corr_matrix = data[[col1, col2]].corr()
+        return {"case": "numeric", "corr_matrix": corr_matrix, "corr": corr_matrix.iloc[0, 1]}
+
+    if col1_is_numeric or col2_is_numeric:
+        numeric_col, cat_col = (col1, col2) if col1_is_numeric else (col2, col1)
+        mean_by_cat = data.groupby(cat_col, observed=True)[numeric_col].mean().reset_index(name="mean_value")
+        return {
+            "case": "mixed",
+            "numeric_col": numeric_col,
+            "cat_col": cat_col,
+            "mean_by_cat": mean_by_cat,
+            "highest_cat": mean_by_cat.loc[mean_by_cat["mean_value"].idxmax(), cat_col],
+            "highest_mean": mean_by_cat["mean_value"].max(),
+        }
+
+    grouped = data.groupby([col1, col2], observed=True).size().reset_index(name='count')
+    return {"case": "categorical", "grouped": grouped}
+
+
+# ------------------------ COMPANY'S ANALYSIS ---------------------------
+def company_analysis(data, cube=None):
+    """
+    Revenue per Company, Year and Quarter (None without TotalRevenue) and
+    discount usage (count and sum of CompanyDiscount) per Company and Year.
+    `cube` must have the Company dim.
+    """
+    cube = _cube(data, cube, dims=("Company",), metrics=COMPANY_METRICS)
+    result = {"revenue_by_company": None}
+    if "TotalRevenue" in data.columns:
+        result["revenue_by_company"] = (
+            cube
+            .rollup("Q", ["TotalRevenue"], by=["Company"], start_column="Start")
+            .assign(Year=lambda df: df["Start"].dt.year, Quarter=lambda df: df["Start"].dt.quarter)
+            [["Company", "Year", "Quarter", "TotalRevenue"]]
+            .sort_values(["Company", "Year", "Quarter"], ignore_index=True)
+        )
+    # We assume CompanyDiscount is numeric (e.g., discount amount).
+    result["discount_usage"] = (
+        cube
+        .rollup(
+            "Y",
+            {"UsageCount": ("CompanyDiscount", "count"), "DiscountSum": ("CompanyDiscount", "sum")},
+            by=["Company"],
+            start_column="Start",
+        )
+        .assign(Year=lambda df: df["Start"].dt.year)
+        [["Company", "Year", "UsageCount", "DiscountSum"]]
+        .sort_values(["Company", "Year"], ignore_index=True)
+    )
+    return result
@@ -0,0 +1,202 @@
+# append.py
+"""
+Incremental append: adds a delta file (new days of bookings) to a loaded dataset.
+
+Only the delta is parsed and enriched; its rows are concatenated onto the
+already enriched history, and its day aggregates are merged into the dataset's
+full-data cube (see streaming.StreamSummary), so sections keep serving time
+series without re-aggregating the history. Delta rows whose key (Date,
+GuestID) is already stored, or repeated within the delta, are skipped and
+reported. If the history is stored partitioned by month (store.py), the
+delta is written to the partitions it falls in and the others are shared. For
+streamed datasets, whose frame is only a sample, keys are checked against the
+stored partitions the delta's dates fall in; only when the store is not
+available are they checked against the sample (the report says so). Every
+new row goes into the cubes, correlation statistics and store, but only a
+subsample of them, taken at the streamed sample's rate, joins the frame, so
+it stays a uniform sample.
+"""
+import pandas as pd
+
+import correlation
+import enrich
+import guests
+import ingest
+import streaming
+from cache import content_hash
+from cube import default_metrics
+from store import dataset_store
+
+# Columns identifying a booking row; duplicates on these are not appended
+KEY_COLUMNS = ("Date", "GuestID")
+
+
+def key_columns(data):
+    return [col for col in KEY_COLUMNS if col in data.columns]
+
+
+def _keys(data, columns):
+    """Row keys as a MultiIndex, with dates parsed and normalized so text and datetime columns compare."""
+    arrays = []
+    for col in columns:
+        values = data[col]
+        if col in enrich.DATE_COLUMNS:
+            values = pd.to_datetime(values, errors="coerce").dt.normalize()
+        else:
+            values = values.astype(str)
+        arrays.append(values.to_numpy())
+    return pd.MultiIndex.from_arrays(arrays, names=columns)
+
+
+def align_categories(base, delta):
+    """
+    Gives each categorical column of `base` the same categories in both frames
+    (base categories first, new delta values after), so concatenating keeps
+    them categorical and the base codes do not change.
+    """
+    base_updates, delta_updates = {}, {}
+    for col in base.columns:
+        if not isinstance(base[col].dtype, pd.CategoricalDtype) or col not in delta.columns:
+            continue
+        categories = base[col].cat.categories
+        new = pd.Index(delta[col].dropna().unique()).difference(categories)
+        if len(new):
+            base_updates[col] = base[col].cat.add_categories(new)
+            categories = base_updates[col].cat.categories
+        delta_updates[col] = delta[col].astype(pd.CategoricalDtype(categories))
+    if base_updates:
+        base = base.assign(**base_updates)
+    if delta_updates:
+        delta = delta.assign(**delta_updates)
+    return base, delta
+
+
+def split_delta(history, delta):
+    """
+    Returns (rows of `delta` to append, report). Rows whose key is already in
+    `history` or earlier in `delta` are dropped; the report also counts the
+    delta's dates that overlap the history.
+    """
+    columns = key_columns(delta)
+    report = {"key": columns, "delta_rows": len(delta), "duplicate_rows": 0, "repeated_rows": 0}
+    if "Date" in delta.columns and "Date" in history.columns:
+        delta_days = pd.Index(_days(delta)).dropna()
+        overlapping = delta_days.isin(pd.Index(_days(history)).dropna())
+        report["overlapping_dates"] = int(overlapping.sum())
+        report["new_dates"] = int((~overlapping).sum())
+    if columns and all(col in history.columns for col in columns):
+        history_keys, delta_keys = _keys(history, columns), _keys(delta, columns)
+        stored = delta_keys.isin(history_keys)
+        repeated = delta_keys.duplicated() & ~stored
+        report["duplicate_rows"] = int(stored.sum())
+        report["repeated_rows"] = int(repeated.sum())
+        delta = delta[~(stored | repeated)]
+    report["appended_rows"] = len(delta)
+    return delta, report
+
+
+def _days(data):
+    """Distinct days of the Date column (parsed if still text)."""
+    return pd.to_datetime(data["Date"], errors="coerce").dt.normalize().unique()
+
+
+def _sampled(data):
+    """Whether `data` is only a sample of a streamed dataset's rows."""
+    summary = streaming.get_summary(data)
+    return summary is not None and summary.n_sampled < summary.n_rows
+
+
+def _key_reference(data, history, delta):
+    """
+    Rows to check the delta's keys against: the history itself, or for a
+    sampled (streamed) history the key columns of its stored partitions
+    covering the delta's dates. Returns (rows, "all" or "sample").
+    """
+    if not _sampled(data):
+        return history, "all"
+    columns = key_columns(delta)
+    if "Date" not in columns or dataset_store.partitions(data.attrs["content_hash"]) is None:
+        return history, "sample"
+    days = pd.Index(_days(delta)).dropna()
+    date_range = (days.min(), days.max()) if len(days) else None
+    return dataset_store.load(data.attrs["content_hash"], columns=columns, date_range=date_range), "all"
+
+
+def _history_summary(enriched, key, unit_prices):
+    """Full-data cubes of the history: reused if cached (streamed or earlier append), else built once."""
+    summary = streaming.summary_cache.get(key)
+    if summary is not None and summary.dataset_key == enrich.dataset_key(key, unit_prices):
+        return summary
+    cube, breakdowns = streaming.frame_cubes(enriched, default_metrics(enriched))
+    return streaming.StreamSummary(key, cube, unit_prices, len(enriched), 1, len(enriched), breakdowns=breakdowns)
+
+
+def append_delta(data, delta, unit_prices=None):
+    """
+    Appends the rows of `delta` (a parsed upload) to `data` (a loaded, not yet
+    enriched dataset). Returns the combined frame, identified by a new
+    attrs["content_hash"]; its enrichment and full-data cube are cached, so
+    enrich.enrich_frame and the sections pick them up without recomputing history.
+    """
+    unit_prices = unit_prices or enrich.DEFAULT_UNIT_PRICES
+    base_key, delta_key = data.attrs["content_hash"], delta.attrs["content_hash"]
+    key = f"{content_hash(f'{base_key}+{delta_key}'.encode())}-append"
+
+    # Reruns reuse the combined frame; sections rebuild its cubes from it if they
+    # were evicted, except for a sampled history, whose cubes cover rows not in it
+    combined = ingest.memory_cache.get(key)
+    if combined is not None and (streaming.summary_cache.get(key) is not None or not _sampled(data)):
+        return combined.copy(deep=False)
+
+    history, _, _ = enrich.enrich_frame(data, unit_prices)
+    reference, checked = _key_reference(data, history, delta)
+    rows, report = split_delta(reference, delta)
+    report["keys_checked"] = checked
+
+    # Derived columns are per row: only the new rows are enriched
+    data, rows = align_categories(data, rows)
+    timer = enrich.StepTimer()
+    enriched_rows = enrich.add_derived_columns(rows.copy(deep=False), unit_prices, timer)
+    history, enriched_rows = align_categories(history, enriched_rows)
+
+    # A sampled history takes in only the new rows its sampling rule would have picked
+    summary = _history_summary(history, base_key, unit_prices)
+    keep = streaming.sample_mask(len(rows), summary.threshold, seed=int(key[:16], 16))
+    sampled_rows, sampled_enriched = rows[keep], enriched_rows[keep]
+
+    combined = pd.concat([data, sampled_rows], ignore_index=True)
+    enriched = pd.concat([history, sampled_enriched], ignore_index=True)
+    for frame in (combined, enriched):
+        frame.attrs = {
+            "content_hash": key,
+            "appended_to": base_key,
+            "append_report": report,
+            "dtype_report": data.attrs.get("dtype_report"),
+        }
+    enriched.attrs["dataset_key"] = enrich.dataset_key(key, unit_prices)
+
+    # Time aggregates: the history cubes plus the cubes of the new rows
+    cube, breakdowns = summary.cube, summary.breakdowns
+    if len(enriched_rows):
+        cube, breakdowns = streaming.merge_cubes(
+            [(cube, breakdowns), streaming.frame_cubes(enriched_rows, summary.cube.metrics)],
+        )
+    combined_summary = streaming.StreamSummary(
+        key, cube, unit_prices,
+        summary.n_rows + len(enriched_rows), summary.n_chunks + 1,
+        summary.n_sampled + len(sampled_enriched), breakdowns=breakdowns, threshold=summary.threshold,
+    )
+    streaming.store_summary(combined_summary)
+    # Timings shown under "Load timings" are those of enriching the delta
+    enrich.enriched_cache.put((key, tuple(sorted(unit_prices.items()))), (enriched, dict(timer.timings)))
+    # Guest features (built from the frame): merge the appended rows' aggregates into the history's, if built;
+    # persisted like the history's when the combined frame holds every row
+    guests.extend(history.attrs.get("dataset_key"), enriched.attrs["dataset_key"], sampled_enriched,
+                  persist=combined_summary.n_sampled == combined_summary.n_rows)
+    # Correlation statistics: the new rows' partitions added to the history's, if built
+    correlation.extend(history.attrs.get("dataset_key"), enriched.attrs["dataset_key"], enriched_rows)
+    # Partitioned history on disk (streamed uploads): only the months the delta touches get new files
+    if not dataset_store.has(key):
+        dataset_store.extend(base_key, key, rows)
+    ingest.memory_cache.put(key, combined)
+    return combined.copy(deep=False)
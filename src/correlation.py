@@ -0,0 +1,314 @@
+# correlation.py
+"""
+Correlation service: Pearson correlations from sufficient statistics.
+
+For every numeric column, a dataset keeps per-partition sums: the non-null
+count, sum and sum of squares of each column and the cross-product of each
+pair. Partitions are (month, sidebar filter dims). Columns with missing values
+also keep the count, sum and sum of squares of every column over the rows
+where they are present, which is what pandas' pairwise-complete .corr()
+needs. The statistics are built in one pass per dataset. After that, the
+correlation matrix, or any pair in it, for a filter state comes from summing
+the partitions the state selects.
+
+Months that the date range only partly covers are the one exception: their
+filtered rows are scanned and added, which touches at most two months of
+rows. For a streamed sample those rows are read in full from the store, so
+they match the statistics of every row they are added to. Appended deltas and streamed chunks are folded in by adding
+their own partitions (see extend and streaming.stream_csv), so the
+statistics stay exact as a dataset grows.
+
+Values are shifted by the column means of the first rows seen before they are
+summed, which keeps the sums of squares well conditioned.
+"""
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from store import month_codes
+
+STATS_CACHE_BYTES = 512 * 1024 ** 2
+# Variances below this fraction of the (shifted) sum of squares count as zero
+VARIANCE_TOLERANCE = 1e-10
+
+stats_cache = LRUCache(STATS_CACHE_BYTES, sizer=lambda stats: stats.nbytes)
+
+
+def numeric_columns(data):
+    return list(data.select_dtypes(include=[np.number]).columns)
+
+
+def _values(data, columns):
+    """The columns as a float matrix; stray text in a column becomes missing."""
+    return np.column_stack([
+        pd.to_numeric(data[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        for col in columns
+    ]) if columns else np.empty((len(data), 0))
+
+
+class MomentStats:
+    """
+    Sufficient statistics of `columns`, one row of `keys` (Month as yyyymm, 0
+    for rows without a date; MinDay and MaxDay; one column per dim) per
+    partition. Per partition: `count`, `total`, `squares` per column and
+    `cross` per column pair; for each `sparse` column (one with missing values)
+    `pair_count`, `pair_total` and `pair_squares` of every column over the rows
+    where it is present.
+    """
+
+    def __init__(self, columns, shift, dims, keys, count, total, squares, cross,
+                 sparse, pair_count, pair_total, pair_squares):
+        self.columns = list(columns)
+        self.shift = shift
+        self.dims = tuple(dims)
+        self.keys = keys
+        self.count = count
+        self.total = total
+        self.squares = squares
+        self.cross = cross
+        self.sparse = list(sparse)
+        self.pair_count = pair_count
+        self.pair_total = pair_total
+        self.pair_squares = pair_squares
+
+    @property
+    def nbytes(self):
+        arrays = (self.count, self.total, self.squares, self.cross, self.pair_count, self.pair_total, self.pair_squares)
+        return sum(array.nbytes for array in arrays) + int(self.keys.memory_usage(deep=True).sum())
+
+    @classmethod
+    def from_frame(cls, data, columns=None, dims=(), shift=None, date_column="Date"):
+        """Statistics of the rows of `data`. `shift` defaults to the column means."""
+        columns = numeric_columns(data) if columns is None else list(columns)
+        dims = tuple(d for d in dims if d in data.columns)
+        X = _values(data, columns)
+        if shift is None:
+            with np.errstate(invalid="ignore"):
+                shift = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(len(columns))
+        X = X - shift
+        present = ~np.isnan(X)
+        X = np.where(present, X, 0.0)
+        sparse = [i for i in range(len(columns)) if not present[:, i].all()]
+
+        if date_column in data.columns and pd.api.types.is_datetime64_any_dtype(data[date_column]):
+            days = data[date_column].dt.normalize()
+        else:
+            days = pd.Series(pd.NaT, index=data.index, dtype="datetime64[ns]")
+        frame = pd.DataFrame({"Month": month_codes(days), "Day": days.to_numpy()})
+        for dim in dims:
+            # Dim values are compared as text, like the filter index and the cube
+            frame[dim] = data[dim].astype(str).where(data[dim].notna()).to_numpy()
+        grouped = frame.groupby(["Month", *dims], dropna=False, sort=True)
+        ids = grouped.ngroup().to_numpy()
+        keys = grouped["Day"].agg(MinDay="min", MaxDay="max").reset_index()
+
+        n_parts, p, s = len(keys), len(columns), len(sparse)
+        count, total, squares = (np.zeros((n_parts, p)) for _ in range(3))
+        cross = np.zeros((n_parts, p, p))
+        pair_count, pair_total, pair_squares = (np.zeros((n_parts, p, s)) for _ in range(3))
+        order = np.argsort(ids, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(ids, minlength=n_parts))])
+        for g in range(n_parts):
+            rows = order[bounds[g]:bounds[g + 1]]
+            Xg, Pg = X[rows], present[rows]
+            Xg2 = Xg * Xg
+            count[g] = Pg.sum(axis=0)
+            total[g] = Xg.sum(axis=0)
+            squares[g] = Xg2.sum(axis=0)
+            cross[g] = Xg.T @ Xg
+            if s:
+                Ps = Pg[:, sparse].astype("float64")
+                pair_count[g] = Pg.T.astype("float64") @ Ps
+                pair_total[g] = Xg.T @ Ps
+                pair_squares[g] = Xg2.T @ Ps
+        return cls(columns, shift, dims, keys, count, total, squares, cross, sparse, pair_count, pair_total, pair_squares)
+
+    def with_sparse(self, sparse):
+        """The same statistics tracking every column of `sparse` (a superset of self.sparse)."""
+        sparse = sorted(sparse)
+        if sparse == self.sparse:
+            return self
+        shape = (len(self.keys), len(self.columns), len(sparse))
+        pair_count, pair_total, pair_squares = np.empty(shape), np.empty(shape), np.empty(shape)
+        for k, column in enumerate(sparse):
+            if column in self.sparse:
+                j = self.sparse.index(column)
+                pair_count[:, :, k] = self.pair_count[:, :, j]
+                pair_total[:, :, k] = self.pair_total[:, :, j]
+                pair_squares[:, :, k] = self.pair_squares[:, :, j]
+            else:
+                # Never missing here: "where it is present" means every row
+                pair_count[:, :, k] = self.count
+                pair_total[:, :, k] = self.total
+                pair_squares[:, :, k] = self.squares
+        return MomentStats(
+            self.columns, self.shift, self.dims, self.keys, self.count, self.total, self.squares, self.cross,
+            sparse, pair_count, pair_total, pair_squares,
+        )
+
+    @classmethod
+    def merge(cls, parts):
+        """
+        Statistics of the union of the rows behind `parts` (same columns, shift
+        and dims); partitions present in several parts are added together.
+        """
+        parts = list(parts)
+        sparse = sorted(set().union(*(part.sparse for part in parts)))
+        parts = [part.with_sparse(sparse) for part in parts]
+        first = parts[0]
+        keys = pd.concat([part.keys for part in parts], ignore_index=True)
+        grouped = keys.groupby(["Month", *first.dims], dropna=False, sort=True)
+        ids = grouped.ngroup().to_numpy()
+        merged_keys = grouped.agg(MinDay=("MinDay", "min"), MaxDay=("MaxDay", "max")).reset_index()
+
+        def add(name):
+            stacked = np.concatenate([getattr(part, name) for part in parts])
+            out = np.zeros((len(merged_keys), *stacked.shape[1:]))
+            np.add.at(out, ids, stacked)
+            return out
+
+        return cls(
+            first.columns, first.shift, first.dims, merged_keys,
+            add("count"), add("total"), add("squares"), add("cross"),
+            sparse, add("pair_count"), add("pair_total"), add("pair_squares"),
+        )
+
+    def select(self, date_range=None, selections=None):
+        """
+        Partitions of a filter state as two masks: those entirely inside it, and
+        those the date range only partly covers (their rows must be scanned).
+        None if a selection is on a column the partitions are not split by.
+        """
+        keep = np.ones(len(self.keys), dtype=bool)
+        for dim, selected in (selections or {}).items():
+            if dim not in self.dims:
+                return None
+            column = self.keys[dim]
+            keep &= (column.notna() & column.isin({str(v) for v in selected})).to_numpy()
+        if date_range is None:
+            return keep, np.zeros_like(keep)
+        start, end = (pd.Timestamp(d) for d in date_range)
+        dated = (self.keys["Month"] != 0).to_numpy()
+        inside = dated & ((self.keys["MinDay"] >= start) & (self.keys["MaxDay"] <= end)).to_numpy()
+        overlap = dated & ((self.keys["MaxDay"] >= start) & (self.keys["MinDay"] <= end)).to_numpy()
+        return keep & inside, keep & overlap & ~inside
+
+    def sums(self, mask=None, sparse=None):
+        """
+        The statistics summed over the partitions in `mask` (all when None),
+        with pair statistics for every column of `sparse` (default: self.sparse).
+        """
+        chosen = slice(None) if mask is None else mask
+        sparse = self.sparse if sparse is None else sparse
+        summed = {
+            "count": self.count[chosen].sum(axis=0),
+            "total": self.total[chosen].sum(axis=0),
+            "squares": self.squares[chosen].sum(axis=0),
+            "cross": self.cross[chosen].sum(axis=0),
+        }
+        for name, dense in (("pair_count", "count"), ("pair_total", "total"), ("pair_squares", "squares")):
+            pairs = getattr(self, name)[chosen].sum(axis=0)
+            summed[name] = np.column_stack([
+                pairs[:, self.sparse.index(column)] if column in self.sparse else summed[dense]
+                for column in sparse
+            ]) if sparse else np.zeros((len(self.columns), 0))
+        return summed
+
+    def correlations(self, mask=None, extra=None, columns=None):
+        """
+        Pairwise-complete Pearson correlations over the partitions in `mask`
+        (all when None) plus every partition of the MomentStats `extra`,
+        between `columns` (default: all), as a DataFrame like DataFrame.corr().
+        """
+        sparse = sorted(set(self.sparse).union(extra.sparse if extra is not None else ()))
+        summed = self.sums(mask, sparse)
+        if extra is not None:
+            for name, values in extra.sums(None, sparse).items():
+                summed[name] = summed[name] + values
+        columns = self.columns if columns is None else list(columns)
+        idx = [self.columns.index(col) for col in columns]
+        cross = summed["cross"][np.ix_(idx, idx)]
+
+        # Column j of n, sx, sxx: statistics of each column over the rows where column j is present
+        q = len(idx)
+        n = np.repeat(summed["count"][idx, None], q, axis=1)
+        sx = np.repeat(summed["total"][idx, None], q, axis=1)
+        sxx = np.repeat(summed["squares"][idx, None], q, axis=1)
+        for k, column in enumerate(sparse):
+            if column in idx:
+                j = idx.index(column)
+                n[:, j] = summed["pair_count"][idx, k]
+                sx[:, j] = summed["pair_total"][idx, k]
+                sxx[:, j] = summed["pair_squares"][idx, k]
+
+        variance = n * sxx - sx ** 2
+        # Constant columns leave rounding residue rather than an exact zero
+        varies = variance > VARIANCE_TOLERANCE * n * sxx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = (n * cross - sx * sx.T) / np.sqrt(variance * variance.T)
+        r = np.where(varies & varies.T & (n > 1), np.clip(r, -1.0, 1.0), np.nan)
+        # A column is perfectly correlated with itself whenever it varies
+        np.fill_diagonal(r, np.where(np.isnan(np.diag(r)), np.nan, 1.0))
+        return pd.DataFrame(r, index=columns, columns=columns)
+
+
+# ------------------------------- SERVICE -------------------------------
+def get_stats(data, key, dims=(), build=True):
+    """
+    The MomentStats of `data`'s numeric columns, built once per `key`. With
+    `build` False, None unless they are cached (e.g. `data` is only a sample
+    of the rows `key` names).
+    """
+    stats = stats_cache.get(key) if key else None
+    if stats is None and build:
+        stats = MomentStats.from_frame(data, dims=dims)
+        if key:
+            stats_cache.put(key, stats)
+    return stats
+
+
+def correlations(ctx, columns=None, dims=()):
+    """
+    Correlation matrix of a SectionContext's filtered rows, between `columns`
+    (default: every numeric column), from the dataset's statistics split by
+    `dims` (the sidebar filter columns). Computed from the filtered rows
+    instead when there are no statistics of the rows the dataset key names.
+    """
+    if not ctx.dataset or ctx.data.attrs.get("dataset_key") != ctx.dataset:
+        # No identity, or the filtered rows do not come from ctx.data (a streamed
+        # date range read in full from its partitions while ctx.data is the sample)
+        return MomentStats.from_frame(ctx.filtered, columns).correlations()
+    # A sample's statistics are those streamed over every row; never rebuilt from the sample
+    stats = get_stats(ctx.data, ctx.dataset, dims, build=not ctx.sampled)
+    dates, chosen = ctx.state
+    selection = stats.select(dates, dict(chosen)) if stats is not None else None
+    if selection is None or any(col not in stats.columns for col in columns or ()):
+        # Filters or columns the statistics do not cover: computed from the rows
+        return MomentStats.from_frame(ctx.filtered, columns).correlations()
+    inside, partial = selection
+    extra = None
+    if partial.any() and "Date" in ctx.filtered.columns:
+        months = list(set(stats.keys["Month"][partial]))
+        # Months the range cuts through are scanned whole, so none of their partitions count as inside
+        inside = inside & ~stats.keys["Month"].isin(months).to_numpy()
+        # Every filtered row of those months, to add to statistics of every row (read from
+        # the store for a sample); without a store, the sample alone gives the whole range
+        rows = ctx.month_rows(months)
+        if rows is None:
+            return MomentStats.from_frame(ctx.filtered, columns).correlations()
+        extra = MomentStats.from_frame(rows, stats.columns, stats.dims, shift=stats.shift)
+    return stats.correlations(inside, extra, columns)
+
+
+def extend(base_key, key, rows):
+    """
+    Stores the statistics of dataset `key` = dataset `base_key` plus the
+    enriched `rows`, if the base's are cached: only `rows` are read.
+    """
+    base = stats_cache.get(base_key) if base_key else None
+    if base is None or any(col not in rows.columns for col in base.columns):
+        return None
+    delta = MomentStats.from_frame(rows, base.columns, base.dims, shift=base.shift)
+    stats = MomentStats.merge([base, delta]) if len(rows) else base
+    stats_cache.put(key, stats)
+    return stats
@@ -0,0 +1,203 @@
+# cube.py
+"""
+Pre-aggregated time cube shared by the dashboard sections.
+
+The cube is built once per (dataset, filter state) at day grain, optionally
+split by a few dimension columns (ReservationStatus, Company, ...), and keeps a
+sum and a non-null count per metric column. Weekly, monthly, quarterly and
+yearly series are rolled up from those day rows, so sections never rescan the
+raw bookings to get a time series. Rows without a date are kept in cube rows
+of their own (Day is NaT): they count towards totals, but not towards any
+period or date range.
+"""
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+FREQUENCIES = ("D", "W", "M", "Q", "Y")
+
+# Columns that are dimensions or date parts rather than measures
+NON_METRIC_COLUMNS = {"Year", "Month", "Quarter"}
+
+CUBE_CACHE_BYTES = 256 * 1024 ** 2
+
+cube_cache = LRUCache(CUBE_CACHE_BYTES, sizer=lambda cube: cube.nbytes)
+
+
+def default_metrics(data):
+    return [
+        col for col in data.select_dtypes(include=[np.number]).columns
+        if col not in NON_METRIC_COLUMNS
+    ]
+
+
+class TimeCube:
+    """
+    Day-grain aggregates: one row per (Day, *dims) with `Rows` plus
+    `<metric>__sum` / `<metric>__count` columns; Day is NaT for undated rows.
+    """
+
+    def __init__(self, base, metrics, dims=()):
+        self.base = base
+        self.metrics = list(metrics)
+        self.dims = tuple(dims)
+
+    @classmethod
+    def from_frame(cls, data, metrics=None, dims=(), date_column="Date", dropna=True):
+        """
+        Builds the cube from rows. With `dropna=False`, rows with a missing date
+        or dim value keep their own cube rows; otherwise they are dropped.
+        """
+        metrics = [m for m in (metrics if metrics is not None else default_metrics(data)) if m in data.columns]
+        dims = tuple(dims)
+        keys = [data[date_column].dt.normalize().rename("Day")] + [data[d] for d in dims]
+        grouped = data[metrics].groupby(keys, observed=True, sort=True, dropna=dropna)
+        sums = grouped.sum().add_suffix("__sum")
+        counts = grouped.count().add_suffix("__count")
+        rows = grouped.size().rename("Rows")
+        base = pd.concat([rows, sums, counts], axis=1).reset_index()
+        return cls(base, metrics, dims)
+
+    @classmethod
+    def merge(cls, cubes):
+        """Combines cubes with the same dims (e.g. built from chunks of one file) into one."""
+        cubes = list(cubes)
+        dims = cubes[0].dims
+        metrics = list(dict.fromkeys(m for c in cubes for m in c.metrics))
+        base = pd.concat([c.base for c in cubes], ignore_index=True)
+        # Rows, sums and counts are all additive
+        base = base.groupby(["Day", *dims], observed=True, sort=True, dropna=False).sum()
+        return cls(base.reset_index(), metrics, dims)
+
+    def filter(self, date_range=None, selections=None):
+        """
+        Cube restricted to days in `date_range` (inclusive) and dim values in
+        `selections` ({dim: selected values}, compared as text); undated rows are
+        excluded by a date range, and rows with a missing dim value once that dim
+        is selected on, as in FilterIndex.
+        """
+        keep = np.ones(len(self.base), dtype=bool)
+        if date_range is not None:
+            start, end = (pd.Timestamp(d) for d in date_range)
+            keep &= ((self.base["Day"] >= start) & (self.base["Day"] <= end)).to_numpy()
+        for dim, selected in (selections or {}).items():
+            column = self.base[dim]
+            keep &= (column.notna() & column.astype(str).isin({str(v) for v in selected})).to_numpy()
+        return TimeCube(self.base[keep].reset_index(drop=True), self.metrics, self.dims)
+
+    @property
+    def nbytes(self):
+        return int(self.base.memory_usage(deep=True).sum())
+
+    def date_bounds(self):
+        """(first, last) Day of the dated rows, or None when no row has a date."""
+        days = self.base["Day"].dropna()
+        if days.empty:
+            return None
+        return days.min(), days.max()
+
+    @staticmethod
+    def _labels(days, freq, label):
+        """Period label (same text as Series.dt.to_period(freq).astype(str)) per day."""
+        if freq == "D":
+            periods = days.dt.to_period("D")
+        else:
+            # Only the distinct days are converted, not every base row
+            codes, unique_days = pd.factorize(days, sort=True)
+            unique_periods = pd.Series(unique_days).dt.to_period(freq)
+            periods = unique_periods.take(codes).reset_index(drop=True)
+        return pd.DataFrame({
+            label: periods.astype(str).to_numpy(),
+            "PeriodStart": periods.dt.start_time.to_numpy(),
+        })
+
+    def rollup(self, freq, aggs, by=(), how="sum", label="Period", start_column=None):
+        """
+        Aggregates the cube to `freq` (one of D/W/M/Q/Y), optionally split by `by`
+        (a subset of the cube's dims). Undated rows belong to no period.
+
+        `aggs` is either a list of metric names, aggregated with `how`, or a
+        dict {output column: (metric, how)}. `how` is "sum", "mean", "count"
+        (non-null values of the metric) or "rows" (metric ignored).
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency {freq!r}; expected one of {FREQUENCIES}")
+        aggs, by, needed = self._plan(aggs, by, how)
+        base = self.base[self.base["Day"].notna()]
+        frame = pd.concat(
+            [self._labels(base["Day"], freq, label), base[by + sorted(needed)].reset_index(drop=True)],
+            axis=1,
+        )
+        summed = frame.groupby([label] + by, observed=True, sort=True).agg(
+            {"PeriodStart": "min", **{col: "sum" for col in needed}}
+        )
+
+        result = pd.DataFrame(index=summed.index)
+        if start_column:
+            result[start_column] = summed["PeriodStart"]
+        return _finish(result, summed, aggs).reset_index()
+
+    def totals(self, aggs, by=(), how="sum"):
+        """
+        Like rollup, over every row of the cube, undated ones included: a one-row
+        frame, or one row per combination of the `by` dims (missing dim values
+        left out).
+        """
+        aggs, by, needed = self._plan(aggs, by, how)
+        columns = sorted(needed)
+        if by:
+            summed = self.base.groupby(by, observed=True, sort=True)[columns].sum()
+        else:
+            summed = self.base[columns].sum().to_frame().T
+        result = _finish(pd.DataFrame(index=summed.index), summed, aggs)
+        return result.reset_index() if by else result.reset_index(drop=True)
+
+    def _plan(self, aggs, by, how):
+        """(aggs as {output: (metric, how)}, by as a list, base columns needed)."""
+        if not isinstance(aggs, dict):
+            aggs = {metric: (metric, how) for metric in aggs}
+        by = list(by)
+        missing = [d for d in by if d not in self.dims]
+        if missing:
+            raise ValueError(f"Cube has no dimension(s) {missing}")
+
+        needed = {"Rows"}
+        for metric, agg_how in aggs.values():
+            if agg_how in ("sum", "mean"):
+                needed.add(f"{metric}__sum")
+            if agg_how in ("count", "mean"):
+                needed.add(f"{metric}__count")
+        return aggs, by, needed
+
+
+def _finish(result, summed, aggs):
+    """Fills `result` with each output of `aggs` from the summed Rows/__sum/__count columns."""
+    for output, (metric, agg_how) in aggs.items():
+        if agg_how == "sum":
+            result[output] = summed[f"{metric}__sum"]
+        elif agg_how == "count":
+            result[output] = summed[f"{metric}__count"]
+        elif agg_how == "mean":
+            result[output] = summed[f"{metric}__sum"] / summed[f"{metric}__count"].replace(0, np.nan)
+        elif agg_how == "rows":
+            result[output] = summed["Rows"]
+        else:
+            raise ValueError(f"Unknown aggregation {agg_how!r}")
+    return result
+
+
+def get_cube(data, state=None, dims=(), metrics=None):
+    """
+    Returns the TimeCube of `data` (a filtered view) for `dims`, building it once
+    per (dataset, filter state, dims, metrics). Rows with a missing date or dim
+    value are kept, so totals over the cube cover every row.
+    """
+    dataset = data.attrs.get("dataset_key") or data.attrs.get("content_hash")
+    key = (dataset, state, tuple(dims), tuple(metrics) if metrics is not None else None)
+    cube = cube_cache.get(key) if dataset else None
+    if cube is None:
+        cube = TimeCube.from_frame(data, metrics=metrics, dims=dims, dropna=False)
+        if dataset:
+            cube_cache.put(key, cube)
+    return cube
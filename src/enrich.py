@@ -0,0 +1,160 @@
+# enrich.py
+"""
+Enrichment stage: parses the date columns and adds the derived columns
+(Year, *RoomRevenue, RoomCost, Profit) every dashboard section relies on.
+
+The result is memoized on (dataset hash, unit prices), so the derived columns
+are computed once per upload instead of on every rerun.
+"""
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from cache import LRUCache
+from registry import dataset_registry
+
+# Default cost per occupied room, by room type
+DEFAULT_UNIT_PRICES = {
+    "Single Room": 470,
+    "Double Room": 680,
+    "Family Room": 729,
+    "Royal Room": 800
+}
+
+DATE_COLUMNS = ["Date", "CheckInDate", "CheckOutDate"]
+
+COST_COLUMNS = [
+    "UtilityCostElectricity",
+    "UtilityCostWater",
+    "UtilityCostGas",
+    "StaffSalaryHousekeeping",
+    "StaffSalaryFrontDesk",
+    "StaffSalaryMaintenance",
+    "StaffSalaryF&B",
+    "StaffSalaryMarketing",
+    "MaintenanceCost",
+    "DepreciationCost",
+    "MealPlanCost",
+]
+
+ENRICH_CACHE_BYTES = 1024 ** 3
+
+enriched_cache = LRUCache(ENRICH_CACHE_BYTES)
+
+
+class StepTimer:
+    """Records how long each named enrichment step takes, in insertion order."""
+
+    def __init__(self):
+        self.timings = OrderedDict()
+
+    def step(self, name):
+        return _Step(self, name)
+
+
+class _Step:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.timings[self.name] = time.perf_counter() - self.start
+        return False
+
+
+def _widen(series):
+    """Room counts may be stored as int8/int16; widen before multiplying by prices."""
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype("int64")
+    return series
+
+
+def add_derived_columns(data, unit_prices, timer=None):
+    """Adds the date, revenue, cost and profit columns to `data` in place."""
+    timer = timer or StepTimer()
+
+    # Convert Date columns to datetime
+    with timer.step("parse_dates"):
+        for col in DATE_COLUMNS:
+            data[col] = pd.to_datetime(data[col], errors='coerce')
+
+    # Add Year column for analysis
+    with timer.step("year"):
+        if "Date" in data.columns and data["Date"].notna().any():
+            data["Year"] = data["Date"].dt.year
+        else:
+            data["Year"] = 0  # fallback if Date is missing
+
+    # Calculate Rooms Revenue Per Year (including Family Room)
+    with timer.step("room_revenue"):
+        if "ADR" in data.columns:
+            data["SingleRoomRevenue"] = data.get("SingleRoomsOccupied", 0) * data["ADR"]
+            data["DoubleRoomRevenue"] = data.get("DoubleRoomsOccupied", 0) * data["ADR"]
+            data["RoyalRoomRevenue"] = data.get("RoyalRoomsOccupied", 0) * data["ADR"]
+            data["FamilyRoomRevenue"] = data.get("FamilyRoomsOccupied", 0) * data["ADR"]
+        else:
+            # If no ADR column, create placeholders
+            data["SingleRoomRevenue"] = 0
+            data["DoubleRoomRevenue"] = 0
+            data["RoyalRoomRevenue"] = 0
+            data["FamilyRoomRevenue"] = 0
+
+    # Calculate Room Costs
+    with timer.step("room_cost"):
+        data["RoomCost"] = (
+            _widen(data["SingleRoomsOccupied"]) * unit_prices["Single Room"] +
+            _widen(data["DoubleRoomsOccupied"]) * unit_prices["Double Room"] +
+            _widen(data["FamilyRoomsOccupied"]) * unit_prices["Family Room"] +
+            _widen(data["RoyalRoomsOccupied"]) * unit_prices["Royal Room"]
+        )
+
+    # Calculate Profit
+    with timer.step("profit"):
+        data["Profit"] = data["TotalRevenue"] - (
+            data["RoomCost"] + data[COST_COLUMNS].sum(axis=1, skipna=False)
+        )
+
+    return data
+
+
+def dataset_key(content_hash, unit_prices):
+    """Identity of a dataset enriched with `unit_prices`, for the filter and section caches."""
+    return f"{content_hash}:" + ",".join(str(p) for _, p in sorted(unit_prices.items()))
+
+
+def enrich_frame(data, unit_prices=None):
+    """
+    Returns (enriched frame, step timings in seconds, served-from-cache flag).
+    Datasets are identified by attrs["content_hash"]; frames without one are
+    enriched without memoization. Timings are those of the original computation.
+    """
+    unit_prices = unit_prices or DEFAULT_UNIT_PRICES
+    dataset_hash = data.attrs.get("content_hash")
+    key = (dataset_hash, tuple(sorted(unit_prices.items())))
+
+    cached = enriched_cache.get(key) if dataset_hash else None
+    if cached is None and dataset_hash:
+        # Evicted here but still held by another session: share its frame
+        shared = dataset_registry.get(dataset_key(dataset_hash, unit_prices))
+        if shared is not None:
+            cached = enriched_cache.put(key, (shared, {}))
+    from_cache = cached is not None
+    if cached is None:
+        timer = StepTimer()
+        start = time.perf_counter()
+        enriched = add_derived_columns(data.copy(deep=False), unit_prices, timer)
+        timer.timings["total"] = time.perf_counter() - start
+        if dataset_hash:
+            # Identity of the enriched dataset for the filter and section caches
+            enriched.attrs["dataset_key"] = dataset_key(dataset_hash, unit_prices)
+        cached = (enriched, dict(timer.timings))
+        if dataset_hash:
+            enriched_cache.put(key, cached)
+
+    enriched, timings = cached
+    return enriched.copy(deep=False), timings, from_cache
@@ -0,0 +1,185 @@
+# filters.py
+"""
+Filter engine for the Data Filtering sidebar.
+
+A FilterIndex is built once per dataset: packed per-value bitmaps for the
+sidebar's categorical columns (Nationality, LoyaltyTier) and a sorted date
+index for range lookups. It keeps only those arrays, not the frame, so a
+cached index does not hold a dataset in memory. Changing a filter only combines bitmaps, and the filtered
+view itself is cached per filter state, so flipping back to an earlier
+selection does not touch the rows again.
+"""
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+# Categorical columns the sidebar filters on
+FILTER_COLUMNS = ("Nationality", "LoyaltyTier")
+
+# Columns with more distinct values than this are filtered through a code
+# lookup table instead of one bitmap per value
+MAX_BITMAP_VALUES = 64
+
+INDEX_CACHE_BYTES = 256 * 1024 ** 2
+VIEW_CACHE_BYTES = 1024 ** 3
+
+
+def _index_size(index):
+    return index.nbytes
+
+
+index_cache = LRUCache(INDEX_CACHE_BYTES, sizer=_index_size)
+view_cache = LRUCache(VIEW_CACHE_BYTES)
+
+
+class FilterIndex:
+    """Bitmap / sorted-date index over one dataset."""
+
+    def __init__(self, data, date_column="Date", columns=FILTER_COLUMNS):
+        self.n_rows = len(data)
+        self._columns = {col: self._factorize(data[col]) for col in columns if col in data.columns}
+        self.date_order = None
+        self.sorted_dates = None
+        self.n_valid_dates = 0
+        self.dates_presorted = False
+        if date_column in data.columns and pd.api.types.is_datetime64_any_dtype(data[date_column]):
+            dates = data[date_column].to_numpy(dtype="datetime64[ns]")
+            # NaT sorts last, so valid dates occupy sorted_dates[:n_valid_dates]
+            self.date_order = np.argsort(dates, kind="stable")
+            self.sorted_dates = dates[self.date_order]
+            self.n_valid_dates = int((~np.isnat(dates)).sum())
+            self.dates_presorted = bool(np.all(self.date_order[1:] > self.date_order[:-1]))
+
+    @property
+    def nbytes(self):
+        total = 0
+        if self.date_order is not None:
+            total += self.date_order.nbytes + self.sorted_dates.nbytes
+        for entry in self._columns.values():
+            total += entry["codes"].nbytes
+            total += sum(bitmap.nbytes for bitmap in entry["bitmaps"] or [])
+        return total
+
+    # ------------------------------ dates ---------------------------------
+    def date_bounds(self):
+        """(min, max) of the valid dates, or None when there are none."""
+        if not self.n_valid_dates:
+            return None
+        return (
+            pd.Timestamp(self.sorted_dates[0]),
+            pd.Timestamp(self.sorted_dates[self.n_valid_dates - 1]),
+        )
+
+    def date_range_bitmap(self, start, end):
+        """Packed bitmap of rows with start <= Date <= end."""
+        lo = np.searchsorted(self.sorted_dates[:self.n_valid_dates], np.datetime64(pd.Timestamp(start)), "left")
+        hi = np.searchsorted(self.sorted_dates[:self.n_valid_dates], np.datetime64(pd.Timestamp(end)), "right")
+        mask = np.zeros(self.n_rows, dtype=bool)
+        if self.dates_presorted:
+            mask[lo:hi] = True
+        else:
+            mask[self.date_order[lo:hi]] = True
+        return np.packbits(mask)
+
+    # --------------------------- categoricals -----------------------------
+    @staticmethod
+    def _factorize(column):
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+        bitmaps = None
+        if len(uniques) <= MAX_BITMAP_VALUES:
+            bitmaps = [np.packbits(codes == i) for i in range(len(uniques))]
+        return {
+            "codes": codes,
+            "has_nulls": bool((codes < 0).any()),
+            "values": list(uniques),
+            "lookup": {value: i for i, value in enumerate(uniques)},
+            "bitmaps": bitmaps,
+        }
+
+    def _column(self, col):
+        if col not in self._columns:
+            raise KeyError(f"Column {col!r} is not indexed for filtering")
+        return self._columns[col]
+
+    def values(self, col):
+        """Distinct non-null values of `col`, in order of first appearance."""
+        return self._column(col)["values"]
+
+    def values_bitmap(self, col, selected):
+        """
+        Packed bitmap of rows whose `col` is one of `selected`; None when every
+        value is selected (no constraint).
+        """
+        entry = self._column(col)
+        selected_codes = sorted({entry["lookup"][v] for v in selected if v in entry["lookup"]})
+        if len(selected_codes) == len(entry["values"]) and not entry["has_nulls"]:
+            return None
+        if entry["bitmaps"] is not None:
+            if not selected_codes:
+                return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            return np.bitwise_or.reduce([entry["bitmaps"][i] for i in selected_codes])
+        allowed = np.zeros(len(entry["values"]) + 1, dtype=bool)
+        allowed[selected_codes] = True
+        # Null rows (code -1) map to the trailing False slot
+        return np.packbits(allowed[entry["codes"]])
+
+    def mask(self, date_range=None, selections=None):
+        """Boolean row mask for a date range and {column: selected values}; None if unconstrained."""
+        bitmaps = []
+        if date_range is not None and self.date_order is not None:
+            bitmaps.append(self.date_range_bitmap(*date_range))
+        for col, selected in (selections or {}).items():
+            bitmap = self.values_bitmap(col, selected)
+            if bitmap is not None:
+                bitmaps.append(bitmap)
+        if not bitmaps:
+            return None
+        combined = np.bitwise_and.reduce(bitmaps) if len(bitmaps) > 1 else bitmaps[0]
+        return np.unpackbits(combined, count=self.n_rows).astype(bool)
+
+
+def dataset_key(data):
+    """Identity of an (enriched) dataset for the filter caches."""
+    return data.attrs.get("dataset_key") or data.attrs.get("content_hash")
+
+
+def get_index(data):
+    """Returns the FilterIndex for `data`, building it once per dataset."""
+    key = dataset_key(data)
+    index = index_cache.get(key) if key else None
+    if index is None:
+        index = FilterIndex(data)
+        if key:
+            index_cache.put(key, index)
+    return index
+
+
+def filter_state(date_range=None, selections=None):
+    """Hashable description of the sidebar filter widgets."""
+    dates = tuple(str(pd.Timestamp(d).date()) for d in date_range) if date_range else None
+    chosen = tuple(
+        (col, tuple(sorted(map(str, values))))
+        for col, values in sorted((selections or {}).items())
+    )
+    return (dates, chosen)
+
+
+def filtered_view(data, index, date_range=None, selections=None):
+    """
+    Returns (filtered frame, filter state) for the sidebar selections, reusing
+    the cached view when the same state was seen before.
+    """
+    state = filter_state(date_range, selections)
+    key = dataset_key(data)
+    view = view_cache.get((key, state)) if key else None
+    if view is None:
+        mask = index.mask(date_range, selections)
+        if mask is None:
+            view = data
+        else:
+            view = data[mask]
+            if key:
+                view_cache.put((key, state), view)
+    # Shallow copy: sections add helper columns (Month, Quarter) to their view
+    return view.copy(deep=False), state
@@ -0,0 +1,248 @@
+# forecast.py
+"""
+Demand and ADR forecasting behind Dynamic Pricing Suggestions.
+
+Each room type (plus "All") gets two daily series from the day cube: rooms
+occupied and ADR (room revenue per occupied room; the ADR column for "All").
+Each series is fitted with a damped-trend Holt-Winters model with weekly
+seasonality (statsmodels). With two or more years of history, the
+month-of-year profile is taken out before fitting and added back to the
+forecast.
+
+Every model forecasts MAX_HORIZON days in one call, and all series are
+stacked into one table, so a shorter horizon is a slice of it rather than
+another forecast. Forecasts of a whole dataset are persisted under the dataset
+store (JSON model parameters plus a Parquet forecast table), so they are only
+refitted when the data changes (a new dataset key) or MODEL_VERSION changes;
+filtered views are fitted on demand and kept in memory.
+
+Like analytics.py, nothing here imports Streamlit or Plotly; statsmodels is
+imported when a model is first fitted.
+"""
+import hashlib
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from store import WRITE_ERRORS, dataset_store
+
+HORIZONS = (7, 30, 90, 365)
+MAX_HORIZON = max(HORIZONS)
+
+# Room type -> (rooms occupied, room revenue) columns
+ROOM_TYPES = {
+    "Single": ("SingleRoomsOccupied", "SingleRoomRevenue"),
+    "Double": ("DoubleRoomsOccupied", "DoubleRoomRevenue"),
+    "Royal": ("RoyalRoomsOccupied", "RoyalRoomRevenue"),
+    "Family": ("FamilyRoomsOccupied", "FamilyRoomRevenue"),
+}
+ALL_ROOMS = "All"
+
+SEASON_DAYS = 7
+# Series with fewer days of history are not forecast
+MIN_HISTORY_DAYS = 4 * SEASON_DAYS
+# The month-of-year profile needs this much history
+YEARLY_PROFILE_DAYS = 730
+
+# Bump when the models change, so persisted forecasts are refitted
+MODEL_VERSION = 1
+FORECAST_DIR = os.path.join(dataset_store.root, "_forecasts")
+
+forecast_cache = LRUCache(64 * 1024 ** 2, sizer=lambda forecast: forecast.nbytes)
+
+
+class Forecast:
+    """
+    Daily forecasts of every series for the MAX_HORIZON days after the data:
+    `table` has Date, RoomType, Demand and ADR; `models` the fitted parameters
+    per series ({"<room type>/<Demand|ADR>": {...}}).
+    """
+
+    def __init__(self, table, models):
+        self.table = table
+        self.models = models
+
+    @property
+    def nbytes(self):
+        return int(self.table.memory_usage(deep=True).sum())
+
+    def horizon(self, days):
+        """The first `days` days of the forecast."""
+        start = self.table["Date"].min()
+        return self.table[self.table["Date"] < start + pd.Timedelta(days=days)].reset_index(drop=True)
+
+
+# ------------------------------- SERIES --------------------------------
+def daily_series(cube):
+    """
+    {(room type, "Demand" | "ADR"): daily series} from a TimeCube, on a
+    complete calendar (days without bookings: no demand, ADR interpolated).
+    """
+    aggs = {}
+    if "ADR" in cube.metrics:
+        aggs[f"{ALL_ROOMS}/ADR"] = ("ADR", "mean")
+    if "OccupiedRooms" in cube.metrics:
+        aggs[f"{ALL_ROOMS}/Demand"] = ("OccupiedRooms", "sum")
+    for room, (occupied, revenue) in ROOM_TYPES.items():
+        if occupied in cube.metrics:
+            aggs[f"{room}/Demand"] = (occupied, "sum")
+            if revenue in cube.metrics:
+                aggs[f"{room}/Revenue"] = (revenue, "sum")
+    if not aggs or cube.date_bounds() is None:
+        return {}
+
+    daily = cube.rollup("D", aggs, start_column="Day").set_index("Day").drop(columns="Period")
+    daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"))
+    series = {}
+    for column in daily.columns:
+        room, kind = column.split("/")
+        if kind == "Demand":
+            series[(room, "Demand")] = daily[column].fillna(0)
+        elif kind == "ADR":
+            series[(room, "ADR")] = daily[column].interpolate(limit_direction="both")
+        else:
+            adr = daily[column] / daily[f"{room}/Demand"].where(daily[f"{room}/Demand"] > 0)
+            series[(room, "ADR")] = adr.interpolate(limit_direction="both")
+    return {key: values for key, values in series.items() if values.notna().all()}
+
+
+# ------------------------------- MODELS --------------------------------
+def _yearly_profile(series):
+    """Mean offset of each calendar month from the overall mean (zeros without two years of history)."""
+    if len(series) < YEARLY_PROFILE_DAYS:
+        return np.zeros(12)
+    by_month = series.groupby(series.index.month).mean()
+    return (by_month - series.mean()).reindex(range(1, 13), fill_value=0.0).to_numpy()
+
+
+def fit_series(series, days=MAX_HORIZON):
+    """
+    Fits one daily series and forecasts the `days` days after it. Returns
+    (forecast values, model parameters), or None with too little history.
+    """
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    if len(series) < MIN_HISTORY_DAYS:
+        return None
+    profile = _yearly_profile(series)
+    future = pd.date_range(series.index[-1] + pd.Timedelta(days=1), periods=days, freq="D")
+    adjusted = series.to_numpy(dtype="float64") - profile[series.index.month - 1]
+    if np.ptp(adjusted) == 0:
+        # Constant series (e.g. a room type never booked): nothing to fit
+        return np.full(days, adjusted[0]) + profile[future.month - 1], {"constant": float(adjusted[0])}
+
+    model = ExponentialSmoothing(
+        adjusted, trend="add", damped_trend=True, seasonal="add",
+        seasonal_periods=SEASON_DAYS, initialization_method="estimated",
+    )
+    with warnings.catch_warnings():
+        # Short or flat series trigger convergence warnings; the fit is still usable
+        warnings.simplefilter("ignore")
+        fitted = model.fit()
+    params = {
+        name: float(fitted.params[name])
+        for name in ("smoothing_level", "smoothing_trend", "smoothing_seasonal", "damping_trend")
+    }
+    params["sse"] = float(fitted.sse)
+    params["yearly_profile"] = profile.tolist()
+    return fitted.forecast(days) + profile[future.month - 1], params
+
+
+def fit(cube):
+    """Forecast of every series of a TimeCube, or None when none has enough history."""
+    series = daily_series(cube)
+    columns, models = {}, {}
+    for (room, kind), values in series.items():
+        fitted = fit_series(values)
+        if fitted is None:
+            continue
+        forecast, params = fitted
+        # Demand and ADR cannot go negative
+        columns.setdefault(room, {})[kind] = np.maximum(forecast, 0)
+        models[f"{room}/{kind}"] = params
+    if not columns:
+        return None
+
+    start = next(iter(series.values())).index[-1] + pd.Timedelta(days=1)
+    dates = pd.date_range(start, periods=MAX_HORIZON, freq="D")
+    table = pd.concat(
+        [
+            pd.DataFrame({
+                "Date": dates,
+                "RoomType": room,
+                "Demand": kinds.get("Demand", np.nan),
+                "ADR": kinds.get("ADR", np.nan),
+            })
+            for room, kinds in columns.items()
+        ],
+        ignore_index=True,
+    )
+    return Forecast(table, models)
+
+
+# ----------------------------- PERSISTENCE -----------------------------
+def _forecast_dir(key):
+    digest = hashlib.sha256(f"{key}|{MODEL_VERSION}".encode()).hexdigest()[:32]
+    return os.path.join(FORECAST_DIR, digest)
+
+
+def load(key):
+    """The persisted Forecast of dataset `key`, or None."""
+    if not dataset_store.available:
+        return None
+    directory = _forecast_dir(key)
+    try:
+        with open(os.path.join(directory, "models.json")) as f:
+            meta = json.load(f)
+        table = pd.read_parquet(os.path.join(directory, "forecast.parquet"), engine="pyarrow")
+    except (OSError, ValueError):
+        return None
+    if meta.get("key") != key or meta.get("version") != MODEL_VERSION:
+        return None
+    return Forecast(table, meta["models"])
+
+
+def save(key, forecast):
+    """Persists `forecast` for dataset `key`. Returns False if it could not be written."""
+    if not dataset_store.available:
+        return False
+    directory = _forecast_dir(key)
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    try:
+        os.makedirs(tmp_dir)
+        forecast.table.to_parquet(os.path.join(tmp_dir, "forecast.parquet"), engine="pyarrow", index=False)
+        with open(os.path.join(tmp_dir, "models.json"), "w") as f:
+            json.dump({"key": key, "version": MODEL_VERSION, "models": forecast.models}, f)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_dir, directory)
+    except WRITE_ERRORS:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    return True
+
+
+def get_forecast(ctx):
+    """
+    The Forecast of a SectionContext's filtered rows. When no row is filtered
+    out, it is the dataset's forecast, read from disk if it was persisted and
+    persisted after fitting otherwise.
+    """
+    whole = bool(ctx.dataset) and ctx.data.attrs.get("dataset_key") == ctx.dataset and len(ctx.filtered) == len(ctx.data)
+    key = ctx.dataset if whole else (ctx.dataset, ctx.state) if ctx.dataset else None
+    forecast = forecast_cache.get(key) if key else None
+    if forecast is not None:
+        return forecast
+    forecast = load(key) if whole else None
+    if forecast is None:
+        forecast = fit(ctx.cube())
+        if whole and forecast is not None:
+            save(key, forecast)
+    if key and forecast is not None:
+        forecast_cache.put(key, forecast)
+    return forecast
@@ -0,0 +1,223 @@
+# guests.py
+"""
+Guest-level feature store.
+
+One row per GuestID: visit count, total and average spend, first and last
+stay, recency, frequency, tenure, loyalty tier (on the guest's latest stay),
+preferred room type and mean feedback. The guest-centric sections (retention,
+CLTV, preferences, segmentation) read this table instead of each regrouping
+the booking rows.
+
+The table is kept as mergeable aggregates (counts, sums, min/max dates, room
+type counts, the tier with the date it was seen on), so it is built once per
+dataset, and an appended delta only aggregates its own rows and merges them
+in (see extend). Derived features (averages, recency, preferred room) are
+computed from the aggregates on read.
+
+The aggregates of a whole dataset are persisted under the dataset store (one
+Parquet file per dataset key, like the forecasts), so a later session reads
+them instead of regrouping the rows. Aggregates of a streamed upload's sample,
+or of a filtered view, are only kept in memory.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from store import WRITE_ERRORS, dataset_store
+
+FEATURE_CACHE_BYTES = 256 * 1024 ** 2
+
+# Bump when the aggregates change, so persisted tables are rebuilt
+AGGREGATE_VERSION = 1
+GUEST_DIR = os.path.join(dataset_store.root, "_guests")
+
+# Prefix of the per-room-type booking counts in the aggregates
+ROOM_PREFIX = "Room:"
+
+feature_cache = LRUCache(FEATURE_CACHE_BYTES)
+
+
+def aggregate(data):
+    """Mergeable per-guest aggregates of booking rows, sorted by GuestID; None without GuestID."""
+    if "GuestID" not in data.columns:
+        return None
+    groups = data.groupby("GuestID", observed=True)
+    parts = {"VisitCount": groups.size()}
+    if "TotalRevenue" in data.columns:
+        parts["TotalSpent"] = groups["TotalRevenue"].sum()
+    if "Date" in data.columns:
+        parts["FirstStay"] = groups["Date"].min()
+        parts["LastStay"] = groups["Date"].max()
+    if "GuestFeedbackScore" in data.columns:
+        parts["FeedbackSum"] = groups["GuestFeedbackScore"].sum()
+        parts["FeedbackCount"] = groups["GuestFeedbackScore"].count()
+    if "LoyaltyTier" in data.columns and "Date" in data.columns:
+        latest = _latest_tiers(data[["GuestID", "LoyaltyTier", "Date"]].set_index("GuestID"), "Date")
+        parts["LoyaltyTier"] = latest["LoyaltyTier"]
+        parts["TierDate"] = latest["Date"]
+    elif "LoyaltyTier" in data.columns:
+        # Without dates, the tier on the guest's last booking row
+        parts["LoyaltyTier"] = groups["LoyaltyTier"].last()
+    table = pd.DataFrame(parts)
+    if "RoomType" in data.columns:
+        rooms = data.groupby(["GuestID", "RoomType"], observed=True).size().unstack(fill_value=0)
+        rooms.columns = [f"{ROOM_PREFIX}{room}" for room in rooms.columns]
+        table = table.join(rooms)
+    return table
+
+
+def _latest_tiers(tiers, date_column):
+    """
+    [LoyaltyTier, date_column] per guest (the index) from the row with the
+    latest date; on the same date the later row wins, rows without a date lose.
+    """
+    tiers = tiers[tiers["LoyaltyTier"].notna()]
+    tiers = tiers.sort_values(date_column, kind="stable", na_position="first")
+    return tiers[~tiers.index.duplicated(keep="last")]
+
+
+def merge(tables):
+    """Aggregates of the union of the rows behind `tables` (later tables are newer)."""
+    combined = pd.concat(tables)
+    groups = combined.groupby(level=0, observed=True)
+    how = {}
+    for col in combined.columns:
+        if col in ("LoyaltyTier", "TierDate") and "TierDate" in combined.columns:
+            # Taken from the latest stay below
+            continue
+        if col == "FirstStay":
+            how[col] = "min"
+        elif col == "LastStay":
+            how[col] = "max"
+        elif col == "LoyaltyTier":
+            how[col] = "last"
+        else:
+            how[col] = "sum"
+    merged = groups.agg(how)
+    if "TierDate" in combined.columns:
+        latest = _latest_tiers(combined[["LoyaltyTier", "TierDate"]], "TierDate")
+        merged["LoyaltyTier"] = latest["LoyaltyTier"]
+        merged["TierDate"] = latest["TierDate"]
+        merged = merged[combined.columns]
+    room_columns = [col for col in merged.columns if col.startswith(ROOM_PREFIX)]
+    merged[room_columns] = merged[room_columns].fillna(0).astype("int64")
+    return merged
+
+
+def features(aggregates, as_of=None):
+    """
+    The guest feature table from aggregates: one row per GuestID. RecencyDays
+    counts from `as_of` (default: the latest stay of any guest); Frequency is
+    the number of repeat visits.
+    """
+    table = aggregates.reset_index()
+    out = table[["GuestID", "VisitCount"]].copy()
+    out["Frequency"] = out["VisitCount"] - 1
+    if "TotalSpent" in table.columns:
+        out["TotalSpent"] = table["TotalSpent"]
+        out["AvgSpend"] = table["TotalSpent"] / table["VisitCount"]
+    if "LastStay" in table.columns:
+        as_of = as_of if as_of is not None else table["LastStay"].max()
+        out["FirstStay"] = table["FirstStay"]
+        out["LastStay"] = table["LastStay"]
+        out["RecencyDays"] = (as_of - table["LastStay"]).dt.days
+        out["TenureDays"] = (table["LastStay"] - table["FirstStay"]).dt.days
+    if "FeedbackSum" in table.columns:
+        out["AvgFeedback"] = table["FeedbackSum"] / table["FeedbackCount"].where(table["FeedbackCount"] > 0)
+    if "LoyaltyTier" in table.columns:
+        out["LoyaltyTier"] = table["LoyaltyTier"]
+    room_columns = [col for col in table.columns if col.startswith(ROOM_PREFIX)]
+    if room_columns:
+        counts = table[room_columns].to_numpy()
+        rooms = np.array([col[len(ROOM_PREFIX):] for col in room_columns], dtype=object)
+        preferred = rooms[counts.argmax(axis=1)]
+        out["PreferredRoomType"] = np.where(counts.max(axis=1) > 0, preferred, None)
+    return out
+
+
+# ----------------------------- PERSISTENCE -----------------------------
+def _aggregates_path(key):
+    digest = hashlib.sha256(f"{key}|{AGGREGATE_VERSION}".encode()).hexdigest()[:32]
+    return os.path.join(GUEST_DIR, f"{digest}.parquet")
+
+
+def load(key):
+    """The persisted aggregates of dataset `key`, or None."""
+    if not dataset_store.available:
+        return None
+    try:
+        return pd.read_parquet(_aggregates_path(key), engine="pyarrow")
+    except (OSError, ValueError):
+        return None
+
+
+def save(key, table):
+    """Persists the aggregates of dataset `key`. Returns False if they could not be written."""
+    if not dataset_store.available:
+        return False
+    path = _aggregates_path(key)
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(GUEST_DIR, exist_ok=True)
+        table.to_parquet(tmp_path, engine="pyarrow")
+        os.replace(tmp_path, path)
+    except WRITE_ERRORS:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    return True
+
+
+def get_aggregates(data, key, persist=False):
+    """
+    Aggregates of `data`, built once per `key`; None without GuestID. With
+    `persist`, `data` is every row of dataset `key` and the aggregates are read
+    from (or written to) disk.
+    """
+    table = feature_cache.get(key) if key else None
+    if table is None and persist:
+        table = load(key)
+    if table is None:
+        table = aggregate(data)
+        if persist and table is not None:
+            save(key, table)
+    if key and table is not None:
+        feature_cache.put(key, table)
+    return table
+
+
+def guest_features(ctx):
+    """
+    Feature table of the guests in a SectionContext's filtered rows. When no
+    row is filtered out, the dataset's table is used, shared by every filter
+    state that keeps all rows, and persisted unless `data` is a sample.
+    """
+    if not ctx.dataset:
+        table = aggregate(ctx.filtered)
+    elif ctx.data.attrs.get("dataset_key") == ctx.dataset and len(ctx.filtered) == len(ctx.data):
+        table = get_aggregates(ctx.data, ctx.dataset, persist=not ctx.sampled)
+    else:
+        table = get_aggregates(ctx.filtered, (ctx.dataset, ctx.state))
+    return features(table) if table is not None else None
+
+
+def extend(base_key, key, rows, persist=False):
+    """
+    Stores the aggregates of dataset `key` = dataset `base_key` plus the
+    enriched `rows`, if the base's are cached (or, with `persist`, on disk):
+    only `rows` are aggregated. With `persist` the result is written to disk.
+    """
+    base = feature_cache.get(base_key) if base_key else None
+    if base is None and base_key and persist:
+        base = load(base_key)
+    delta = aggregate(rows) if base is not None else None
+    if delta is None:
+        return None
+    table = merge([base, delta]) if len(delta) else base
+    feature_cache.put(key, table)
+    if persist:
+        save(key, table)
+    return table
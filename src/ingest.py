@@ -0,0 +1,134 @@
+# ingest.py
+"""
+Upload ingestion with a content-hash keyed cache.
+
+Each distinct file is parsed once; every later rerun (slider move, radio click)
+gets the already parsed frame back from memory. Workbooks are also converted to
+Parquet in the dataset store (see store.py), and other files can use the optional
+on-disk pickle tier, so a restarted process does not have to parse them again.
+CSV/TXT files above the streaming threshold are read in chunks instead (see
+streaming.py) and only their sample is cached here; their rows are written to
+the dataset store partitioned by month as they are read.
+"""
+import io
+import os
+
+import pandas as pd
+
+import schema
+import streaming
+from cache import DiskCache, LRUCache, content_hash, file_hash
+from registry import dataset_registry
+from store import dataset_store
+
+# In-memory tier budget (parsed frames, not file bytes)
+MEMORY_CACHE_BYTES = int(os.environ.get("MINDSHIFT_CACHE_MB", "1024")) * 1024 ** 2
+
+# Optional on-disk tier, enabled by pointing MINDSHIFT_CACHE_DIR at a directory
+DISK_CACHE_DIR = os.environ.get("MINDSHIFT_CACHE_DIR")
+DISK_CACHE_BYTES = int(os.environ.get("MINDSHIFT_DISK_CACHE_MB", "4096")) * 1024 ** 2
+
+CSV_EXTENSIONS = (".csv", ".txt")
+
+memory_cache = LRUCache(MEMORY_CACHE_BYTES)
+disk_cache = DiskCache(DISK_CACHE_DIR, DISK_CACHE_BYTES) if DISK_CACHE_DIR else None
+
+
+def is_csv(file_name):
+    return file_name.lower().endswith(CSV_EXTENSIONS)
+
+
+def parse_bytes(file_name, raw):
+    """Parses an uploaded file's bytes into a DataFrame based on its extension."""
+    if is_csv(file_name):
+        return pd.read_csv(io.BytesIO(raw))
+    return pd.read_excel(io.BytesIO(raw))
+
+
+def is_streamed(uploaded_file):
+    """Whether an upload is read in chunks rather than parsed whole."""
+    return is_csv(uploaded_file.name) and uploaded_file.size > streaming.STREAMING_THRESHOLD_BYTES
+
+
+def load_streamed(uploaded_file, on_progress=None):
+    """
+    Streams a large CSV upload. Returns its sample frame; the full-data aggregates
+    are available through streaming.get_summary(frame).
+    """
+    key = f"{file_hash(uploaded_file)}-csv"
+    data = memory_cache.get(key)
+    if data is None:
+        # Evicted here but still held by another session: share its sample
+        data = dataset_registry.get(key)
+        if data is not None and streaming.summary_cache.get(key) is not None:
+            memory_cache.put(key, data)
+    if data is None or streaming.summary_cache.get(key) is None:
+        # Partitions written in an earlier session are kept as they are
+        writer = None
+        if dataset_store.available and not dataset_store.has(key):
+            writer = dataset_store.writer(key)
+        data, _ = streaming.stream_csv(uploaded_file, key, on_progress=on_progress, writer=writer)
+        memory_cache.put(key, data)
+    return data.copy(deep=False)
+
+
+def load_upload(uploaded_file, on_progress=None, stream=True):
+    """
+    Returns the parsed frame for a Streamlit UploadedFile, parsing only on a cache miss.
+    The frame's attrs["content_hash"] identifies the dataset for downstream caches.
+    Large CSV/TXT uploads are streamed unless `stream` is False (e.g. delta files,
+    which are appended row for row); `on_progress(fraction, rows_read)` reports
+    their progress.
+    """
+    if stream and is_streamed(uploaded_file):
+        return load_streamed(uploaded_file, on_progress)
+
+    raw = uploaded_file.getvalue()
+    kind = "csv" if is_csv(uploaded_file.name) else "excel"
+    if is_streamed(uploaded_file):
+        # Streamed reads of the same file cache only a sample under "-csv"
+        kind = "csv-whole"
+    key = f"{content_hash(raw)}-{kind}"
+
+    data = memory_cache.get(key)
+    if data is None:
+        # Evicted here but still held by another session: share its frame
+        data = dataset_registry.get(key)
+        if data is not None:
+            memory_cache.put(key, data)
+    if data is None and disk_cache is not None:
+        data = disk_cache.get(key)
+        if data is not None:
+            memory_cache.put(key, data)
+    if data is None and kind == "excel":
+        # Workbooks converted in an earlier session open from the columnar store
+        data = dataset_store.load(key)
+        if data is not None:
+            memory_cache.put(key, data)
+    if data is None:
+        data = parse_bytes(uploaded_file.name, raw)
+        # Compact dtypes before caching so every tier holds the smaller frame
+        data, report = schema.optimize_dtypes(data)
+        data.attrs["content_hash"] = key
+        data.attrs["dtype_report"] = report
+        memory_cache.put(key, data)
+        if kind == "excel":
+            dataset_store.save(key, data)
+        elif disk_cache is not None:
+            disk_cache.put(key, data)
+
+    # Shallow copy: callers add/replace columns without touching the cached frame
+    return data.copy(deep=False)
+
+
+def cache_stats():
+    """Hit/miss counters for every tier, for display in the sidebar."""
+    stats = {"memory": memory_cache.stats()}
+    if disk_cache is not None:
+        stats["disk"] = disk_cache.stats()
+    if dataset_store.available:
+        stats["store"] = dataset_store.stats()
+    streamed = streaming.summary_cache.stats()
+    if streamed["entries"]:
+        stats["streamed"] = streamed
+    return stats
@@ -0,0 +1,51 @@
+# kernels.py
+"""
+Vectorized metric kernels shared by the dashboard sections.
+
+Each kernel works on whole columns (numpy arrays or pandas Series) instead of
+looping over rows with DataFrame.apply, and returns a Series aligned with its
+input when given one.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _wrap(values, like, name=None):
+    if isinstance(like, pd.Series):
+        return pd.Series(values, index=like.index, name=name)
+    return values
+
+
+def safe_ratio(numerator, denominator, fill=0.0):
+    """numerator / denominator, with `fill` wherever the denominator is zero."""
+    num = np.asarray(numerator, dtype="float64")
+    den = np.asarray(denominator, dtype="float64")
+    out = np.full(np.broadcast(num, den).shape, fill, dtype="float64")
+    np.divide(num, den, out=out, where=den != 0)
+    return _wrap(out, numerator if isinstance(numerator, pd.Series) else denominator)
+
+
+def roi(revenue, spend, fill=0.0):
+    """Return on marketing spend (revenue / spend); `fill` where nothing was spent."""
+    return safe_ratio(revenue, spend, fill)
+
+
+def classify_repeat(visit_counts, threshold=1, labels=("Repeat", "First-Time")):
+    """Labels guests with more than `threshold` visits as repeat, the rest as first-time."""
+    # Index into the two labels rather than building a string array per row
+    first_time = np.asarray(visit_counts) <= threshold
+    out = np.asarray(labels, dtype=object)[first_time.astype(np.intp)]
+    return _wrap(out, visit_counts)
+
+
+def group_shares(values, groups=None):
+    """
+    Each value's share of its group total (or of the grand total without
+    `groups`); zero where the total is zero.
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if groups is None:
+        totals = np.full(len(values), values.sum(), dtype="float64")
+    else:
+        totals = values.groupby(groups, observed=True, sort=False).transform("sum")
+    return safe_ratio(values, totals)
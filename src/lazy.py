@@ -0,0 +1,100 @@
+# lazy.py
+"""
+Deferred imports of the heavy libraries.
+
+scikit-learn, statsmodels and SciPy take seconds to import and Plotly a few
+hundred milliseconds, so a new worker or session that only shows the Overview
+should not pay for them. The engines import scikit-learn, statsmodels and SciPy
+inside the functions that fit models; modules that use Plotly throughout bind
+it with module(), a stand-in that imports the real module on first attribute
+access.
+
+warm() imports the heavy modules once in a background daemon thread, so they
+are usually loaded by the time a section needs them; Python's import locks
+make a section importing the same module concurrently wait for it rather than
+import it twice.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Imported by warm(), in this order: the section figures first, then the models
+HEAVY_MODULES = (
+    "plotly.express",
+    "plotly.graph_objects",
+    "plotly.subplots",
+    "scipy.optimize",
+    "scipy.special",
+    "sklearn.cluster",
+    "sklearn.metrics",
+    "sklearn.preprocessing",
+    "statsmodels.tsa.holtwinters",
+)
+
+# "0" turns the background imports off
+WARM_IMPORTS = os.environ.get("MINDSHIFT_WARM_IMPORTS", "1") != "0"
+
+_lock = threading.Lock()
+_warm_thread = None
+# Module name -> seconds its import took in warm()
+import_times = {}
+
+
+class LazyModule:
+    """Stands in for a module until an attribute of it is first read."""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+
+    def _load(self):
+        module = importlib.import_module(self._name)
+        # Later lookups go straight to the module's attributes
+        self.__dict__.update(module.__dict__)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._name in sys.modules else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def module(name):
+    """The module `name` if it is already imported, a LazyModule otherwise."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def _import_all(names):
+    for name in names:
+        if name in sys.modules:
+            continue
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            # Optional dependency not installed; the section using it reports that itself
+            continue
+        import_times[name] = time.perf_counter() - start
+
+
+def warm(names=HEAVY_MODULES):
+    """
+    Starts importing `names` in a background thread, once per process.
+    Returns the thread, or None when turned off.
+    """
+    global _warm_thread
+    if not WARM_IMPORTS:
+        return None
+    with _lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_import_all, args=(tuple(names),), name="warm-imports", daemon=True)
+            _warm_thread.start()
+        return _warm_thread
+
+
+def loaded(names=HEAVY_MODULES):
+    """The subset of `names` already imported."""
+    return [name for name in names if name in sys.modules]
@@ -0,0 +1,250 @@
+# lifetime.py
+"""
+Probabilistic customer lifetime value.
+
+Visits follow a BG/NBD model: while "alive" a guest returns at a Poisson rate
+(Gamma(r, alpha) across guests) and after each visit drops out with
+probability p (Beta(a, b) across guests). Spend per visit follows the
+Gamma-Gamma model (p, q, v). Both are fitted by maximum likelihood on the guest
+feature table (guests.py), with vectorized NumPy/SciPy log-likelihoods and
+their analytic gradients.
+
+Guests with the same history (repeat visits, tenure, age in days) are the same
+to the visit model, so it is fitted and scored once per distinct history,
+weighted by its guest count: the cost follows the number of distinct
+histories, not the number of guests. The spend model reduces to per-guest sums
+computed once. Fitted parameters are cached per dataset and filter state.
+
+CLTV is the expected spend over the next HORIZON_MONTHS months, discounted
+monthly at MONTHLY_DISCOUNT. Like analytics.py, nothing here imports Streamlit
+or Plotly; SciPy is imported when a model is first fitted or scored.
+"""
+import numpy as np
+
+from cache import LRUCache
+
+# Time unit of the models, in days (keeps the rate parameters well scaled)
+TIME_UNIT_DAYS = 7
+DAYS_PER_MONTH = 30
+HORIZON_MONTHS = 12
+MONTHLY_DISCOUNT = 0.01
+
+# Fewer repeat guests than this: not enough signal to fit either model
+MIN_REPEAT_GUESTS = 20
+# L2 penalty on the log parameters, keeps the optimizer away from degenerate fits
+PENALIZER = 1e-4
+
+# Fitted parameters are a handful of floats; this bounds the number of entries
+fit_cache = LRUCache(1024 ** 2, sizer=lambda params: 1024)
+
+
+def _minimize(loglik, n_params):
+    """Maximizes loglik(params) -> (value, gradient) over positive params, in log space."""
+    from scipy.optimize import minimize
+
+    def objective(log_params):
+        params = np.exp(log_params)
+        value, gradient = loglik(params)
+        penalty = PENALIZER * np.sum(log_params ** 2)
+        return -value + penalty, -gradient * params + 2 * PENALIZER * log_params
+
+    result = minimize(objective, np.zeros(n_params), jac=True, method="L-BFGS-B")
+    return np.exp(result.x), bool(result.success)
+
+
+# ------------------------------ BG/NBD ---------------------------------
+def _bgnbd_loglik(params, x, t_x, T, weights):
+    """Mean log-likelihood of (r, alpha, a, b) per guest, and its gradient."""
+    from scipy.special import digamma, gammaln
+
+    r, alpha, a, b = params
+    repeat = x > 0
+    A1 = gammaln(r + x) - gammaln(r) + r * np.log(alpha)
+    A2 = gammaln(a + b) + gammaln(b + x) - gammaln(b) - gammaln(a + b + x)
+    A3 = -(r + x) * np.log(alpha + T)
+    # Only guests with repeat visits can have dropped out already
+    A4 = np.full_like(x, -np.inf)
+    A4[repeat] = (
+        np.log(a) - np.log(b + x[repeat] - 1) - (r + x[repeat]) * np.log(alpha + t_x[repeat])
+    )
+    both = np.logaddexp(A3, A4)
+    # Share of each guest's likelihood coming from the "dropped out after t_x" term
+    w4 = np.exp(A4 - both)
+    w3 = 1 - w4
+
+    total = weights.sum()
+    value = np.sum(weights * (A1 + A2 + both)) / total
+    d_b4 = np.zeros_like(x)
+    d_b4[repeat] = -1 / (b + x[repeat] - 1)
+    gradient = np.array([
+        digamma(r + x) - digamma(r) + np.log(alpha) - w3 * np.log(alpha + T) - w4 * np.log(alpha + t_x),
+        r / alpha - (r + x) * (w3 / (alpha + T) + w4 / (alpha + t_x)),
+        digamma(a + b) - digamma(a + b + x) + w4 / a,
+        digamma(a + b) + digamma(b + x) - digamma(b) - digamma(a + b + x) + w4 * d_b4,
+    ]) @ weights / total
+    return value, gradient
+
+
+def fit_bgnbd(x, t_x, T, weights):
+    """Maximum likelihood (r, alpha, a, b) for repeat visits x, last visit age t_x and age T."""
+    return _minimize(lambda params: _bgnbd_loglik(params, x, t_x, T, weights), 4)
+
+
+def _dropout_odds(params, x, t_x, T):
+    r, alpha, a, b = params
+    odds = np.zeros_like(x)
+    repeat = x > 0
+    odds[repeat] = a / (b + x[repeat] - 1) * ((alpha + T[repeat]) / (alpha + t_x[repeat])) ** (r + x[repeat])
+    return 1 + odds
+
+
+def probability_alive(params, x, t_x, T):
+    """Probability each guest has not dropped out yet."""
+    return 1 / _dropout_odds(params, x, t_x, T)
+
+
+def expected_visits(params, t, x, t_x, T):
+    """Expected visits in the next `t` time units, given each guest's history."""
+    from scipy.special import hyp2f1
+
+    r, alpha, a, b = params
+    z = t / (alpha + T + t)
+    head = (a + b + x - 1) / (a - 1)
+    # (1 - z)^(r + x) * 2F1(r + x, b + x; a + b + x - 1; z) after Euler's
+    # transformation, which keeps the series bounded for frequent guests
+    tail = 1 - (1 - z) ** (a - 1) * hyp2f1(a + b - 1 - r, a - 1, a + b + x - 1, z)
+    return head * tail / _dropout_odds(params, x, t_x, T)
+
+
+# ---------------------------- GAMMA-GAMMA ------------------------------
+def _gamma_gamma_loglik(x, m):
+    """Mean log-likelihood of (p, q, v) per guest and its gradient, as a function of the params."""
+    from scipy.special import digamma, gammaln
+
+    n = len(x)
+    # Terms depending only on the visit count are evaluated once per count
+    counts_x, inverse = np.unique(x, return_inverse=True)
+    n_x = np.bincount(inverse).astype("float64")
+    xm = x * m
+    sum_x_log_xm = x @ np.log(xm)
+    sum_log_m = np.log(m).sum()
+
+    def loglik(params):
+        p, q, v = params
+        log_xm_v = np.log(xm + v)
+        pq = p * counts_x + q
+        value = (
+            n_x @ (gammaln(pq) - gammaln(p * counts_x)) + n * (q * np.log(v) - gammaln(q))
+            + p * sum_x_log_xm - sum_log_m - (p * x + q) @ log_xm_v
+        )
+        gradient = np.array([
+            n_x @ (counts_x * (digamma(pq) - digamma(p * counts_x))) + sum_x_log_xm - x @ log_xm_v,
+            n_x @ digamma(pq) - n * digamma(q) + n * np.log(v) - log_xm_v.sum(),
+            n * q / v - np.sum((p * x + q) / (xm + v)),
+        ])
+        return value / n, gradient / n
+
+    return loglik
+
+
+def fit_gamma_gamma(x, m):
+    """Maximum likelihood (p, q, v) for visit counts x and mean spend m of repeat guests."""
+    # Spend is rescaled so the optimizer works near 1; v scales back with it
+    scale = np.median(m)
+    (p, q, v), success = _minimize(_gamma_gamma_loglik(x, m / scale), 3)
+    return np.array([p, q, v * scale]), success
+
+
+def expected_spend(params, x, m):
+    """Expected spend per visit: the population mean shrunk towards each guest's own mean."""
+    p, q, v = params
+    population = v * p / (q - 1)
+    weight = p * x / (p * x + q - 1)
+    return (1 - weight) * population + weight * m
+
+
+# ------------------------------ ENGINE ---------------------------------
+def _histories(guests):
+    """Guests with known stays, and their repeat visits, tenure, age (days) and mean spend."""
+    known = guests.dropna(subset=["FirstStay", "LastStay"])
+    x = known["Frequency"].to_numpy(dtype="int64")
+    tenure = known["TenureDays"].to_numpy(dtype="int64")
+    age = tenure + known["RecencyDays"].to_numpy(dtype="int64")
+    m = known["AvgSpend"].to_numpy(dtype="float64")
+    return known, x, tenure, age, m
+
+
+def _distinct(x, tenure, age):
+    """
+    Distinct histories as model inputs (x, t_x, T in TIME_UNIT_DAYS), their
+    guest counts, and the index of each guest's history.
+    """
+    span = int(age.max()) + 1
+    codes, inverse, counts = np.unique((x * span + tenure) * span + age, return_inverse=True, return_counts=True)
+    x, rest = np.divmod(codes, span * span)
+    tenure, age = np.divmod(rest, span)
+    return (
+        x.astype("float64"), tenure / TIME_UNIT_DAYS, age / TIME_UNIT_DAYS,
+        counts.astype("float64"), inverse,
+    )
+
+
+def fit(guests):
+    """
+    Fits both models on a guest feature table (needs AvgSpend and the stay
+    dates). Returns {"bgnbd", "gamma_gamma", "converged", "guests"}, or None
+    when there are too few repeat guests or the fit has no finite expectations.
+    """
+    _, x, tenure, age, m = _histories(guests)
+    repeat = (x > 0) & (m > 0)
+    if repeat.sum() < MIN_REPEAT_GUESTS:
+        return None
+    x_h, t_x, T, counts, _ = _distinct(x, tenure, age)
+    bgnbd, bgnbd_ok = fit_bgnbd(x_h, t_x, T, counts)
+    gamma_gamma, gamma_gamma_ok = fit_gamma_gamma(x[repeat].astype("float64"), m[repeat])
+    # Expected visits have a removable singularity at a = 1 that the closed
+    # form cannot evaluate; the population spend is undefined for q <= 1
+    if not (abs(bgnbd[2] - 1) > 1e-3 and gamma_gamma[1] > 1 and np.isfinite([*bgnbd, *gamma_gamma]).all()):
+        return None
+    return {
+        "bgnbd": bgnbd,
+        "gamma_gamma": gamma_gamma,
+        "converged": bgnbd_ok and gamma_gamma_ok,
+        "guests": len(x),
+    }
+
+
+def get_fit(guests, key):
+    """fit(guests), fitted once per `key` (e.g. dataset and filter state)."""
+    params = fit_cache.get(key) if key else None
+    if params is None:
+        params = fit(guests)
+        if key and params is not None:
+            fit_cache.put(key, params)
+    return params
+
+
+def score(guests, params, horizon_months=HORIZON_MONTHS, discount=MONTHLY_DISCOUNT):
+    """
+    The guests with known stays plus ProbabilityAlive, ExpectedVisits (over
+    the horizon), ExpectedSpend (per visit) and CLTV, ranked by CLTV.
+    """
+    known, x, tenure, age, m = _histories(guests)
+    x_h, t_x, T, _, inverse = _distinct(x, tenure, age)
+    bgnbd = params["bgnbd"]
+
+    # Expected visits by the end of each month, per distinct history; each
+    # month's visits are discounted back to today
+    horizon = np.arange(1, horizon_months + 1)
+    cumulative = np.column_stack([
+        expected_visits(bgnbd, month * DAYS_PER_MONTH / TIME_UNIT_DAYS, x_h, t_x, T) for month in horizon
+    ])
+    discounted = np.diff(cumulative, axis=1, prepend=0.0) @ (1 / (1 + discount) ** horizon)
+    spend = expected_spend(params["gamma_gamma"], x, np.nan_to_num(m))
+
+    return known.assign(
+        ProbabilityAlive=probability_alive(bgnbd, x_h, t_x, T)[inverse],
+        ExpectedVisits=cumulative[inverse, -1],
+        ExpectedSpend=spend,
+        CLTV=discounted[inverse] * spend,
+    ).sort_values("CLTV", ascending=False, ignore_index=True)
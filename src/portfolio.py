@@ -0,0 +1,291 @@
+# portfolio.py
+"""
+Portfolio mode: many property files analyzed side by side.
+
+Each property's file is read, enriched and folded into a day-grain TimeCube
+in a worker process (CSV/TXT files chunk by chunk), so files are processed in
+parallel across CPU cores and only the cubes (one row per day) come back to
+the dashboard process; the raw rows of the properties are never held
+together. Cubes are cached per file content (uploads) or path, size and
+modification time (files in a directory), so a rerun only processes new or
+changed files.
+
+The comparisons (KPIs, RevPAR, room type profitability, monthly series) are
+computed from the cubes. Like analytics.py, nothing here imports Streamlit or
+Plotly.
+"""
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import enrich
+import streaming
+from cache import LRUCache, content_hash
+from cube import TimeCube, default_metrics
+from forecast import ROOM_TYPES
+
+# Worker processes; 1 processes the files one by one in this process
+PORTFOLIO_WORKERS = int(os.environ.get("MINDSHIFT_PORTFOLIO_WORKERS", str(os.cpu_count() or 1)))
+# Directory whose property files portfolio mode offers to include
+PORTFOLIO_DIR = os.path.normpath(os.environ.get(
+    "MINDSHIFT_PORTFOLIO_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"),
+))
+
+FILE_EXTENSIONS = (".csv", ".txt", ".xlsx", ".xls")
+AGGREGATE_CACHE_BYTES = 256 * 1024 ** 2
+
+aggregate_cache = LRUCache(AGGREGATE_CACHE_BYTES, sizer=lambda aggregates: aggregates.nbytes)
+
+
+class PropertyAggregates:
+    """One property's day cube, with the unit prices it was enriched with."""
+
+    def __init__(self, name, cube, unit_prices, n_rows, seconds):
+        self.name = name
+        self.cube = cube
+        self.unit_prices = unit_prices
+        self.n_rows = n_rows
+        # Time the worker spent reading and aggregating the file
+        self.seconds = seconds
+
+    @property
+    def nbytes(self):
+        return self.cube.nbytes
+
+
+class Portfolio:
+    """Aggregates per property name, plus the files that could not be read ({name: error})."""
+
+    def __init__(self, properties, errors):
+        self.properties = properties
+        self.errors = errors
+
+    def date_bounds(self):
+        bounds = [b for b in (a.cube.date_bounds() for a in self.properties.values()) if b is not None]
+        if not bounds:
+            return None
+        return min(b[0] for b in bounds).date(), max(b[1] for b in bounds).date()
+
+
+# ------------------------------- FILES ---------------------------------
+def list_files(directory):
+    """Data files directly in `directory` (skipping Office lock files), by name."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(FILE_EXTENSIONS) and not name.startswith("~$")
+        and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def property_name(file_name):
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def _source_key(file_name, source, unit_prices):
+    if isinstance(source, bytes):
+        identity = content_hash(source)
+    else:
+        stat = os.stat(source)
+        identity = f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return f"{identity}:{os.path.splitext(file_name)[1].lower()}:" + ",".join(
+        str(p) for _, p in sorted(unit_prices.items())
+    )
+
+
+# ------------------------------- WORKER --------------------------------
+def _chunks(file_name, source, chunk_rows):
+    handle = io.BytesIO(source) if isinstance(source, bytes) else source
+    if file_name.lower().endswith((".csv", ".txt")):
+        yield from pd.read_csv(handle, chunksize=chunk_rows)
+    else:
+        yield pd.read_excel(handle)
+
+
+def aggregate_file(name, file_name, source, unit_prices, chunk_rows=streaming.CHUNK_ROWS):
+    """
+    Reads one property file (a path or the file's bytes), enriches it and
+    folds it into a day-grain TimeCube chunk by chunk. Runs in the workers.
+    """
+    start = time.perf_counter()
+    cube = None
+    metrics = None
+    n_rows = 0
+    for chunk in _chunks(file_name, source, chunk_rows):
+        enriched = enrich.add_derived_columns(chunk, unit_prices)
+        if metrics is None:
+            metrics = default_metrics(enriched)
+        chunk_cube = TimeCube.from_frame(streaming.numeric_metrics(enriched, metrics), metrics=metrics, dropna=False)
+        cube = chunk_cube if cube is None else TimeCube.merge([cube, chunk_cube])
+        n_rows += len(chunk)
+    if cube is None:
+        raise ValueError("The file has no rows")
+    return PropertyAggregates(name, cube, unit_prices, n_rows, time.perf_counter() - start)
+
+
+def _error_message(exc):
+    # Enrichment and the cube raise KeyError for a column the file lacks
+    return f"missing column {exc}" if isinstance(exc, KeyError) else str(exc)
+
+
+def load_portfolio(files, unit_prices=None, workers=PORTFOLIO_WORKERS, on_progress=None):
+    """
+    Aggregates of every file in `files` ([(file name, path or bytes)]), read
+    in `workers` processes; cached files are not read again. Files sharing a
+    name get a numbered suffix. `on_progress(done, total)` is called as files
+    finish.
+    """
+    unit_prices = unit_prices or enrich.DEFAULT_UNIT_PRICES
+    properties, errors, pending = {}, {}, {}
+    for file_name, source in files:
+        name = base = property_name(file_name)
+        suffix = 2
+        while name in properties or name in pending or name in errors:
+            name, suffix = f"{base} ({suffix})", suffix + 1
+        try:
+            key = _source_key(file_name, source, unit_prices)
+        except OSError as exc:
+            errors[name] = str(exc)
+            continue
+        cached = aggregate_cache.get(key)
+        if cached is not None:
+            properties[name] = cached
+        else:
+            properties[name] = None
+            pending[name] = (key, file_name, source)
+
+    total, done = len(pending), 0
+
+    def finish(name, key, aggregates):
+        nonlocal done
+        aggregate_cache.put(key, aggregates)
+        properties[name] = aggregates
+        done += 1
+        if on_progress is not None:
+            on_progress(done, total)
+
+    if workers <= 1 or total <= 1:
+        for name, (key, file_name, source) in pending.items():
+            try:
+                finish(name, key, aggregate_file(name, file_name, source, unit_prices))
+            except (OSError, KeyError, ValueError) as exc:
+                errors[name] = _error_message(exc)
+    elif total:
+        # Spawned rather than forked: the Streamlit server has threads running
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, total), mp_context=context) as pool:
+            futures = {
+                pool.submit(aggregate_file, name, file_name, source, unit_prices): (name, key)
+                for name, (key, file_name, source) in pending.items()
+            }
+            for future in as_completed(futures):
+                name, key = futures[future]
+                try:
+                    finish(name, key, future.result())
+                except (OSError, KeyError, ValueError) as exc:
+                    errors[name] = _error_message(exc)
+
+    properties = {name: aggregates for name, aggregates in properties.items() if aggregates is not None}
+    return Portfolio(properties, errors)
+
+
+# ----------------------------- COMPARISONS -----------------------------
+def _totals(cube, date_range=None):
+    """Sum and non-null count per metric of the cube's days in `date_range`."""
+    if date_range is not None:
+        cube = cube.filter(date_range)
+    base = cube.base
+    sums = {metric: float(base[f"{metric}__sum"].sum()) for metric in cube.metrics}
+    counts = {metric: float(base[f"{metric}__count"].sum()) for metric in cube.metrics}
+    return sums, counts, int(base["Rows"].sum())
+
+
+def _kpi_row(sums, counts, rows):
+    def ratio(numerator, denominator):
+        return numerator / denominator if denominator else np.nan
+
+    room_revenue = sum(sums.get(revenue, 0.0) for _, revenue in ROOM_TYPES.values())
+    available = sums.get("AvailableRooms", 0.0)
+    revenue = sums.get("TotalRevenue", np.nan)
+    profit = sums.get("Profit", np.nan)
+    return {
+        "Rows": rows,
+        "TotalRevenue": revenue,
+        "RoomRevenue": room_revenue,
+        "ADR": ratio(sums.get("ADR", 0.0), counts.get("ADR", 0.0)),
+        "Occupancy (%)": ratio(sums.get("OccupiedRooms", 0.0), available) * 100,
+        # Room revenue per available room
+        "RevPAR": ratio(room_revenue, available),
+        "Profit": profit,
+        "Profit margin (%)": ratio(profit, revenue) * 100,
+    }
+
+
+def kpis(portfolio, date_range=None):
+    """
+    KPIs per property (revenue, ADR, occupancy, RevPAR, profit and margin)
+    within `date_range`, plus a "Portfolio" row over all properties.
+    """
+    rows = []
+    all_sums, all_counts, all_rows = {}, {}, 0
+    for name, aggregates in portfolio.properties.items():
+        sums, counts, n_rows = _totals(aggregates.cube, date_range)
+        rows.append({"Property": name, **_kpi_row(sums, counts, n_rows)})
+        for metric, value in sums.items():
+            all_sums[metric] = all_sums.get(metric, 0.0) + value
+        for metric, value in counts.items():
+            all_counts[metric] = all_counts.get(metric, 0.0) + value
+        all_rows += n_rows
+    if rows:
+        rows.append({"Property": "Portfolio", **_kpi_row(all_sums, all_counts, all_rows)})
+    return pd.DataFrame(rows)
+
+
+def room_type_profitability(portfolio, date_range=None):
+    """
+    Rooms occupied, revenue, room cost (at each property's unit prices),
+    profit and margin per property and room type.
+    """
+    rows = []
+    for name, aggregates in portfolio.properties.items():
+        sums, _, _ = _totals(aggregates.cube, date_range)
+        for room, (occupied, revenue) in ROOM_TYPES.items():
+            if occupied not in sums or revenue not in sums:
+                continue
+            cost = sums[occupied] * aggregates.unit_prices.get(f"{room} Room", 0)
+            rows.append({
+                "Property": name,
+                "RoomType": room,
+                "RoomsOccupied": sums[occupied],
+                "Revenue": sums[revenue],
+                "Cost": cost,
+                "Profit": sums[revenue] - cost,
+                "Margin (%)": (sums[revenue] - cost) / sums[revenue] * 100 if sums[revenue] else np.nan,
+            })
+    return pd.DataFrame(rows, columns=[
+        "Property", "RoomType", "RoomsOccupied", "Revenue", "Cost", "Profit", "Margin (%)",
+    ])
+
+
+def monthly(portfolio, metric="TotalRevenue", how="sum", date_range=None):
+    """[Month, Property, metric] per month of every property holding `metric`."""
+    frames = []
+    for name, aggregates in portfolio.properties.items():
+        if metric not in aggregates.cube.metrics:
+            continue
+        cube = aggregates.cube.filter(date_range) if date_range is not None else aggregates.cube
+        if cube.date_bounds() is None:
+            continue
+        series = cube.rollup("M", [metric], how=how, label="Month")
+        series.insert(1, "Property", name)
+        frames.append(series)
+    if not frames:
+        return pd.DataFrame(columns=["Month", "Property", metric])
+    return pd.concat(frames, ignore_index=True)
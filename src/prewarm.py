@@ -0,0 +1,148 @@
+# prewarm.py
+"""
+Background precomputation of section results.
+
+As soon as a dataset and filter state are known, the section units are queued
+on a small thread pool, slowest first, and their results land in
+sections.result_cache. Opening a section then picks up the finished result, or
+waits only for the rest of a computation already under way (sections.compute
+lets one thread compute a key while the others wait for it).
+
+Work is tracked per browser session: a session moving to another filter state
+cancels only its own queued units, never those other sessions wait for. Units
+whose columns the dataset lacks are not queued and show as not applicable; a
+unit that fails anyway is logged and shown as failed rather than queued.
+
+Threads rather than processes: the results have to end up in this process's
+cache, and the heavy parts (numpy, pandas groupbys, scikit-learn) release the
+GIL for most of their run time.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import scenarios
+import sections
+from cache import LRUCache
+
+# 0 turns precomputation off
+PREWARM_WORKERS = int(os.environ.get("MINDSHIFT_PREWARM_WORKERS", "2"))
+
+# Warmed first: full correlation matrix and K-Means, the pricing forecasts,
+# the company groupbys
+EXPENSIVE_UNITS = (
+    "Advanced Analysis: correlation",
+    "Advanced Analysis: segmentation",
+    "Dynamic Pricing Suggestions",
+    "Company's",
+)
+
+# Parameters matching the widgets' initial values
+DEFAULT_PARAMS = {
+    "Advanced Analysis: segmentation": {"k": 3},
+    "Dynamic Pricing Suggestions": {"horizon": 7},
+    "Scenario Planning": scenarios.DEFAULT_LEVERS,
+}
+
+# Units that need a user choice before they can run
+SKIPPED_UNITS = ("Dig Deeper",)
+
+# Navigation choices made of several units
+NAVIGATION_UNITS = {
+    "Advanced Analysis": ("Advanced Analysis: correlation", "Advanced Analysis: segmentation"),
+}
+
+FAILURE_CACHE_BYTES = 1024 ** 2
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+# Session -> ((dataset, filter state) it last scheduled, the futures queued for it)
+_scheduled = {}
+# sections.result_key of units that raised -> the error, shown as "failed"
+failures = LRUCache(FAILURE_CACHE_BYTES)
+
+
+def prewarm_units():
+    """(unit, params) in the order they are warmed."""
+    rest = [name for name in sections.SECTIONS if name not in EXPENSIVE_UNITS and name not in SKIPPED_UNITS]
+    return [(name, DEFAULT_PARAMS.get(name, {})) for name in [*EXPENSIVE_UNITS, *rest]]
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="prewarm")
+    return _executor
+
+
+def _run(name, ctx, params):
+    try:
+        sections.compute(name, ctx, **params)
+    except Exception as exc:
+        logger.exception("Precomputing %r failed", name)
+        failures.put(sections.result_key(name, ctx, params), f"{type(exc).__name__}: {exc}")
+
+
+def schedule(ctx, session=None):
+    """
+    Queues the units not yet cached for ctx's dataset and filter state on
+    behalf of `session` (e.g. the browser session's id). Returns the number
+    queued (0 when the session already scheduled this state).
+    """
+    if PREWARM_WORKERS <= 0 or not ctx.dataset:
+        return 0
+    target = (ctx.dataset, ctx.state)
+    with _lock:
+        previous = _scheduled.get(session)
+        if previous is not None and previous[0] == target:
+            return 0
+        # The session's new filter state supersedes its previous one: drop that work if not started
+        for future in previous[1] if previous is not None else ():
+            future.cancel()
+        # Forget sessions whose work is all done (closed tabs never schedule again)
+        for other in [key for key, (_, futures) in _scheduled.items() if all(f.done() for f in futures)]:
+            del _scheduled[other]
+        executor = _get_executor()
+        futures = [
+            executor.submit(_run, name, ctx, params)
+            for name, params in prewarm_units()
+            if sections.applies(name, ctx) and sections.status(name, ctx, **params) is None
+        ]
+        _scheduled[session] = (target, futures)
+        return len(futures)
+
+
+def navigation_status(option, ctx):
+    """
+    "ready" when every unit behind a navigation choice is cached, "computing"
+    while any is being computed, "failed" when one raised in the background,
+    "queued" otherwise; "n/a" when the dataset lacks the columns of all of
+    them, None for choices that are not precomputed.
+    """
+    units = [name for name in NAVIGATION_UNITS.get(option, (option,)) if name in sections.SECTIONS]
+    if not units or option in SKIPPED_UNITS:
+        return None
+    units = [name for name in units if sections.applies(name, ctx)]
+    if not units:
+        return "n/a"
+    statuses = [sections.status(name, ctx, **DEFAULT_PARAMS.get(name, {})) for name in units]
+    if all(status == "ready" for status in statuses):
+        return "ready"
+    if "computing" in statuses:
+        return "computing"
+    if any(
+        sections.result_key(name, ctx, DEFAULT_PARAMS.get(name, {})) in failures
+        for name, status in zip(units, statuses) if status is None
+    ):
+        return "failed"
+    return "queued"
+
+
+def pending(ctx, session=None):
+    """Whether work `session` scheduled for ctx's dataset and filter state is still queued or running."""
+    with _lock:
+        target, futures = _scheduled.get(session, (None, []))
+        return target == (ctx.dataset, ctx.state) and any(not future.done() for future in futures)
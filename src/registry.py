@@ -0,0 +1,102 @@
+# registry.py
+"""
+Process-wide registry of the datasets sessions are working with.
+
+Streamlit serves every browser session from the same process. When several
+users open the same export, the registry makes them share one frame per
+dataset instead of each holding their own: the first session registers it,
+later ones get a shallow copy of the registered frame. A frame stays
+registered while any session holds a Lease on it (kept in st.session_state,
+so it is released when the session ends or moves to another dataset), even if
+the LRU caches in front of it evict their entries.
+
+Sessions never write to the shared frames: their copies are shallow and
+pandas copy-on-write copies a column only when a session modifies it.
+Copy-on-write is always on from pandas 3.0; on earlier versions the app turns
+it on at startup (mindshift.py).
+"""
+import threading
+import weakref
+from collections import deque
+
+
+def frame_key(data):
+    """Identity of a frame: the enriched dataset key, else the content hash of its upload."""
+    return data.attrs.get("dataset_key") or data.attrs.get("content_hash")
+
+
+class Lease:
+    """A session's hold on one registered dataset; the hold ends when the lease is garbage collected."""
+
+    def __init__(self, registry, key):
+        self.key = key
+        weakref.finalize(self, registry._queue_release, key)
+
+
+class DatasetRegistry:
+    """Reference-counted frames keyed by content hash (or enriched dataset key)."""
+
+    def __init__(self):
+        self._entries = {}
+        # Reentrant in case garbage collection runs a finalizer while the lock is held
+        self._lock = threading.RLock()
+        # Keys of leases collected but not released yet (see _queue_release)
+        self._released = deque()
+
+    def get(self, key):
+        """The registered frame for `key` (shared, do not modify), or None."""
+        with self._lock:
+            self._drain()
+            entry = self._entries.get(key)
+            return entry["frame"] if entry else None
+
+    def acquire(self, data):
+        """
+        Returns (shallow copy of the registered frame, Lease). `data` becomes the
+        registered frame if its dataset is not registered yet. Frames without a
+        content hash are not shared: (data, None).
+        """
+        key = frame_key(data)
+        if not key:
+            return data, None
+        # Measured outside the lock: it allocates, and so can trigger garbage collection
+        size = int(data.memory_usage(deep=True).sum())
+        with self._lock:
+            self._drain()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {"frame": data, "leases": 0, "bytes": size}
+            entry["leases"] += 1
+            frame = entry["frame"]
+        return frame.copy(deep=False), Lease(self, key)
+
+    def _queue_release(self, key):
+        """
+        Lease finalizer: it can run in any thread at any allocation, including
+        inside this registry's own locked sections, so it only queues the key;
+        the next call that takes the lock releases it.
+        """
+        self._released.append(key)
+
+    def _drain(self):
+        """Releases the queued leases (the lock must be held)."""
+        while self._released:
+            key = self._released.popleft()
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            entry["leases"] -= 1
+            if entry["leases"] <= 0:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            self._drain()
+            return {
+                "datasets": len(self._entries),
+                "leases": sum(entry["leases"] for entry in self._entries.values()),
+                "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+            }
+
+
+dataset_registry = DatasetRegistry()
@@ -0,0 +1,147 @@
+# render.py
+"""
+Adaptive Plotly figures for row-level charts.
+
+Scatter and line charts built from raw bookings would otherwise ship every
+filtered row to the browser. Below the point budget they are drawn exactly as
+before; above it they switch to WebGL traces and draw a downsampled set of
+points (one per occupied cell of a grid for scatters, LTTB for lines), while
+OLS trendlines are still fitted on every row. Trendlines are least-squares
+fits in NumPy rather than px's "ols" option, which imports statsmodels.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import lazy
+
+px = lazy.module("plotly.express")
+go = lazy.module("plotly.graph_objects")
+
+# Most points one row-level chart sends to the browser
+POINT_BUDGET = int(os.environ.get("MINDSHIFT_POINT_BUDGET", "20000"))
+
+# Cells per axis used to thin scatter plots
+GRID_SIZE = 200
+
+
+def _grid_cells(x, y, size):
+    """Cell number of each (x, y) point on a size x size grid over their range (missing values get their own cells)."""
+    cells = np.zeros(len(x), dtype=np.int64)
+    for values, scale in ((x, size + 1), (y, 1)):
+        values = np.asarray(values, dtype="float64")
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        span = hi - lo if hi > lo else 1.0
+        binned = np.clip(((values - lo) / span * (size - 1)).round(), 0, size - 1)
+        cells += np.nan_to_num(binned, nan=size).astype(np.int64) * scale
+    return cells
+
+
+def thin_points(data, x, y, budget=POINT_BUDGET, seed=0):
+    """
+    At most `budget` rows of `data` for a scatter of x vs y. One row per occupied
+    grid cell is kept first, so outliers and the outline of the cloud survive;
+    the rest of the budget is filled with a random sample of the other rows.
+    """
+    if len(data) <= budget:
+        return data
+    rng = np.random.default_rng(seed)
+    cells = _grid_cells(data[x], data[y], GRID_SIZE)
+    first = ~pd.Series(cells).duplicated().to_numpy()
+    keep = np.flatnonzero(first)
+    if len(keep) > budget:
+        keep = rng.choice(keep, budget, replace=False)
+    else:
+        rest = np.flatnonzero(~first)
+        keep = np.concatenate([keep, rng.choice(rest, budget - len(keep), replace=False)])
+    return data.iloc[np.sort(keep)]
+
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: positions of `n_out` points of the series `y`
+    (x = position) that keep its visual shape. First and last points are kept.
+    """
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Bucket boundaries for the n_out - 2 points between the first and the last
+    bounds = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = bounds[i], bounds[i + 1]
+        if i + 2 < len(bounds):
+            next_x = (bounds[i + 1] + bounds[i + 2] - 1) / 2
+            next_y = y[bounds[i + 1]:bounds[i + 2]].mean()
+        else:
+            next_x, next_y = n - 1, y[-1]
+        positions = np.arange(start, end)
+        area = np.abs(
+            (previous - next_x) * (y[start:end] - y[previous])
+            - (previous - positions) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        picked[i + 1] = previous
+    return picked
+
+
+def ols_trendline(data, x, y, webgl=True):
+    """Least-squares line of y on x over every row; a Plotly trace like px's "ols" trendline."""
+    pairs = data[[x, y]].apply(pd.to_numeric, errors="coerce").dropna()
+    if len(pairs) < 2 or pairs[x].nunique() < 2:
+        return None
+    xs, ys = pairs[x].to_numpy(dtype="float64"), pairs[y].to_numpy(dtype="float64")
+    slope, intercept = np.polyfit(xs, ys, 1)
+    fitted = slope * xs + intercept
+    total = ((ys - ys.mean()) ** 2).sum()
+    r_squared = 1 - ((ys - fitted) ** 2).sum() / total if total else 1.0
+    line_x = np.array([xs.min(), xs.max()])
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(
+        x=line_x,
+        y=slope * line_x + intercept,
+        mode="lines",
+        name="OLS trendline",
+        showlegend=False,
+        hovertemplate=(
+            f"<b>OLS trendline</b><br>{y} = {slope:.6g} * {x} + {intercept:.6g}<br>"
+            f"R<sup>2</sup>={r_squared:.6f}<extra></extra>"
+        ),
+    )
+
+
+def scatter(data, x, y, trendline=None, budget=POINT_BUDGET, **kwargs):
+    """
+    px.scatter that stays light on large frames: above `budget` rows it draws a
+    thinned set of points with WebGL. An "ols" trendline is fitted on all rows.
+    """
+    thinned = len(data) > budget
+    if thinned:
+        fig = px.scatter(thin_points(data, x, y, budget), x=x, y=y, render_mode="webgl", **kwargs)
+    else:
+        fig = px.scatter(data, x=x, y=y, **kwargs)
+    if trendline == "ols":
+        line = ols_trendline(data, x, y, webgl=thinned)
+        if line is not None:
+            fig.add_trace(line)
+    elif trendline is not None:
+        raise ValueError(f"Unsupported trendline: {trendline!r}")
+    if not thinned:
+        return fig
+    fig.add_annotation(
+        text=f"Showing {budget:,} of {len(data):,} points",
+        xref="paper", yref="paper", x=1, y=1.06, showarrow=False, font={"size": 10},
+    )
+    return fig
+
+
+def line(data, x, y, budget=POINT_BUDGET, **kwargs):
+    """px.line that draws at most `budget` LTTB-selected rows (in row order) with WebGL."""
+    if len(data) <= budget:
+        return px.line(data, x=x, y=y, **kwargs)
+    picked = data.iloc[lttb_indices(data[y].to_numpy(), budget)]
+    return px.line(picked, x=x, y=y, render_mode="webgl", **kwargs)
@@ -0,0 +1,168 @@
+# scenarios.py
+"""
+Monte Carlo scenario engine behind Scenario Planning.
+
+A scenario sets the ADR change of each room type, the change in marketing
+spend and the inflation of utility and staff costs; demand responds to the
+price through an occupancy elasticity (and to marketing through a small spend
+elasticity), both drawn with uncertainty. Each scenario is evaluated on the
+totals of the filtered data read from the day cube (rooms occupied and room
+revenue per room type, room cost, cost groups, marketing spend, capacity), so
+a scenario costs a few arithmetic operations instead of a pass over the rows,
+and thousands of them are evaluated as one batch of NumPy arrays.
+
+Model, per scenario (d = demand multiplier of a room type):
+    d        = (1 + ADR change) ** elasticity * (1 + marketing change) ** marketing elasticity,
+               scaled down so occupied rooms stay within AvailableRooms
+    revenue  = sum(room revenue * (1 + ADR change) * d) + other revenue * occupancy change
+    profit   = revenue - room cost * occupancy change - utility * (1 + inflation)
+               - staff * (1 + inflation) - other costs - extra marketing spend
+Other revenue (TotalRevenue beyond room revenue) and room cost follow the
+change in total rooms occupied.
+
+Like analytics.py, nothing here imports Streamlit or Plotly.
+"""
+import numpy as np
+import pandas as pd
+
+from enrich import COST_COLUMNS
+from forecast import ROOM_TYPES
+
+UTILITY_COLUMNS = [col for col in COST_COLUMNS if col.startswith("UtilityCost")]
+STAFF_COLUMNS = [col for col in COST_COLUMNS if col.startswith("StaffSalary")]
+OTHER_COST_COLUMNS = [col for col in COST_COLUMNS if col not in UTILITY_COLUMNS + STAFF_COLUMNS]
+
+# Widget defaults, in percent (ranges as (low, high)); also the prewarmed scenario
+DEFAULT_LEVERS = {
+    "price_change": 10,
+    "price_spread": 5,
+    "marketing_change": (0, 0),
+    "utility_inflation": (0, 5),
+    "staff_inflation": (0, 5),
+    "elasticity": -0.8,
+    "elasticity_sd": 0.3,
+    "n_scenarios": 10_000,
+}
+# Demand lift per unit of relative marketing spend change: mean and standard deviation
+MARKETING_ELASTICITY = (0.05, 0.02)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def totals(cube):
+    """
+    Totals of the cube's rows the scenarios are evaluated on, or None without
+    room occupancy, room revenue and TotalRevenue.
+    """
+    sums = {
+        metric: float(cube.base[f"{metric}__sum"].sum())
+        for metric in cube.metrics
+    }
+    needed = [col for pair in ROOM_TYPES.values() for col in pair] + ["TotalRevenue"]
+    if any(col not in sums for col in needed):
+        return None
+    rooms = np.array([sums[occupied] for occupied, _ in ROOM_TYPES.values()])
+    room_revenue = np.array([sums[revenue] for _, revenue in ROOM_TYPES.values()])
+    return {
+        "rooms": rooms,
+        "room_revenue": room_revenue,
+        # Revenue beyond rooms (F&B, spa, ...); never negative
+        "other_revenue": max(sums["TotalRevenue"] - room_revenue.sum(), 0.0),
+        "room_cost": sums.get("RoomCost", 0.0),
+        "utility": sum(sums.get(col, 0.0) for col in UTILITY_COLUMNS),
+        "staff": sum(sums.get(col, 0.0) for col in STAFF_COLUMNS),
+        "other_costs": sum(sums.get(col, 0.0) for col in OTHER_COST_COLUMNS),
+        "marketing": sums.get("MarketingSpend", 0.0),
+        "capacity": sums.get("AvailableRooms", np.inf) or np.inf,
+    }
+
+
+def _uniform(rng, bounds, size):
+    low, high = bounds
+    return rng.uniform(low / 100, high / 100, size)
+
+
+def evaluate(base, price, marketing, utility, staff, elasticity, marketing_elasticity):
+    """
+    Revenue, profit and occupied rooms of each scenario. `price` is the
+    relative ADR change per scenario and room type (n x room types); the other
+    arguments are relative changes or elasticities per scenario (n,).
+    """
+    demand = (1 + price) ** elasticity[:, None] * ((1 + marketing) ** marketing_elasticity)[:, None]
+    occupied = demand @ base["rooms"]
+    # Occupancy cannot exceed the rooms available
+    demand *= np.minimum(1.0, base["capacity"] / np.maximum(occupied, 1e-12))[:, None]
+    occupied = demand @ base["rooms"]
+    occupancy_change = occupied / max(base["rooms"].sum(), 1e-12)
+
+    revenue = ((1 + price) * demand) @ base["room_revenue"] + base["other_revenue"] * occupancy_change
+    profit = (
+        revenue
+        - base["room_cost"] * occupancy_change
+        - base["utility"] * (1 + utility)
+        - base["staff"] * (1 + staff)
+        - base["other_costs"]
+        - base["marketing"] * marketing
+    )
+    return revenue, profit, occupied
+
+
+def simulate(base, price_change=10, price_spread=5, marketing_change=(0, 0), utility_inflation=(0, 5),
+             staff_inflation=(0, 5), elasticity=-0.8, elasticity_sd=0.3, n_scenarios=10_000, seed=42):
+    """
+    Draws `n_scenarios` scenarios and evaluates them in one batch. Changes are
+    in percent: each room type's ADR change is uniform within `price_change` ±
+    `price_spread`, the other levers uniform within their (low, high) ranges;
+    the occupancy elasticity is normal (mean `elasticity`, sd `elasticity_sd`)
+    and never positive. Returns a frame with one row per scenario.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(n_scenarios)
+    price = rng.uniform(price_change - price_spread, price_change + price_spread, (n, len(ROOM_TYPES))) / 100
+    marketing = _uniform(rng, marketing_change, n)
+    utility = _uniform(rng, utility_inflation, n)
+    staff = _uniform(rng, staff_inflation, n)
+    drawn_elasticity = np.minimum(rng.normal(elasticity, elasticity_sd, n), 0.0)
+    drawn_marketing = np.maximum(rng.normal(*MARKETING_ELASTICITY, n), 0.0)
+
+    revenue, profit, occupied = evaluate(base, price, marketing, utility, staff, drawn_elasticity, drawn_marketing)
+    scenarios = pd.DataFrame(price * 100, columns=[f"ADR change {room} (%)" for room in ROOM_TYPES])
+    scenarios["Marketing change (%)"] = marketing * 100
+    scenarios["Utility inflation (%)"] = utility * 100
+    scenarios["Staff inflation (%)"] = staff * 100
+    scenarios["Elasticity"] = drawn_elasticity
+    scenarios["OccupiedRooms"] = occupied
+    scenarios["Revenue"] = revenue
+    scenarios["Profit"] = profit
+    return scenarios
+
+
+def baseline(base):
+    """Revenue, profit and occupied rooms with every lever at zero."""
+    zero = np.zeros(1)
+    revenue, profit, occupied = evaluate(base, np.zeros((1, len(ROOM_TYPES))), zero, zero, zero, zero, zero)
+    return {"Revenue": revenue[0], "Profit": profit[0], "OccupiedRooms": occupied[0]}
+
+
+def summarize(scenarios, base):
+    """
+    Percentiles and mean of revenue, profit and occupied rooms across the
+    scenarios, the baseline, and each lever's correlation with profit.
+    """
+    outcomes = ["Revenue", "Profit", "OccupiedRooms"]
+    values = scenarios[outcomes].to_numpy()
+    summary = pd.DataFrame(
+        np.percentile(values, PERCENTILES, axis=0),
+        index=[f"P{p}" for p in PERCENTILES],
+        columns=outcomes,
+    )
+    summary.loc["Mean"] = values.mean(axis=0)
+    summary.loc["Baseline"] = pd.Series(baseline(base))
+    levers = scenarios.drop(columns=outcomes)
+    varying = levers.loc[:, levers.std() > 0]
+    sensitivity = varying.corrwith(scenarios["Profit"]).rename("Correlation with Profit").reset_index()
+    sensitivity.columns = ["Lever", "Correlation with Profit"]
+    return {
+        "summary": summary.reset_index(names="Statistic"),
+        "sensitivity": sensitivity,
+        "p_profit_up": float((scenarios["Profit"] > summary.loc["Baseline", "Profit"]).mean()),
+    }
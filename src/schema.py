@@ -0,0 +1,68 @@
+# schema.py
+"""
+Schema inference for loaded datasets: downcasts numeric columns and turns
+low-cardinality text columns (Nationality, LoyaltyTier, RoomType, ...) into
+categoricals, so several large property files fit in one Streamlit server.
+"""
+import pandas as pd
+
+from enrich import DATE_COLUMNS
+
+# A text column becomes categorical when it has at most this many distinct
+# values and they make up at most this fraction of its rows
+MAX_CATEGORIES = 10_000
+MAX_CATEGORY_RATIO = 0.5
+
+
+def memory_bytes(data):
+    return int(data.memory_usage(deep=True).sum())
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def optimize_dtypes(data, downcast_floats=False):
+    """
+    Returns (compact frame, report). Integers are downcast to the smallest type
+    that holds their range; floats only when `downcast_floats` is set, since
+    float32 loses precision on large revenue totals. Date columns are left as
+    text for the enrichment stage to parse.
+    """
+    before = memory_bytes(data)
+    converted = {}
+    categorical = []
+    downcast = []
+
+    for col in data.columns:
+        series = data[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            new = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series) and downcast_floats:
+            new = pd.to_numeric(series, downcast="float")
+        elif _is_text(series) and col not in DATE_COLUMNS and len(series):
+            n_unique = series.nunique(dropna=True)
+            if n_unique > MAX_CATEGORIES or n_unique > MAX_CATEGORY_RATIO * len(series):
+                continue
+            converted[col] = series.astype("category")
+            categorical.append(col)
+            continue
+        else:
+            continue
+        if new.dtype != series.dtype:
+            converted[col] = new
+            downcast.append(col)
+
+    if converted:
+        data = data.assign(**converted)
+    after = memory_bytes(data)
+    report = {
+        "bytes_before": before,
+        "bytes_after": after,
+        "bytes_saved": before - after,
+        "categorical": categorical,
+        "downcast": downcast,
+    }
+    return data, report
@@ -1,13 +1,19 @@
 # All library imports
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import numpy as np
-from datetime import timedelta
 import os
 
+import streamlit as st
+
+import append
+import ingest
+import portfolio
+import prewarm
+import registry
+import streaming
+import telemetry
+
+# Users who see the performance overlay
+ADMIN_USERS = {name.strip() for name in os.environ.get("MINDSHIFT_ADMINS", "hamza").split(",") if name.strip()}
+
 
 def run_streamlit_main():
     """
@@ -26,6 +32,7 @@ def login():
         # Replace with secure authentication in production
         if username == "hamza" and password == "dream123":
             st.session_state["logged_in"] = True
+            st.session_state["username"] = username
         else:
             st.sidebar.error("Invalid username or password")
 
@@ -45,13 +52,201 @@ def display_dashboard_analytics():
     uploaded_file = st.file_uploader("Upload your file (csv, txt, xlsx, xls)", type=["csv", "txt", "xlsx", "xls"])
     
     if uploaded_file:
-        # Load data based on file type
-        if uploaded_file.name.endswith(".csv") or uploaded_file.name.endswith(".txt"):
-            data = pd.read_csv(uploaded_file)
-        else:
-            data = pd.read_excel(uploaded_file)
-        
+        # Parsed once per distinct file content, then served from the ingestion cache;
+        # large CSV/TXT files are streamed in chunks behind a progress bar
+        progress = st.empty()
+        with telemetry.span("ingest", file=uploaded_file.name, bytes=uploaded_file.size,
+                            streamed=ingest.is_streamed(uploaded_file)):
+            data = ingest.load_upload(
+                uploaded_file,
+                on_progress=lambda fraction, rows: progress.progress(fraction, text=f"Streaming file: {rows:,} rows read"),
+            )
+        progress.empty()
+        with telemetry.span("append deltas"):
+            data = append_deltas(data)
+        # One frame per dataset for all sessions in this process
+        data = share_dataset(data, "upload")
+        show_cache_stats()
+        show_memory_report(data)
+        show_stream_report(data)
+
         return data  # Corrected indentation issue
     else:
         st.warning("Please upload a file to proceed.")
         return None
+
+
+def display_portfolio():
+    """
+    Portfolio mode: several property files (uploads and/or a directory) read
+    in parallel worker processes. Returns a portfolio.Portfolio, or None.
+    """
+    st.title("Portfolio Analytics")
+    st.sidebar.title("MindShift")
+    st.sidebar.write("Compare your properties")
+
+    uploaded_files = st.file_uploader(
+        "Upload one file per property (csv, txt, xlsx, xls)", type=["csv", "txt", "xlsx", "xls"],
+        accept_multiple_files=True, key="portfolio_files",
+    )
+    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files or []]
+    directory_files = portfolio.list_files(portfolio.PORTFOLIO_DIR)
+    if directory_files and st.checkbox(
+        f"Include the {len(directory_files)} files in {portfolio.PORTFOLIO_DIR}", key="portfolio_directory"
+    ):
+        files += [(os.path.basename(path), path) for path in directory_files]
+    if not files:
+        st.warning("Please upload property files to proceed.")
+        return None
+
+    # Files already aggregated are served from cache; the others are read in parallel
+    progress = st.empty()
+    with telemetry.span("portfolio load", files=len(files), workers=portfolio.PORTFOLIO_WORKERS):
+        pf = portfolio.load_portfolio(
+            files,
+            on_progress=lambda done, total: progress.progress(done / total, text=f"Processed {done} of {total} files"),
+        )
+    progress.empty()
+    for name, error in pf.errors.items():
+        st.sidebar.warning(f"{name}: could not be read ({error}).")
+    if not pf.properties:
+        return None
+    st.sidebar.caption(
+        f"{len(pf.properties)} properties, {sum(a.n_rows for a in pf.properties.values()):,} rows "
+        f"aggregated by {min(portfolio.PORTFOLIO_WORKERS, len(files))} worker(s)"
+    )
+    return pf
+
+
+def share_dataset(data, slot):
+    """
+    Swaps `data` for the process-wide shared frame of its dataset (see registry.py)
+    and holds that dataset for this session under `slot` until it is replaced.
+    """
+    leases = st.session_state.setdefault("dataset_leases", {})
+    frame, leases[slot] = registry.dataset_registry.acquire(data)
+    return frame
+
+
+def append_deltas(data):
+    """Appends optional delta files (new days of data) to the loaded dataset, without reprocessing it."""
+    delta_files = st.sidebar.file_uploader(
+        "Append new days (delta file)", type=["csv", "txt", "xlsx", "xls"],
+        accept_multiple_files=True, key="delta_files",
+    )
+    for delta_file in delta_files or []:
+        # Parsed whole: every delta row is appended, not a streamed sample of them
+        data = append.append_delta(data, ingest.load_upload(delta_file, stream=False))
+        report = data.attrs["append_report"]
+        st.sidebar.caption(
+            f"{delta_file.name}: appended {report['appended_rows']:,} of {report['delta_rows']:,} rows"
+            + (f", {report['new_dates']:,} new dates" if "new_dates" in report else "")
+        )
+        skipped = report["duplicate_rows"] + report["repeated_rows"]
+        if skipped:
+            st.sidebar.warning(
+                f"{delta_file.name}: skipped {skipped:,} rows already loaded "
+                f"(same {', '.join(report['key'])})."
+            )
+        if report["keys_checked"] == "sample":
+            st.sidebar.warning(
+                f"{delta_file.name}: the loaded data is a sample and its rows are not stored, "
+                "so only the sample was checked for rows already loaded."
+            )
+    return data
+
+
+def show_cache_stats():
+    """Displays ingestion cache hit/miss counters in the sidebar."""
+    stats = ingest.cache_stats()
+    memory = stats["memory"]
+    st.sidebar.caption(
+        f"Ingestion cache: {memory['hits']} hits / {memory['misses']} misses, "
+        f"{memory['entries']} files ({memory['bytes'] / 1024 ** 2:,.1f} MB), "
+        f"{memory['evictions']} evicted"
+        + (f", {memory['rejected']} too large to cache" if memory["rejected"] else "")
+    )
+    if "disk" in stats:
+        disk = stats["disk"]
+        st.sidebar.caption(f"Disk cache: {disk['hits']} hits / {disk['misses']} misses")
+    if "store" in stats:
+        store = stats["store"]
+        st.sidebar.caption(
+            f"Parquet store: {store['hits']} hits / {store['misses']} misses, "
+            f"{store['partitions_read']} partitions read / {store['partitions_pruned']} pruned "
+            f"({store['bytes_read'] / 1024 ** 2:,.1f} MB)"
+        )
+    shared = registry.dataset_registry.stats()
+    if shared["datasets"]:
+        st.sidebar.caption(
+            f"Shared datasets: {shared['datasets']} held by {shared['leases']} session slots "
+            f"({shared['bytes'] / 1024 ** 2:,.1f} MB)"
+        )
+    if "streamed" in stats:
+        streamed = stats["streamed"]
+        st.sidebar.caption(f"Streamed aggregates: {streamed['entries']} files ({streamed['bytes'] / 1024 ** 2:,.1f} MB)")
+
+
+def show_memory_report(data):
+    """Displays how much memory the dtype optimization saved for the loaded dataset."""
+    report = data.attrs.get("dtype_report")
+    if not report:
+        return
+    saved_pct = 100 * report["bytes_saved"] / report["bytes_before"] if report["bytes_before"] else 0
+    st.sidebar.caption(
+        f"Dataset memory: {report['bytes_after'] / 1024 ** 2:,.1f} MB "
+        f"(saved {report['bytes_saved'] / 1024 ** 2:,.1f} MB, {saved_pct:.0f}%; "
+        f"{len(report['categorical'])} categorical, {len(report['downcast'])} downcast columns)"
+    )
+
+
+def show_prewarm_status(options, ctx):
+    """Ready indicator per navigation choice, refreshed while sections are precomputed in the background."""
+    if prewarm.PREWARM_WORKERS <= 0:
+        return
+    with st.sidebar:
+        session = st.session_state.get("telemetry_session")
+        st.fragment(_prewarm_status, run_every="2s" if prewarm.pending(ctx, session) else None)(options, ctx)
+
+
+def _prewarm_status(options, ctx):
+    with st.expander("Precomputed sections"):
+        for option in options:
+            status = prewarm.navigation_status(option, ctx)
+            if status is not None:
+                label = {"ready": "✓ ready", "failed": "✗ failed (see the server log)"}.get(status, status)
+                st.caption(f"{option}: {label}")
+
+
+def show_stream_report(data):
+    """Tells the user which sections see every row of a streamed upload and which see a sample."""
+    summary = streaming.get_summary(data)
+    if summary is None or summary.n_sampled >= summary.n_rows:
+        return
+    st.sidebar.caption(
+        f"Streamed {summary.n_rows:,} rows in {summary.n_chunks} chunks. Time series, totals and "
+        f"per-category breakdowns use every row; row-level views (scatter plots, guest models, data "
+        f"tables) use a uniform sample of {summary.n_sampled:,} rows, or every row of the "
+        f"selected dates when they hold at most {streaming.RANGE_ROW_BUDGET:,} rows."
+    )
+
+
+def show_telemetry(record):
+    """Performance overlay for admins: this rerun's spans, per-step percentiles across reruns, JSONL export."""
+    if record is None or st.session_state.get("username") not in ADMIN_USERS:
+        return
+    if not st.sidebar.toggle("Performance overlay", key="telemetry_overlay"):
+        return
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption(
+            f"This rerun: {record['seconds']:.2f}s"
+            + (f", peak memory {record['peak_rss'] / 1024 ** 2:,.0f} MB" if record["peak_rss"] else "")
+            + ". Own seconds exclude nested steps; a section's own time is spent drawing its figures."
+        )
+        st.dataframe(telemetry.span_table(record), hide_index=True)
+        st.caption(f"Last {len(telemetry.history)} reruns in this process")
+        st.dataframe(telemetry.summary(), hide_index=True)
+        st.download_button(
+            "Export timings (JSONL)", telemetry.export_jsonl(),
+            file_name="mindshift_telemetry.jsonl", mime="application/json",
+        )
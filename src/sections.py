@@ -0,0 +1,777 @@
+# sections.py
+"""
+Dashboard sections as registered, lazily executed units.
+
+Each unit turns the tables from the analytics engine (analytics.py) into the
+Plotly figures for one navigation choice (or one part of it), from a
+SectionContext and without touching Streamlit. Results are
+cached by (unit, dataset, filter state, params) under a memory budget, so the
+script only computes the section that is on screen, and flipping back to a
+section that was already viewed reuses its results. Units can also be
+computed ahead of time from other threads (see prewarm.py).
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import correlation
+import cube
+import forecast
+import guests
+import lazy
+import portfolio
+import render
+import scenarios
+import segmentation
+import streaming
+import telemetry
+from cache import LRUCache, estimate_size
+from store import month_codes
+
+# Plotly is imported when the first figure is built
+px = lazy.module("plotly.express")
+go = lazy.module("plotly.graph_objects")
+plotly_subplots = lazy.module("plotly.subplots")
+
+RESULT_CACHE_BYTES = 512 * 1024 ** 2
+
+# Trace attributes holding per-point data (what makes a figure large)
+FIGURE_DATA_ATTRS = ("x", "y", "z", "values", "labels", "customdata", "text", "ids", "parents")
+
+SECTIONS = OrderedDict()
+# Unit -> columns it cannot run without (the ones its renderer checks for)
+REQUIRED_COLUMNS = {}
+
+
+def _figure_size(fig):
+    total = 0
+    for trace in fig.data:
+        for attr in FIGURE_DATA_ATTRS:
+            value = getattr(trace, attr, None)
+            if value is not None:
+                total += np.asarray(value).nbytes
+    return total
+
+
+def result_size(result):
+    """Approximate memory held by a section result (tables and figures)."""
+    if not isinstance(result, dict):
+        return estimate_size(result)
+    total = 0
+    for value in result.values():
+        if hasattr(value, "to_plotly_json"):
+            total += _figure_size(value)
+        else:
+            total += estimate_size(value)
+    return total
+
+
+result_cache = LRUCache(RESULT_CACHE_BYTES, sizer=result_size)
+
+# Result keys being computed right now, by any thread (see compute)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class SectionContext:
+    """What a section unit needs: the full and filtered data plus the filter state."""
+
+    def __init__(self, data, filtered, state):
+        self.data = data
+        self.filtered = filtered
+        self.state = state
+        self.dataset = filtered.attrs.get("dataset_key") or filtered.attrs.get("content_hash")
+
+    @property
+    def sampled(self):
+        """Whether `data` is only a sample of a streamed dataset's rows."""
+        summary = streaming.get_summary(self.data)
+        return summary is not None and summary.n_sampled < summary.n_rows
+
+    def month_rows(self, months):
+        """
+        Filtered rows of the months `months` (yyyymm codes): all of them, read
+        from the store, when `data` is a sample (None if it is not stored).
+        """
+        dates, chosen = self.state
+        if self.sampled:
+            return streaming.month_rows(self.data, months, dates, dict(chosen))
+        return self.filtered[np.isin(month_codes(self.filtered["Date"]), list(months))]
+
+    def cube(self, dims=(), metrics=None):
+        """
+        Day-grain aggregates of the filtered data, built once per filter state.
+        For streamed uploads they come from the cubes over every row of the file
+        rather than from the in-memory sample; a dim outside the main cube is
+        covered only when `metrics` are given and its breakdown cube has them.
+        """
+        summary = streaming.get_summary(self.filtered)
+        if summary is not None and summary.covers(self.dataset, dims, metrics):
+            return summary.filtered_cube(self.state, dims, metrics)
+        return cube.get_cube(self.filtered, self.state, dims=dims, metrics=metrics)
+
+
+def section(name, requires=()):
+    """Registers a compute function as the unit `name`, needing the columns `requires`."""
+    def register(func):
+        SECTIONS[name] = func
+        REQUIRED_COLUMNS[name] = tuple(requires)
+        return func
+    return register
+
+
+def applies(name, ctx):
+    """Whether ctx's filtered rows have every column unit `name` needs."""
+    return all(col in ctx.filtered.columns for col in REQUIRED_COLUMNS.get(name, ()))
+
+
+def result_key(name, ctx, params):
+    return (name, ctx.dataset, ctx.state, tuple(sorted(params.items())))
+
+
+def compute(name, ctx, **params):
+    """
+    Runs unit `name` for `ctx` and `params`, or returns its cached result.
+    Safe to call from several threads: while one computes a key, the others
+    wait for its result instead of computing it again.
+    """
+    with telemetry.span(f"compute: {name}") as attrs:
+        return _compute(name, ctx, params, attrs)
+
+
+def _compute(name, ctx, params, attrs):
+    if not ctx.dataset:
+        attrs["cache"] = "off"
+        return SECTIONS[name](ctx, **params)
+    key = result_key(name, ctx, params)
+    result = result_cache.get(key)
+    if result is not None:
+        attrs["cache"] = "hit"
+        return result
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = _in_flight[key] = Future()
+    if not owner:
+        # Another thread (usually prewarm) is computing it
+        attrs["cache"] = "wait"
+        return future.result()
+    attrs["cache"] = "miss"
+    try:
+        result = SECTIONS[name](ctx, **params)
+        if result is not None:
+            result_cache.put(key, result)
+        future.set_result(result)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+    return result
+
+
+def status(name, ctx, **params):
+    """"ready" when the result is cached, "computing" while a thread is on it, else None."""
+    key = result_key(name, ctx, params)
+    if key in result_cache:
+        return "ready"
+    if key in _in_flight:
+        return "computing"
+    return None
+
+
+# ----------------------------- OVERVIEW --------------------------------
+@section("Overview")
+def overview(ctx):
+    return analytics.overview(ctx.filtered)
+
+
+# ------------------------- REVENUE ANALYSIS ----------------------------
+@section("Revenue Analysis")
+def revenue_analysis(ctx):
+    filtered_data = ctx.filtered
+    result = analytics.revenue_summary(filtered_data, ctx.cube())
+    result.update(dict.fromkeys(["fig_weekly", "fig_adr", "fig_mktg", "fig_rooms"]))
+
+    # Weekly Revenue
+    weekly_revenue = result["weekly"]
+    if weekly_revenue is not None and not weekly_revenue.empty:
+        result["fig_weekly"] = px.line(
+            weekly_revenue, x="Week", y="TotalRevenue",
+            title="Weekly Revenue (Filtered)", markers=True
+        )
+
+    # ADR vs Total Revenue
+    if "ADR" in filtered_data.columns and "TotalRevenue" in filtered_data.columns:
+        result["fig_adr"] = render.scatter(
+            filtered_data, x="ADR", y="TotalRevenue",
+            trendline="ols", title="ADR vs Total Revenue"
+        )
+
+    # Marketing Spend vs Total Revenue
+    if "MarketingSpend" in filtered_data.columns and "TotalRevenue" in filtered_data.columns:
+        result["fig_mktg"] = render.scatter(
+            filtered_data, x="MarketingSpend", y="TotalRevenue",
+            trendline="ols", title="Marketing Spend vs Total Revenue"
+        )
+
+    # Rooms Revenue per Year (including Family Room)
+    if not result["rooms_per_year"].empty:
+        result["fig_rooms"] = px.bar(
+            result["rooms_per_year"],
+            x="Year", y="Revenue", color="RoomType",
+            barmode="group", title="Rooms Revenue by Year"
+        )
+    return result
+
+
+# ------------------------- GUEST ANALYSIS ------------------------------
+@section("Guest Analysis")
+def guest_analysis(ctx):
+    filtered_data = ctx.filtered
+    result = {}
+    charts = [
+        ("Nationality", px.pie, {"names": "Nationality", "values": "Count", "title": "Guest Nationality Breakdown"}),
+        ("AgeGroup", px.bar, {"x": "AgeGroup", "y": "Count", "title": "Guest Age Group Distribution"}),
+        ("LoyaltyTier", px.bar, {"x": "LoyaltyTier", "y": "Count", "title": "Loyalty Tier Distribution"}),
+    ]
+    for col, chart, kwargs in charts:
+        if col not in filtered_data.columns:
+            continue
+        counts = analytics.value_counts(filtered_data, col, ctx.cube(dims=(col,), metrics=[]))
+        result[col] = counts
+        result[f"fig_{col}"] = chart(counts, **kwargs) if not counts.empty else None
+    return result
+
+
+# -------------------------- SEASONALITY --------------------------------
+@section("Seasonality", requires=("Date", "TotalRevenue"))
+def seasonality(ctx):
+    result = analytics.seasonality(ctx.filtered, ctx.cube())
+    result["fig_month"] = result["fig_month_year"] = None
+    if result["monthly"].empty:
+        return result
+
+    result["fig_month"] = px.line(
+        result["monthly"], x="Month", y="TotalRevenue",
+        title="Monthly Revenue Trend (Filtered)", markers=True
+    )
+    result["fig_month_year"] = px.line(
+        result["monthly_by_year"], x="Month", y="TotalRevenue", color="Year",
+        title="Monthly Revenue Trend by Year", markers=True
+    )
+    return result
+
+
+# --------------------- HOUSEKEEPING & LAUNDRY --------------------------
+@section("Housekeeping & Laundry")
+def housekeeping_and_laundry(ctx):
+    result = analytics.housekeeping_and_laundry(ctx.filtered, ctx.cube())
+    result["fig_hk"] = result["fig_laundry"] = None
+
+    # Housekeeping Over Time
+    housekeeping_data = result["housekeeping"]
+    if housekeeping_data is not None and not housekeeping_data.empty:
+        result["fig_hk"] = px.line(
+            housekeeping_data,
+            x="Month",
+            y="HousekeepingExpenses",
+            title="Monthly Housekeeping Expenses",
+            markers=True
+        )
+
+    # Laundry Revenue vs. Expenses
+    laundry_data = result["laundry"]
+    if laundry_data is not None and not laundry_data.empty:
+        result["fig_laundry"] = px.bar(
+            laundry_data,
+            x="Month",
+            y=["LaundryRevenue", "LaundryExpenses"],
+            barmode="group",
+            title="Laundry Revenue vs. Expenses"
+        )
+    return result
+
+
+# ------------------------- FEEDBACK ANALYSIS ---------------------------
+@section("Feedback Analysis", requires=("Date", "GuestFeedbackScore"))
+def feedback_analysis(ctx):
+    feedback_monthly = analytics.feedback_monthly(ctx.filtered, ctx.cube())
+    result = {"monthly": feedback_monthly, "fig_feedback": None}
+    if not feedback_monthly.empty:
+        result["fig_feedback"] = px.line(
+            feedback_monthly,
+            x="Month",
+            y="GuestFeedbackScore",
+            title="Monthly Average Guest Feedback Score",
+            markers=True
+        )
+    return result
+
+
+# --------------------------- CUSTOM CHARTS -----------------------------
+@section("Custom Charts")
+def custom_charts(ctx):
+    revenue_breakdown = analytics.department_revenue(ctx.filtered, ctx.cube())
+    if revenue_breakdown is None:
+        return {"breakdown": None, "fig_dept": None}
+    fig_dept = px.bar(
+        revenue_breakdown,
+        x="Department",
+        y="Revenue",
+        title="Revenue Breakdown by Department (Filtered)"
+    )
+    return {"breakdown": revenue_breakdown, "fig_dept": fig_dept}
+
+
+# ------------------------------- KPIs ----------------------------------
+@section("KPIs")
+def kpis(ctx):
+    return analytics.kpis(ctx.filtered, ctx.cube())
+
+
+# ------------------------ ADVANCED ANALYSIS ----------------------------
+@section("Advanced Analysis: correlation")
+def correlation_heatmap(ctx):
+    # Merged from per-partition sufficient statistics, not recomputed from the rows
+    corr = correlation.correlations(ctx, dims=streaming.FILTER_DIMS)
+    if corr.empty:
+        return {"corr": None, "fig_corr": None}
+    fig_corr = px.imshow(
+        corr,
+        text_auto=True,
+        color_continuous_scale='RdBu_r',
+        origin='lower',
+        title="Correlation Heatmap (Filtered Data)"
+    )
+    return {"corr": corr, "fig_corr": fig_corr}
+
+
+@section("Advanced Analysis: segmentation", requires=("TotalRevenue", "GuestFeedbackScore"))
+def guest_segmentation(ctx, k=3):
+    # One point per guest (total spent, mean feedback) when guests are identified
+    rows = ctx.filtered
+    if "GuestID" in rows.columns:
+        rows = guests.guest_features(ctx).rename(
+            columns={"TotalSpent": "TotalRevenue", "AvgFeedback": "GuestFeedbackScore"}
+        )
+    # Every k is fitted in one pass and cached; this unit only picks k out of it
+    fitted = segmentation.get_segmentation(rows, (ctx.dataset, ctx.state) if ctx.dataset else None)
+    df_segment = fitted.segments(k) if fitted is not None else None
+    if df_segment is None:
+        return {"segments": None, "fig_kmeans": None, "curve": None, "fig_curve": None}
+    fig_kmeans = render.scatter(
+        df_segment,
+        x="TotalRevenue",
+        y="GuestFeedbackScore",
+        color="Cluster",
+        title=f"Guest Segmentation (k={k})",
+        color_continuous_scale="Viridis"
+    )
+    curve = fitted.curve
+    fig_curve = plotly_subplots.make_subplots(specs=[[{"secondary_y": True}]])
+    fig_curve.add_trace(go.Scatter(x=curve["k"], y=curve["Inertia"], name="Inertia (elbow)", mode="lines+markers"))
+    fig_curve.add_trace(
+        go.Scatter(x=curve["k"], y=curve["Silhouette"], name="Silhouette", mode="lines+markers"), secondary_y=True
+    )
+    fig_curve.add_vline(x=k, line_dash="dash")
+    fig_curve.update_layout(title="Choosing k: Elbow and Silhouette", xaxis_title="Number of Clusters (k)")
+    return {"segments": df_segment, "fig_kmeans": fig_kmeans, "curve": curve, "fig_curve": fig_curve}
+
+
+# ---------------- CANCELLATION & NO-SHOW ANALYSIS ----------------------
+@section("Cancellation & No-Show Analysis", requires=("ReservationStatus",))
+def cancellation_analysis(ctx):
+    result = analytics.reservation_status(ctx.filtered, ctx.cube(dims=("ReservationStatus",), metrics=[]))
+    result["fig_status"] = px.pie(
+        result["status_counts"],
+        names="ReservationStatus",
+        values="Count",
+        title="Reservation Status Breakdown"
+    )
+    result["fig_status_time"] = None
+    if result["monthly_status"] is not None:
+        result["fig_status_time"] = px.line(
+            result["monthly_status"],
+            x="Month",
+            y="Count",
+            color="ReservationStatus",
+            title="Monthly Reservation Status Trend"
+        )
+    return result
+
+
+# -------------- GUEST RETENTION & REPEAT VISITS ANALYSIS --------------
+@section("Guest Retention & Repeat Visits", requires=("GuestID",))
+def guest_retention(ctx):
+    result = analytics.guest_visits(guests.guest_features(ctx))
+    result["fig_visits"] = px.histogram(
+        result["visit_counts"],
+        x="VisitCount",
+        nbins=20,
+        title="Distribution of Guest Visit Counts"
+    )
+    result["fig_class"] = px.pie(
+        result["guest_types"],
+        names="GuestType",
+        values="Count",
+        title="First-Time vs. Repeat Guests"
+    )
+    return result
+
+
+# --------- MARKETING ROI & CAMPAIGN PERFORMANCE ANALYSIS --------------
+@section("Marketing ROI & Campaign Performance", requires=("TotalRevenue", "MarketingSpend"))
+def marketing_roi(ctx):
+    dims = ("MarketingChannel",) if "MarketingChannel" in ctx.filtered.columns else ()
+    result = analytics.marketing_roi(ctx.filtered, ctx.cube(dims=dims, metrics=["MarketingSpend", "TotalRevenue"]))
+    result["fig_channel"] = None
+    if result["channels"] is not None:
+        result["fig_channel"] = px.bar(
+            result["channels"],
+            x="MarketingChannel",
+            y="ROI",
+            title="ROI by Marketing Channel",
+            hover_data=["MarketingSpend", "TotalRevenue"]
+        )
+    return result
+
+
+# ---- OPERATIONAL EFFICIENCY & RESOURCE ALLOCATION ANALYSIS -----------
+@section("Operational Efficiency & Resource Allocation")
+def operational_efficiency(ctx):
+    result = analytics.operational_efficiency(ctx.filtered, ctx.cube())
+    result["fig_staff"] = result["fig_maint"] = None
+
+    # Staffing (HousekeepingStaffCount) vs. OccupiedRooms
+    if result["staff_vs_occupancy"] is not None:
+        result["fig_staff"] = px.line(
+            result["staff_vs_occupancy"],
+            x="Date",
+            y=["HousekeepingStaffCount", "OccupiedRooms"],
+            title="Staffing Levels vs. Occupancy (Monthly Average)",
+            markers=True
+        )
+
+    # Maintenance tickets
+    if result["maintenance"] is not None:
+        result["fig_maint"] = px.bar(
+            result["maintenance"],
+            x="Date",
+            y="MaintenanceTickets",
+            title="Monthly Maintenance Tickets"
+        )
+    return result
+
+
+# ----------------- ROOM Type Profitability Analysis -------------------
+@section("Room Type Profitability Analysis")
+def room_type_profitability(ctx):
+    result = analytics.room_type_profitability(ctx.filtered, ctx.cube())
+    result["fig_room_revenue"] = None
+    if result["room_revenue"] is not None:
+        result["fig_room_revenue"] = px.bar(
+            result["room_revenue"],
+            x="RoomType",
+            y="Revenue",
+            title="Total Revenue by Room Type"
+        )
+    return result
+
+
+# --------------------- CLTV (CUSTOMER LIFETIME VALUE) ------------------
+@section("CLTV Estimation", requires=("GuestID", "TotalRevenue"))
+def cltv_estimation(ctx):
+    key = (ctx.dataset, ctx.state) if ctx.dataset else None
+    result = analytics.cltv(guests.guest_features(ctx), top=10, key=key)
+    top_10 = result["top"]
+    fig_cltv = px.bar(
+        top_10,
+        x="GuestID",
+        y="CLTV",
+        title="Top 10 Guests by Estimated CLTV"
+    )
+    return {
+        "top_10": top_10,
+        "fig_cltv": fig_cltv,
+        "ranked": result["guests"],
+        "model": result["model"],
+        "params": result["params"],
+    }
+
+
+# ----------------- UPSELLING & CROSS-SELLING ANALYSIS ------------------
+@section("Upselling & Cross-Selling")
+def upselling(ctx):
+    present = [col for col in analytics.UPSELL_COLUMNS if col in ctx.filtered.columns]
+    corr = None
+    if present and "TotalRevenue" in ctx.filtered.columns:
+        corr = correlation.correlations(ctx, columns=present + ["TotalRevenue"], dims=streaming.FILTER_DIMS)
+    result = analytics.upselling(ctx.filtered, corr, ctx.cube())
+    if result is None:
+        return None
+    result["fig_upsell"] = px.pie(
+        result["upsell_sums"],
+        names="UpsellCategory",
+        values="TotalRevenue",
+        title="Upsell/Cross-Sell Revenue Breakdown"
+    )
+    return result
+
+
+# ------------------------ ROOM COST ANALYSIS ---------------------------
+@section("Room Cost Analysis")
+def room_cost_analysis(ctx):
+    dims = ("RoomType",) if "RoomType" in ctx.filtered.columns else ()
+    result = analytics.room_costs(ctx.filtered, ctx.cube(dims=dims, metrics=analytics.ROOM_COST_METRICS), top=10)
+    result["fig_monthly"] = result["fig_top_rooms"] = None
+
+    # Monthly Cost vs Revenue vs Profit Chart
+    if result["monthly"] is not None:
+        result["fig_monthly"] = px.line(
+            result["monthly"],
+            x="Month",
+            y=["TotalRevenue", "Profit", "RoomCost"],
+            title="Monthly Revenue, Profit, and Room Cost",
+            markers=True
+        )
+
+    # Top 10 Profitable Rooms Chart
+    if result["room_profit"] is not None:
+        result["fig_top_rooms"] = px.bar(
+            result["room_profit"],
+            x="RoomType",
+            y="Profit",
+            title="Top 10 Profitable Rooms",
+            labels={"Profit": "Total Profit", "RoomType": "Room Type"}
+        )
+    return result
+
+
+# ------------------------ DYNAMIC PRICING SUGGESTIONS ------------------
+@section("Dynamic Pricing Suggestions", requires=("Date", "ADR"))
+def dynamic_pricing(ctx, horizon=7):
+    fitted = forecast.get_forecast(ctx)
+    if fitted is None:
+        return None
+    result = analytics.pricing_suggestions(fitted, days=horizon)
+    result["fig_adr"] = px.line(
+        result["forecast"],
+        x="Date",
+        y="ADR",
+        color="RoomType",
+        title=f"Forecast ADR by Room Type (Next {horizon} Days)"
+    )
+    result["fig_demand"] = px.line(
+        result["forecast"],
+        x="Date",
+        y="Demand",
+        color="RoomType",
+        title=f"Forecast Rooms Occupied by Room Type (Next {horizon} Days)"
+    )
+    return result
+
+
+# ------------------------ GUEST PREFERENCES ----------------------------
+@section("Guest Preferences", requires=("GuestID", "LoyaltyTier"))
+def guest_preferences(ctx):
+    # Recommend room upgrades for Platinum loyalty members
+    return {"recommendations": analytics.upgrade_recommendations(guests.guest_features(ctx))}
+
+
+# ------------------------ SCENARIO PLANNING ----------------------------
+@section("Scenario Planning")
+def scenario_planning(ctx, **levers):
+    # Every scenario is evaluated on the cube's totals in one NumPy batch
+    base = scenarios.totals(ctx.cube())
+    if base is None:
+        return None
+    simulated = scenarios.simulate(base, **levers)
+    result = scenarios.summarize(simulated, base)
+    result["scenarios"] = simulated
+    baseline = scenarios.baseline(base)
+    for outcome in ("Revenue", "Profit"):
+        fig = px.histogram(
+            simulated,
+            x=outcome,
+            nbins=60,
+            title=f"{outcome} Across {len(simulated):,} Scenarios"
+        )
+        fig.add_vline(x=baseline[outcome], line_dash="dash", annotation_text="Baseline")
+        result[f"fig_{outcome.lower()}"] = fig
+    return result
+
+
+# ------------------------ STORY TELLING --------------------------------
+@section("Story Telling")
+def story_telling(ctx):
+    return analytics.story_metrics(ctx.filtered, ctx.cube())
+
+
+# ------------------------ DIG DEEPER -----------------------------------
+@section("Dig Deeper")
+def dig_deeper(ctx, col1=None, col2=None):
+    filtered_data = ctx.filtered
+    corr_matrix = None
+    if all(pd.api.types.is_numeric_dtype(filtered_data[col]) for col in (col1, col2)):
+        corr_matrix = correlation.correlations(ctx, columns=[col1, col2], dims=streaming.FILTER_DIMS)
+    result = analytics.compare_columns(filtered_data, col1, col2, corr_matrix)
+
+    # CASE 1: Both columns are numeric
+    if result["case"] == "numeric":
+        result["scatter_fig"] = render.scatter(
+            filtered_data,
+            x=col1,
+            y=col2,
+            title=f"Scatter Plot: {col1} vs {col2}"
+        )
+        result["line_fig"] = render.line(
+            filtered_data,
+            x=col1,
+            y=col2,
+            title=f"Line Chart: {col1} vs {col2}"
+        )
+        result["heatmap_fig"] = px.imshow(
+            result["corr_matrix"],
+            text_auto=True,
+            color_continuous_scale='RdBu_r',
+            title=f"Correlation Heatmap: {col1} vs {col2}"
+        )
+
+    # CASE 2: One numeric, one categorical
+    elif result["case"] == "mixed":
+        numeric_col, cat_col = result["numeric_col"], result["cat_col"]
+        result["cat_bar_fig"] = px.bar(
+            filtered_data,
+            x=cat_col,
+            y=numeric_col,
+            title=f"Bar Chart: {cat_col} vs {numeric_col}"
+        )
+        result["box_fig"] = px.box(
+            filtered_data,
+            x=cat_col,
+            y=numeric_col,
+            title=f"Box Plot: {cat_col} vs {numeric_col}"
+        )
+        result["violin_fig"] = px.violin(
+            filtered_data,
+            x=cat_col,
+            y=numeric_col,
+            box=True,
+            points="all",
+            title=f"Violin Plot: {cat_col} vs {numeric_col}"
+        )
+
+    # CASE 3: Both columns are categorical
+    else:
+        result["grouped_bar_fig"] = px.bar(
+            result["grouped"],
+            x=col1,
+            y='count',
+            color=col2,
+            barmode='group',
+            title=f"Grouped Bar Chart: {col1} vs {col2}"
+        )
+        result["sunburst_fig"] = px.sunburst(
+            result["grouped"],
+            path=[col1, col2],
+            values='count',
+            title=f"Sunburst Chart: {col1} vs {col2}"
+        )
+        result["heatmap_fig"] = px.density_heatmap(
+            filtered_data,
+            x=col1,
+            y=col2,
+            title=f"Heatmap: {col1} vs {col2}"
+        )
+    return result
+
+
+# ------------------------ COMPANY'S ANALYSIS ---------------------------
+@section("Company's", requires=("Company", "CompanyDiscount"))
+def company_analysis(ctx):
+    # Company x day aggregates from the time cube
+    company_cube = ctx.cube(dims=("Company",), metrics=analytics.COMPANY_METRICS)
+    result = analytics.company_analysis(ctx.filtered, company_cube)
+    result["fig_revenue_company"] = result["fig_discount_count"] = result["fig_discount_sum"] = None
+
+    # TOTAL REVENUE FROM EACH COMPANY BY YEAR & QUARTER
+    revenue_by_company = result["revenue_by_company"]
+    if revenue_by_company is not None and not revenue_by_company.empty:
+        fig_revenue_company = px.bar(
+            revenue_by_company,
+            x="Year",
+            y="TotalRevenue",
+            color="Quarter",
+            facet_col="Company",
+            facet_col_wrap=3,  # one chart per Company
+            title="Company Revenue by Year & Quarter (Filtered)",
+            barmode="group"
+        )
+        fig_revenue_company.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        result["fig_revenue_company"] = fig_revenue_company
+
+    # COMPANY DISCOUNT USAGE (FREQUENCY & AMOUNT) BY YEAR
+    discount_usage = result["discount_usage"]
+    if not discount_usage.empty:
+        result["fig_discount_count"] = px.bar(
+            discount_usage,
+            x="Year",
+            y="UsageCount",
+            color="Company",
+            barmode="group",
+            title="Company Discount - Frequency of Usage by Year"
+        )
+        result["fig_discount_sum"] = px.bar(
+            discount_usage,
+            x="Year",
+            y="DiscountSum",
+            color="Company",
+            barmode="group",
+            title="Company Discount - Total Discount Amount by Year"
+        )
+    return result
+
+
+# ------------------------------ PORTFOLIO ------------------------------
+def portfolio_comparison(pf, date_range=None):
+    """
+    Cross-property tables and figures of a portfolio.Portfolio within
+    `date_range`. Not a registered unit: portfolios have no SectionContext,
+    and everything here is read from the per-property cubes.
+    """
+    kpis = portfolio.kpis(pf, date_range)
+    rooms = portfolio.room_type_profitability(pf, date_range)
+    monthly = portfolio.monthly(pf, "TotalRevenue", date_range=date_range)
+    result = {"kpis": kpis, "rooms": rooms, "monthly": monthly, "fig_kpis": None, "fig_rooms": None,
+              "fig_monthly": None}
+    properties = kpis[kpis["Property"] != "Portfolio"] if not kpis.empty else kpis
+    if not properties.empty:
+        long = properties.melt(
+            id_vars="Property", value_vars=["RevPAR", "ADR", "Occupancy (%)", "Profit margin (%)"],
+            var_name="KPI", value_name="Value",
+        )
+        fig_kpis = px.bar(
+            long, x="Property", y="Value", color="Property", facet_col="KPI", facet_col_wrap=2,
+            title="KPIs by Property",
+        )
+        fig_kpis.update_yaxes(matches=None, showticklabels=True)
+        fig_kpis.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        result["fig_kpis"] = fig_kpis
+    if not rooms.empty:
+        result["fig_rooms"] = px.bar(
+            rooms, x="RoomType", y="Profit", color="Property", barmode="group",
+            hover_data=["Revenue", "Cost", "Margin (%)"], title="Room Type Profitability by Property",
+        )
+    if not monthly.empty:
+        result["fig_monthly"] = px.line(
+            monthly, x="Month", y="TotalRevenue", color="Property", title="Monthly Revenue by Property",
+        )
+    return result
@@ -0,0 +1,133 @@
+# segmentation.py
+"""
+K-Means guest segmentation engine.
+
+One pass over the standardized features fits every k in K_RANGE and records
+the elbow (inertia) and silhouette curve. Each k is warm-started from the
+centers of k - 1 plus the point farthest from them, so it converges in a few
+iterations. Above SAMPLE_ROWS rows the centers are fitted by full-batch
+K-Means on one uniform sample of that size and every row is then assigned to
+its nearest center, so the cost of the curve stops growing with the row
+count; scikit-learn's MiniBatchKMeans was slower than this on these two
+features at every batch size tried. The fitted labels are cached per
+(dataset, filter state, features), so moving the cluster slider only reads
+the cache.
+
+Like analytics.py, nothing here imports Streamlit or Plotly; scikit-learn is
+imported when a segmentation is first fitted.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+SEGMENT_FEATURES = ("TotalRevenue", "GuestFeedbackScore")
+K_RANGE = range(2, 11)
+
+# Centers are fitted on at most this many rows; the rest are only assigned
+SAMPLE_ROWS = int(os.environ.get("MINDSHIFT_SEGMENT_SAMPLE_ROWS", "100000"))
+# Silhouette scores are estimated on a fixed sample of rows (the exact score is
+# quadratic); its pairwise distances are computed once and reused for every k
+SILHOUETTE_SAMPLE = 3_000
+
+MODEL_CACHE_BYTES = 256 * 1024 ** 2
+
+
+class Segmentation:
+    """Cluster labels for every k over the same rows, plus the elbow/silhouette curve."""
+
+    def __init__(self, rows, labels, centers, curve, sampled):
+        self.rows = rows
+        self.labels = labels
+        self.centers = centers
+        self.curve = curve
+        self.sampled = sampled
+
+    @property
+    def nbytes(self):
+        return (
+            int(self.rows.memory_usage(deep=True).sum())
+            + sum(labels.nbytes for labels in self.labels.values())
+            + sum(centers.nbytes for centers in self.centers.values())
+        )
+
+    @property
+    def ks(self):
+        return list(self.labels)
+
+    def segments(self, k):
+        """The segmented rows with a Cluster column for `k`, or None if `k` was not fitted."""
+        if k not in self.labels:
+            return None
+        return self.rows.assign(Cluster=self.labels[k])
+
+
+model_cache = LRUCache(MODEL_CACHE_BYTES, sizer=lambda segmentation: segmentation.nbytes)
+
+
+def _farthest_point(X, centers):
+    """Row of X farthest from its nearest center: the extra center when going from k - 1 to k."""
+    nearest = np.full(len(X), np.inf)
+    for center in centers:
+        nearest = np.minimum(nearest, ((X - center) ** 2).sum(axis=1))
+    return X[int(np.argmax(nearest))]
+
+
+def fit(data, features=SEGMENT_FEATURES, ks=K_RANGE, random_state=42):
+    """Fits every k in `ks` on the rows of `data` with all `features`; None when no row qualifies."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import (
+        pairwise_distances,
+        pairwise_distances_argmin_min,
+        silhouette_score,
+    )
+    from sklearn.preprocessing import StandardScaler
+
+    rows = data[list(features)].dropna()
+    if rows.empty:
+        return None
+    X = StandardScaler().fit_transform(rows)
+    rng = np.random.default_rng(random_state)
+    sampled = len(X) > SAMPLE_ROWS
+    X_fit = X[rng.choice(len(X), SAMPLE_ROWS, replace=False)] if sampled else X
+    silhouette_rows = rng.permutation(len(X))[:SILHOUETTE_SAMPLE]
+    distances = pairwise_distances(X[silhouette_rows])
+
+    labels, centers, curve = {}, {}, []
+    previous = None
+    for k in ks:
+        if k > len(X_fit):
+            break
+        # Warm start: the centers for k - 1 plus the point they cover worst
+        init = "k-means++" if previous is None else np.vstack([previous, _farthest_point(X_fit, previous)])
+        model = KMeans(n_clusters=k, init=init, n_init=1, random_state=random_state).fit(X_fit)
+        previous = centers[k] = model.cluster_centers_
+        if sampled:
+            assigned, nearest = pairwise_distances_argmin_min(X, previous)
+            labels[k], inertia = assigned.astype(np.int8), float((nearest ** 2).sum())
+        else:
+            labels[k], inertia = model.labels_.astype(np.int8), float(model.inertia_)
+        silhouette = np.nan
+        if 1 < len(np.unique(labels[k][silhouette_rows])) < len(silhouette_rows):
+            silhouette = silhouette_score(distances, labels[k][silhouette_rows], metric="precomputed")
+        curve.append({"k": k, "Inertia": inertia, "Silhouette": float(silhouette)})
+
+    if not labels:
+        return None
+    return Segmentation(rows, labels, centers, pd.DataFrame(curve), sampled)
+
+
+def get_segmentation(data, key, features=SEGMENT_FEATURES, ks=K_RANGE):
+    """
+    The Segmentation of `data` for every k, fitted once per `key` (e.g. dataset
+    and filter state); frames without a key are fitted without memoization.
+    """
+    cache_key = (key, tuple(features), tuple(ks))
+    segmentation = model_cache.get(cache_key) if key else None
+    if segmentation is None:
+        segmentation = fit(data, features, ks)
+        if key and segmentation is not None:
+            model_cache.put(cache_key, segmentation)
+    return segmentation
@@ -0,0 +1,281 @@
+# store.py
+"""
+Persistent columnar dataset store.
+
+Uploaded workbooks are converted once into Parquet, keyed by their content
+hash. Later sessions (and re-uploads of the same workbook) open the columnar
+copy, memory-mapped, instead of going through openpyxl again. Streamed CSV
+uploads are written chunk by chunk as they are read.
+
+Datasets with a Date column are stored partitioned by month
+(<key>/year=YYYY/month=MM/part-N.parquet, rows without a date under
+<key>/undated/) next to a JSON manifest recording each partition's files, row
+count and date bounds. Loading a date range reads only the partitions that
+overlap it, so I/O follows the length of the range rather than of the history.
+
+pyarrow is optional: without it the store reports itself as unavailable and
+the dashboard falls back to parsing the upload.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    HAS_PYARROW = True
+    WRITE_ERRORS = (TypeError, ValueError, OSError, pyarrow.ArrowException)
+except ImportError:
+    HAS_PYARROW = False
+    WRITE_ERRORS = (TypeError, ValueError, OSError)
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "MINDSHIFT_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "store"),
+)
+
+DATE_COLUMN = "Date"
+MANIFEST_NAME = "_manifest.json"
+UNDATED = "undated"
+# Position of each row in the original file, so partitioned reads come back in file order
+ROW_COLUMN = "_row"
+
+
+def month_codes(dates):
+    """Partition of each row as a yyyymm integer, 0 where the date is missing."""
+    return (dates.dt.year * 100 + dates.dt.month).fillna(0).to_numpy(dtype="int64")
+
+
+def _label(month):
+    return f"{month // 100:04d}-{month % 100:02d}" if month else UNDATED
+
+
+def _partition_dir(month):
+    return f"year={month // 100:04d}/month={month % 100:02d}" if month else UNDATED
+
+
+class PartitionWriter:
+    """
+    Writes one dataset as month partitions, a frame (or chunk) at a time. Files go
+    to a temporary directory; the dataset becomes visible on commit().
+    """
+
+    def __init__(self, store, key, date_column=DATE_COLUMN, base=None):
+        self.store = store
+        self.key = key
+        self.date_column = date_column
+        self.tmp_dir = f"{store.dataset_dir(key)}.tmp"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        # Partitions of `base` (a manifest) are kept and their files referenced, not
+        # copied; new files always go under this key's own directory
+        self.partitions = {p["partition"]: dict(p, files=list(p["files"])) for p in (base or {}).get("partitions", [])}
+        self.n_rows = (base or {}).get("rows", 0)
+        self.columns = list((base or {}).get("columns", []))
+        self.n_writes = 0
+        self.failed = False
+
+    def write(self, data):
+        """Appends `data` to the partitions its dates fall in. Returns False once writing has failed."""
+        if self.failed:
+            return False
+        try:
+            self._write(data)
+        except WRITE_ERRORS:
+            self.abort()
+            return False
+        return True
+
+    def _write(self, data):
+        dates = pd.to_datetime(data[self.date_column], errors="coerce")
+        months = month_codes(dates)
+        order = np.argsort(months, kind="stable")
+        uniques, starts = np.unique(months[order], return_index=True)
+        rows = data.assign(**{ROW_COLUMN: np.arange(self.n_rows, self.n_rows + len(data))})
+        for month, positions in zip(uniques, np.split(order, starts[1:])):
+            month = int(month)
+            rel_path = f"{self.key}/{_partition_dir(month)}/part-{self.n_writes:05d}.parquet"
+            path = os.path.join(self.tmp_dir, os.path.relpath(rel_path, self.key))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            rows.iloc[positions].to_parquet(path, engine="pyarrow", index=False)
+
+            part_dates = dates.iloc[positions]
+            entry = self.partitions.setdefault(
+                _label(month), {"partition": _label(month), "rows": 0, "min_date": None, "max_date": None, "files": []}
+            )
+            entry["files"].append({"path": rel_path, "rows": len(positions), "bytes": os.path.getsize(path)})
+            entry["rows"] += len(positions)
+            if month:
+                lo, hi = str(part_dates.min().date()), str(part_dates.max().date())
+                entry["min_date"] = min(entry["min_date"] or lo, lo)
+                entry["max_date"] = max(entry["max_date"] or hi, hi)
+        self.columns += [col for col in data.columns if col not in self.columns]
+        self.n_rows += len(data)
+        self.n_writes += 1
+
+    def commit(self):
+        """Writes the manifest and moves the partitions into place. Returns False if writing failed."""
+        if self.failed:
+            return False
+        manifest = {
+            "key": self.key,
+            "date_column": self.date_column,
+            "rows": self.n_rows,
+            "columns": self.columns,
+            "partitions": sorted(self.partitions.values(), key=lambda p: (p["partition"] == UNDATED, p["partition"])),
+        }
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        with open(os.path.join(self.tmp_dir, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f)
+        final_dir = self.store.dataset_dir(self.key)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(self.tmp_dir, final_dir)
+        self.store.manifests.pop(self.key, None)
+        return True
+
+    def abort(self):
+        self.failed = True
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class DatasetStore:
+    """Content-hash keyed Parquet datasets in a local directory."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.manifests = {}
+        self.hits = 0
+        self.misses = 0
+        self.partitions_read = 0
+        self.partitions_pruned = 0
+        self.bytes_read = 0
+
+    @property
+    def available(self):
+        return HAS_PYARROW
+
+    def path(self, key):
+        """Single-file layout, used for datasets without a Date column."""
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def dataset_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def manifest(self, key):
+        """The partition manifest of `key`, or None if it is not stored partitioned."""
+        if not self.available:
+            return None
+        manifest = self.manifests.get(key)
+        if manifest is None:
+            path = os.path.join(self.dataset_dir(key), MANIFEST_NAME)
+            if not os.path.exists(path):
+                return None
+            with open(path) as f:
+                manifest = self.manifests[key] = json.load(f)
+        return manifest
+
+    def has(self, key):
+        return self.available and (self.manifest(key) is not None or os.path.exists(self.path(key)))
+
+    def partitions(self, key, date_range=None):
+        """
+        Manifest entries of the partitions overlapping `date_range` (inclusive
+        (start, end) days; every partition when None). None if `key` is not
+        stored partitioned. Undated rows are only included without a range.
+        """
+        manifest = self.manifest(key)
+        if manifest is None:
+            return None
+        if date_range is None:
+            return manifest["partitions"]
+        start, end = (str(pd.Timestamp(d).date()) for d in date_range)
+        return [
+            p for p in manifest["partitions"]
+            if p["partition"] != UNDATED and p["min_date"] <= end and p["max_date"] >= start
+        ]
+
+    def load(self, key, columns=None, date_range=None):
+        """
+        Opens a stored dataset memory-mapped; returns None if it is not stored.
+        With `date_range`, only the partitions overlapping it are read (whole
+        partitions: rows just outside the range are left to the date filter).
+        """
+        if not self.has(key):
+            self.misses += 1
+            return None
+        self.hits += 1
+        manifest = self.manifest(key)
+        if manifest is None:
+            data = pd.read_parquet(self.path(key), columns=columns, engine="pyarrow", memory_map=True)
+        else:
+            data = self._read_partitions(manifest, self.partitions(key, date_range), columns)
+        data.attrs["content_hash"] = key
+        return data
+
+    def _read_partitions(self, manifest, partitions, columns=None):
+        self.partitions_read += len(partitions)
+        self.partitions_pruned += len(manifest["partitions"]) - len(partitions)
+        read_columns = None if columns is None else [*columns, ROW_COLUMN]
+        frames = []
+        for partition in partitions:
+            for part in partition["files"]:
+                self.bytes_read += part["bytes"]
+                frames.append(pd.read_parquet(
+                    os.path.join(self.root, part["path"]), columns=read_columns, engine="pyarrow", memory_map=True
+                ))
+        if not frames:
+            return pd.DataFrame(columns=columns if columns is not None else manifest["columns"])
+        data = pd.concat(frames, ignore_index=True)
+        return data.sort_values(ROW_COLUMN, kind="stable").drop(columns=ROW_COLUMN).reset_index(drop=True)
+
+    def writer(self, key, date_column=DATE_COLUMN):
+        """PartitionWriter for writing `key` chunk by chunk (e.g. while streaming an upload)."""
+        return PartitionWriter(self, key, date_column)
+
+    def save(self, key, data):
+        """
+        Writes `data` under `key`, partitioned by month when it has a Date column.
+        Returns False when the frame cannot be represented in Parquet (e.g. object
+        columns mixing numbers and text).
+        """
+        if not self.available:
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        if DATE_COLUMN in data.columns:
+            writer = self.writer(key)
+            return writer.write(data) and writer.commit()
+        path = self.path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            data.to_parquet(tmp_path, engine="pyarrow", index=False)
+        except WRITE_ERRORS:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        return True
+
+    def extend(self, base_key, key, rows):
+        """
+        Stores `key` as the partitions of `base_key` plus `rows` (e.g. an appended
+        delta): only the partitions `rows` fall in get new files, the rest are
+        shared with the base. Returns False if the base is not stored partitioned.
+        """
+        base = self.manifest(base_key)
+        if base is None or base["date_column"] not in rows.columns:
+            return False
+        writer = PartitionWriter(self, key, base["date_column"], base=base)
+        return writer.write(rows) and writer.commit()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "partitions_read": self.partitions_read,
+            "partitions_pruned": self.partitions_pruned,
+            "bytes_read": self.bytes_read,
+        }
+
+
+dataset_store = DatasetStore()
@@ -0,0 +1,320 @@
+# streaming.py
+"""
+Streaming ingestion for CSV/TXT uploads too large to parse in one go.
+
+The file is read in chunks; each chunk is enriched (dates, room revenue,
+RoomCost, Profit) and folded into a day-grain TimeCube split by the sidebar
+filter dims, plus a small cube per dim the sections split or total by. Chunk
+cubes are merged in batches. Only those cubes and a bounded uniform
+sample of the raw rows are kept, so the full frame is never resident. Time
+series, totals and per-category sums are served from the cubes over every
+row; only row-level sections (scatters, guest-level models) run on the sample.
+
+Correlation statistics (correlation.py) are folded chunk by chunk as well, so
+correlations also cover every row.
+
+The raw chunks are also written to the dataset store, partitioned by month
+(see store.py). When the sidebar date range covers few enough rows, the
+filtered view is read back from the overlapping partitions in full instead of
+being cut from the sample (partition_view).
+"""
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+import correlation
+import enrich
+import filters
+import schema
+from cache import LRUCache
+from cube import TimeCube, cube_cache, default_metrics
+from store import dataset_store
+
+# CSV uploads above this size are streamed instead of parsed whole
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("MINDSHIFT_STREAM_MB", "200")) * 1024 ** 2
+
+CHUNK_ROWS = 200_000
+SAMPLE_ROWS = 200_000
+
+# Sidebar filters: the only dims of the main cube, which holds every metric
+FILTER_DIMS = ("Nationality", "LoyaltyTier")
+# Dims sections split or total by, each in a small cube of its own (filter
+# dims plus that dim) holding just the metrics those sections need. Splitting
+# the main cube by them would multiply its rows by their cardinalities.
+BREAKDOWN_DIMS = {
+    "ReservationStatus": [],
+    "Company": ["TotalRevenue", "CompanyDiscount"],
+    "MarketingChannel": ["MarketingSpend", "TotalRevenue"],
+    "RoomType": ["TotalRevenue", "Profit", "RoomCost"],
+    "AgeGroup": [],
+}
+
+# Chunk cubes are merged into the running cubes this many at a time
+MERGE_BATCH = 8
+
+# Grown to fit a summary larger than this (see store_summary): one that is not
+# cached would have its file streamed again on every rerun
+SUMMARY_CACHE_BYTES = 512 * 1024 ** 2
+
+# Date ranges holding at most this many rows are read in full from the partitions
+RANGE_ROW_BUDGET = int(os.environ.get("MINDSHIFT_RANGE_ROWS", "1000000"))
+RANGE_CACHE_BYTES = 1024 ** 3
+
+logger = logging.getLogger(__name__)
+
+summary_cache = LRUCache(SUMMARY_CACHE_BYTES, sizer=lambda summary: summary.nbytes)
+range_cache = LRUCache(RANGE_CACHE_BYTES)
+
+
+class StreamSummary:
+    """
+    What survives a streamed read: the full-data cube, the breakdown cubes
+    ({dim: cube}), row/chunk counts and the sampling threshold (rows whose
+    random key falls below it are in the sample; 1.0 when every row is).
+    """
+
+    def __init__(self, key, cube, unit_prices, n_rows, n_chunks, n_sampled, breakdowns=None, threshold=1.0):
+        self.key = key
+        self.cube = cube
+        self.breakdowns = breakdowns or {}
+        # Same identity the enriched sample gets, so sections only use the cube
+        # when it was built with the unit prices on screen
+        self.dataset_key = enrich.dataset_key(key, unit_prices)
+        self.unit_prices = unit_prices
+        self.n_rows = n_rows
+        self.n_chunks = n_chunks
+        self.n_sampled = n_sampled
+        self.threshold = threshold
+
+    @property
+    def nbytes(self):
+        return self.cube.nbytes + sum(cube.nbytes for cube in self.breakdowns.values())
+
+    def _cube_for(self, dims, metrics=None):
+        """The main cube if it has `dims`, else a breakdown cube with `dims` and `metrics`, else None."""
+        if set(dims) <= set(self.cube.dims):
+            return self.cube
+        if metrics is None:
+            return None
+        for cube in self.breakdowns.values():
+            if set(dims) <= set(cube.dims) and set(metrics) <= set(cube.metrics):
+                return cube
+        return None
+
+    def covers(self, dataset, dims, metrics=None):
+        return dataset == self.dataset_key and self._cube_for(dims, metrics) is not None
+
+    def filtered_cube(self, state, dims=(), metrics=None):
+        """The cube covering `dims` restricted to a filters.filter_state() tuple, cached per state."""
+        cube = self._cube_for(dims, metrics)
+        cache_key = (self.dataset_key, "streamed", cube.dims, state)
+        filtered = cube_cache.get(cache_key)
+        if filtered is None:
+            dates, chosen = state
+            filtered = cube.filter(dates, dict(chosen))
+            cube_cache.put(cache_key, filtered)
+        return filtered
+
+
+def frame_cubes(enriched, metrics):
+    """
+    (cube, {breakdown dim: cube}) of enriched rows: the main cube split by the
+    filter dims, the breakdown cubes by the filter dims and theirs.
+    """
+    filter_dims = [d for d in FILTER_DIMS if d in enriched.columns]
+    cube = TimeCube.from_frame(enriched, metrics=metrics, dims=filter_dims, dropna=False)
+    breakdowns = {
+        dim: TimeCube.from_frame(
+            enriched, metrics=[m for m in breakdown_metrics if m in metrics], dims=filter_dims + [dim], dropna=False,
+        )
+        for dim, breakdown_metrics in BREAKDOWN_DIMS.items() if dim in enriched.columns
+    }
+    return cube, breakdowns
+
+
+def merge_cubes(parts):
+    """Merges (cube, breakdowns) pairs into one pair, in a single pass per cube."""
+    parts = list(parts)
+    if len(parts) == 1:
+        return parts[0]
+    cubes, breakdowns = zip(*parts)
+    return TimeCube.merge(cubes), {
+        dim: TimeCube.merge([b[dim] for b in breakdowns if dim in b]) for dim in breakdowns[0]
+    }
+
+
+def store_summary(summary):
+    """
+    Caches a StreamSummary, growing the cache's budget to fit it if needed:
+    sections would otherwise fall back to the sample and the file be streamed
+    again on every rerun.
+    """
+    if summary.nbytes > summary_cache.max_bytes:
+        logger.warning(
+            "Stream summary of %s takes %.0f MB, over the %.0f MB cache budget; growing the budget",
+            summary.key, summary.nbytes / 1024 ** 2, summary_cache.max_bytes / 1024 ** 2,
+        )
+        summary_cache.max_bytes = summary.nbytes
+    return summary_cache.put(summary.key, summary)
+
+
+def numeric_metrics(frame, metrics):
+    """Chunks can infer a metric column as text (stray values); coerce those to numbers."""
+    for col in metrics:
+        if col in frame.columns and not pd.api.types.is_numeric_dtype(frame[col]):
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    return frame
+
+
+def stream_csv(fileobj, key, unit_prices=None, chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS,
+               on_progress=None, seed=0, writer=None):
+    """
+    Reads a CSV file object chunk by chunk. Returns (sample frame, StreamSummary);
+    the sample is a uniform sample of up to `sample_rows` raw rows, in file order.
+    `on_progress(fraction, rows_read)` is called after every chunk. Raw chunks
+    are passed to `writer` (a store.PartitionWriter), if given, and committed
+    at the end.
+    """
+    unit_prices = unit_prices or enrich.DEFAULT_UNIT_PRICES
+    rng = np.random.default_rng(seed)
+    fileobj.seek(0, os.SEEK_END)
+    total_bytes = fileobj.tell() or 1
+    fileobj.seek(0)
+
+    cubes = None
+    # Chunk cubes and statistics not merged into the running ones yet
+    pending_cubes, pending_stats = [], []
+    stats = None
+    metrics = None
+    sample = None
+    n_rows = 0
+    n_chunks = 0
+    for chunk in pd.read_csv(fileobj, chunksize=chunk_rows):
+        # Bottom-k on random keys: a uniform sample without holding earlier chunks
+        chunk_keys = rng.random(len(chunk))
+        picked = chunk.assign(_row=np.arange(n_rows, n_rows + len(chunk)), _key=chunk_keys)
+        if sample is not None and len(sample) >= sample_rows:
+            picked = picked[chunk_keys < sample["_key"].max()]
+        sample = picked if sample is None else pd.concat([sample, picked], ignore_index=True)
+        if len(sample) > sample_rows:
+            sample = sample.nsmallest(sample_rows, "_key")
+
+        if writer is not None and "Date" in chunk.columns:
+            writer.write(chunk)
+
+        # The sample holds its own copy of the rows, so the chunk is enriched in place
+        enriched = enrich.add_derived_columns(chunk, unit_prices)
+        if metrics is None:
+            metrics = default_metrics(enriched)
+        pending_cubes.append(frame_cubes(numeric_metrics(enriched, metrics), metrics))
+        # Correlation statistics over every row, shifted by the first chunk's means
+        if stats is None:
+            stats = correlation.MomentStats.from_frame(enriched, dims=FILTER_DIMS)
+        else:
+            pending_stats.append(correlation.MomentStats.from_frame(
+                enriched, stats.columns, stats.dims, shift=stats.shift
+            ))
+        # Merged in batches, so the running cubes are not regrouped after every chunk
+        if len(pending_cubes) >= MERGE_BATCH:
+            cubes = merge_cubes([cubes, *pending_cubes] if cubes is not None else pending_cubes)
+            stats = correlation.MomentStats.merge([stats, *pending_stats])
+            pending_cubes, pending_stats = [], []
+
+        n_rows += len(chunk)
+        n_chunks += 1
+        if on_progress is not None:
+            on_progress(min(fileobj.tell() / total_bytes, 1.0), n_rows)
+
+    if sample is None:
+        raise ValueError("The uploaded file has no rows")
+    if pending_cubes:
+        cubes = merge_cubes([cubes, *pending_cubes] if cubes is not None else pending_cubes)
+    if pending_stats:
+        stats = correlation.MomentStats.merge([stats, *pending_stats])
+    if writer is not None and writer.n_rows:
+        writer.commit()
+    threshold = float(sample["_key"].max()) if n_rows > sample_rows else 1.0
+    sample = sample.sort_values("_row").drop(columns=["_row", "_key"]).reset_index(drop=True)
+    sample, report = schema.optimize_dtypes(sample)
+    sample.attrs["content_hash"] = key
+    sample.attrs["dtype_report"] = report
+    summary = StreamSummary(
+        key, cubes[0], unit_prices, n_rows, n_chunks, len(sample), breakdowns=cubes[1], threshold=threshold,
+    )
+    store_summary(summary)
+    correlation.stats_cache.put(summary.dataset_key, stats)
+    return sample, summary
+
+
+def sample_mask(n_rows, threshold, seed=0):
+    """
+    Which of `n_rows` new rows a sample with `threshold` takes in: those whose
+    random key falls below it, the rule stream_csv samples by, so the sample
+    stays uniform over old and new rows alike.
+    """
+    if threshold >= 1.0:
+        return np.ones(n_rows, dtype=bool)
+    return np.random.default_rng(seed).random(n_rows) < threshold
+
+
+def month_rows(data, months, date_range, selections=None):
+    """
+    Every row of streamed dataset `data` in the months `months` (yyyymm codes)
+    that the filter keeps, read from its month partitions and enriched like the
+    sample. None when `data` is not stored partitioned.
+    """
+    summary = get_summary(data)
+    if summary is None or dataset_store.partitions(summary.key) is None:
+        return None
+    start, end = (pd.Timestamp(d) for d in date_range)
+    frames = []
+    for month in sorted(months):
+        first = pd.Timestamp(year=month // 100, month=month % 100, day=1)
+        last = first + pd.offsets.MonthEnd(0)
+        frames.append(dataset_store.load(summary.key, date_range=(max(start, first), min(end, last))))
+    rows = enrich.add_derived_columns(pd.concat(frames, ignore_index=True), summary.unit_prices)
+    mask = filters.FilterIndex(rows).mask(date_range, selections)
+    return rows if mask is None else rows[mask]
+
+
+def get_summary(data):
+    """The StreamSummary of a (possibly filtered) streamed dataset, or None for fully loaded ones."""
+    key = data.attrs.get("content_hash")
+    return summary_cache.get(key) if key else None
+
+
+def partition_view(data, date_range, selections=None, unit_prices=None):
+    """
+    (filtered frame, filter state) of a streamed dataset over every row in
+    `date_range`, read from the month partitions overlapping it. None when
+    `data` is fully loaded, not stored partitioned, or the range holds more
+    than RANGE_ROW_BUDGET rows; the sample is filtered instead then.
+    """
+    summary = get_summary(data)
+    if summary is None or summary.n_sampled >= summary.n_rows or date_range is None:
+        return None
+    partitions = dataset_store.partitions(summary.key, date_range)
+    if partitions is None or sum(p["rows"] for p in partitions) > RANGE_ROW_BUDGET:
+        return None
+
+    # The overlapping partitions are contiguous, so the first and last name them
+    names = [p["partition"] for p in partitions]
+    range_key = f"{summary.key}@{names[0]}..{names[-1]}" if names else f"{summary.key}@none"
+    frame = range_cache.get(range_key)
+    if frame is None:
+        frame = dataset_store.load(summary.key, date_range=date_range)
+        frame, report = schema.optimize_dtypes(frame)
+        frame.attrs = {
+            "content_hash": range_key,
+            "dtype_report": report,
+            "partitions": {
+                "read": len(partitions),
+                "total": len(dataset_store.manifest(summary.key)["partitions"]),
+                "rows": len(frame),
+            },
+        }
+        range_cache.put(range_key, frame)
+    enriched, _, _ = enrich.enrich_frame(frame.copy(deep=False), unit_prices)
+    return filters.filtered_view(enriched, filters.get_index(enriched), date_range, selections)
@@ -0,0 +1,227 @@
+# telemetry.py
+"""
+Timing and memory spans for each rerun of the dashboard.
+
+A rerun is one Run: the script starts it, and every span opened on the same
+thread (load, enrichment, filtering, the chosen section and the section units
+it computes) is recorded in it with its wall time, CPU time and change in
+resident memory. Spans nest, so a section's own time (its span minus the
+units computed inside it) is what Streamlit and Plotly spent drawing and
+serializing its figures. Spans opened on threads without a run (background
+precomputation) are not recorded.
+
+Finished runs are kept in a rolling in-process history for the admin overlay
+and, when MINDSHIFT_TELEMETRY_LOG names a file, appended to it as JSON lines
+(rotated to "<file>.1" past MINDSHIFT_TELEMETRY_LOG_MB), so slow reruns in
+production can be traced to a step or section afterwards.
+
+Like analytics.py, nothing here imports Streamlit.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# "0" turns the spans into no-ops
+TELEMETRY = os.environ.get("MINDSHIFT_TELEMETRY", "1") != "0"
+# Finished runs kept in memory
+MAX_RUNS = int(os.environ.get("MINDSHIFT_TELEMETRY_RUNS", "500"))
+LOG_PATH = os.environ.get("MINDSHIFT_TELEMETRY_LOG")
+LOG_MAX_BYTES = int(os.environ.get("MINDSHIFT_TELEMETRY_LOG_MB", "64")) * 1024 ** 2
+
+_PAGE_BYTES = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# ru_maxrss is in kilobytes on Linux, bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+_local = threading.local()
+_lock = threading.Lock()
+history = deque(maxlen=MAX_RUNS)
+
+
+def rss_bytes():
+    """Resident memory of the process, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_BYTES
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    """Peak resident memory of the process so far, or None without the resource module."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def new_id():
+    return uuid.uuid4().hex[:12]
+
+
+class Run:
+    """The spans of one rerun, in the order they were opened."""
+
+    def __init__(self, **labels):
+        self.id = new_id()
+        self.started = time.time()
+        self.labels = labels
+        self.spans = []
+        self._clock = time.perf_counter()
+        self._stack = []
+
+    def open(self, name, attrs):
+        span = {
+            "name": name,
+            "parent": self._stack[-1]["index"] if self._stack else None,
+            "depth": len(self._stack),
+            "index": len(self.spans),
+            "offset": time.perf_counter() - self._clock,
+            "attrs": attrs,
+        }
+        self.spans.append(span)
+        self._stack.append(span)
+        return span
+
+    def close(self, span):
+        # Spans of one thread close in reverse order of opening
+        if self._stack and self._stack[-1] is span:
+            self._stack.pop()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "started": self.started,
+            "seconds": time.perf_counter() - self._clock,
+            "peak_rss": peak_rss_bytes(),
+            "labels": self.labels,
+            "spans": self.spans,
+        }
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def start_run(**labels):
+    """Starts recording this thread's spans into a new Run (dropping an unfinished one)."""
+    if not TELEMETRY:
+        return None
+    _local.run = Run(**labels)
+    return _local.run
+
+
+def label(**labels):
+    """Adds labels (e.g. the chosen section) to this thread's run."""
+    run = current_run()
+    if run is not None:
+        run.labels.update(labels)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times the block as span `name` of this thread's run. Yields the span's
+    attribute dict, so the block can add to it (e.g. whether it hit a cache).
+    """
+    run = current_run()
+    if run is None:
+        yield attrs
+        return
+    record = run.open(name, attrs)
+    rss = rss_bytes()
+    cpu = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        record["cpu_seconds"] = time.thread_time() - cpu
+        after = rss_bytes()
+        record["rss_delta"] = after - rss if rss is not None and after is not None else None
+        run.close(record)
+
+
+def finish_run():
+    """Ends this thread's run: adds it to the history and the log. Returns its record."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    record = run.to_dict()
+    with _lock:
+        history.append(record)
+        if LOG_PATH:
+            _write_log(record)
+    return record
+
+
+def _write_log(record):
+    try:
+        if os.path.exists(LOG_PATH) and os.path.getsize(LOG_PATH) > LOG_MAX_BYTES:
+            os.replace(LOG_PATH, f"{LOG_PATH}.1")
+        with open(LOG_PATH, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError:
+        # Telemetry must never break the dashboard; the in-memory history still has the run
+        pass
+
+
+# ------------------------------- REPORTS -------------------------------
+def span_table(record):
+    """One row per span of a run record, with its own time (minus the spans nested in it)."""
+    spans = record["spans"]
+    nested = np.zeros(len(spans))
+    for span in spans:
+        if span["parent"] is not None and "seconds" in span:
+            nested[span["parent"]] += span["seconds"]
+    return pd.DataFrame({
+        "Step": ["  " * span["depth"] + span["name"] for span in spans],
+        "Seconds": [span.get("seconds", np.nan) for span in spans],
+        "Own seconds": [span.get("seconds", np.nan) - nested[i] for i, span in enumerate(spans)],
+        "CPU seconds": [span.get("cpu_seconds", np.nan) for span in spans],
+        "RSS change (MB)": [
+            span["rss_delta"] / 1024 ** 2 if span.get("rss_delta") is not None else np.nan for span in spans
+        ],
+        "Details": [", ".join(f"{k}={v}" for k, v in span["attrs"].items()) for span in spans],
+    })
+
+
+def summary(records=None):
+    """Per span name across runs: count, median, 95th percentile and worst seconds."""
+    if records is None:
+        with _lock:
+            records = list(history)
+    rows = [
+        (span["name"], span["seconds"])
+        for record in records for span in record["spans"] if "seconds" in span
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["Step", "Count", "Median seconds", "P95 seconds", "Max seconds"])
+    frame = pd.DataFrame(rows, columns=["Step", "Seconds"])
+    groups = frame.groupby("Step", sort=False)["Seconds"]
+    return pd.DataFrame({
+        "Count": groups.size(),
+        "Median seconds": groups.median(),
+        "P95 seconds": groups.quantile(0.95),
+        "Max seconds": groups.max(),
+    }).sort_values("P95 seconds", ascending=False).reset_index()
+
+
+def export_jsonl(records=None):
+    """The runs as JSON lines (bytes), for download."""
+    if records is None:
+        with _lock:
+            records = list(history)
+    return "".join(json.dumps(record, default=str) + "\n" for record in records).encode()
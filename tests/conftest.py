@@ -0,0 +1,8 @@
+# conftest.py
+"""Puts the dashboard modules (src/) and the synthetic data generator (benchmarks/) on the path."""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
@@ -0,0 +1,130 @@
+# test_append.py
+"""An appended delta gives the same cubes, correlations and duplicate counts as loading the combined rows."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+import synthetic
+
+import append
+import correlation
+import enrich
+import filters
+import sections
+import store
+import streaming
+from cube import default_metrics
+
+
+def bookings(rows, seed):
+    data = synthetic.generate(rows, seed)
+    return data.sort_values("Date", kind="stable", ignore_index=True)
+
+
+def loaded(data, key):
+    data = data.copy()
+    data.attrs["content_hash"] = key
+    return data
+
+
+def expected_rows(history, delta):
+    """The delta rows a from-scratch dedupe keeps: new (Date, GuestID) keys, first occurrence only."""
+    stored = delta.set_index(["Date", "GuestID"]).index.isin(history.set_index(["Date", "GuestID"]).index)
+    repeated = delta.duplicated(["Date", "GuestID"]) & ~stored
+    return delta[~(stored | repeated)], int(stored.sum()), int(repeated.sum())
+
+
+def assert_same_cube(appended, scratch):
+    keys = ["Day", *scratch.dims]
+
+    def normalized(cube):
+        base = cube.base.astype({dim: str for dim in cube.dims})
+        return base.sort_values(keys, ignore_index=True)[sorted(base.columns)]
+
+    assert appended.dims == scratch.dims
+    pd.testing.assert_frame_equal(normalized(appended), normalized(scratch), check_dtype=False)
+
+
+@pytest.fixture
+def split():
+    data = bookings(3000, seed=3)
+    history, delta = data.iloc[:2400], data.iloc[2000:]
+    # Rows repeated within the delta are appended once
+    delta = pd.concat([delta, delta.iloc[-5:]], ignore_index=True)
+    return history, delta
+
+
+def test_append_matches_loading_everything(split):
+    history, delta = split
+    base = loaded(history, "test-append-history")
+    enriched_base, _, _ = enrich.enrich_frame(base)
+    correlation.get_stats(enriched_base, enriched_base.attrs["dataset_key"], dims=streaming.FILTER_DIMS)
+
+    combined = append.append_delta(base, loaded(delta, "test-append-delta"))
+
+    kept, duplicates, repeated = expected_rows(history, delta)
+    report = combined.attrs["append_report"]
+    assert report["duplicate_rows"] == duplicates == 400
+    assert report["repeated_rows"] == repeated >= 5
+    assert report["appended_rows"] == len(kept)
+    assert len(combined) == len(history) + len(kept)
+
+    scratch = enrich.add_derived_columns(pd.concat([history, kept], ignore_index=True), enrich.DEFAULT_UNIT_PRICES)
+    scratch_cube, scratch_breakdowns = streaming.frame_cubes(scratch, default_metrics(scratch))
+    summary = streaming.get_summary(combined)
+    assert summary.n_rows == len(scratch)
+    assert_same_cube(summary.cube, scratch_cube)
+    for dim, cube in scratch_breakdowns.items():
+        assert_same_cube(summary.breakdowns[dim], cube)
+
+    # A date range cutting through months: whole months from the merged statistics, the rest scanned
+    enriched, _, _ = enrich.enrich_frame(combined)
+    assert correlation.stats_cache.get(enriched.attrs["dataset_key"]) is not None
+    bounds = filters.get_index(enriched).date_bounds()
+    date_range = (bounds[0] + pd.Timedelta(days=40), bounds[1] - pd.Timedelta(days=40))
+    view, state = filters.filtered_view(enriched, filters.get_index(enriched), date_range, {"LoyaltyTier": ["Gold"]})
+    columns = ["ADR", "TotalRevenue", "MarketingSpend", "Profit", "GuestFeedbackScore"]
+    corr = correlation.correlations(sections.SectionContext(enriched, view, state), columns, streaming.FILTER_DIMS)
+    pd.testing.assert_frame_equal(corr, view[columns].corr(), rtol=1e-8, atol=1e-10)
+
+
+def test_streamed_history_is_deduped_against_the_store(split, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    history, delta = split
+    dataset_store = store.DatasetStore(str(tmp_path))
+    monkeypatch.setattr(append, "dataset_store", dataset_store)
+    key = "test-append-streamed-csv"
+    sample, summary = streaming.stream_csv(
+        io.BytesIO(history.to_csv(index=False).encode()), key,
+        chunk_rows=500, sample_rows=100, writer=dataset_store.writer(key),
+    )
+    assert summary.n_sampled < summary.n_rows
+
+    combined = append.append_delta(sample, loaded(delta, "test-append-streamed-delta"))
+
+    kept, duplicates, repeated = expected_rows(history, delta)
+    report = combined.attrs["append_report"]
+    assert report["keys_checked"] == "all"
+    assert (report["duplicate_rows"], report["repeated_rows"]) == (duplicates, repeated)
+    appended = streaming.get_summary(combined)
+    assert appended.n_rows == len(history) + len(kept)
+    # The frame stays a uniform sample: new rows join it at the sample's rate, not all of them
+    assert appended.n_sampled == len(combined)
+    assert 0 < len(combined) - len(sample) < len(kept) / 4
+    # The appended rows went to the store next to the streamed ones
+    stored = dataset_store.load(combined.attrs["content_hash"], columns=["Date", "GuestID"])
+    assert len(stored) == len(history) + len(kept)
+    assert np.isin(kept["GuestID"], stored["GuestID"]).all()
+
+
+def test_repeated_append_reuses_the_combined_frame(split, monkeypatch):
+    history, delta = split
+    base, rows = loaded(history, "test-append-repeat-history"), loaded(delta, "test-append-repeat-delta")
+    combined = append.append_delta(base, rows)
+    # An evicted summary does not make a rerun redo the append of a fully loaded history
+    streaming.summary_cache.pop(combined.attrs["content_hash"])
+    monkeypatch.setattr(append, "split_delta", lambda *args: pytest.fail("the append was redone"))
+
+    again = append.append_delta(base, rows)
+    pd.testing.assert_frame_equal(again, combined)
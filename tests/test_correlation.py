@@ -0,0 +1,76 @@
+# test_correlation.py
+"""Correlations of streamed datasets match pandas on the rows the sidebar shows, sampled or read in full."""
+import io
+
+import pandas as pd
+import pytest
+import synthetic
+
+import correlation
+import enrich
+import filters
+import sections
+import store
+import streaming
+
+COLUMNS = ["ADR", "TotalRevenue", "MarketingSpend", "Profit", "GuestFeedbackScore"]
+
+
+@pytest.fixture
+def streamed(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    dataset_store = store.DatasetStore(str(tmp_path))
+    monkeypatch.setattr(streaming, "dataset_store", dataset_store)
+    data = synthetic.generate(3000, 5).sort_values("Date", kind="stable", ignore_index=True)
+    key = "test-correlation-streamed-csv"
+    sample, summary = streaming.stream_csv(
+        io.BytesIO(data.to_csv(index=False).encode()), key,
+        chunk_rows=500, sample_rows=200, writer=dataset_store.writer(key),
+    )
+    assert summary.n_sampled < summary.n_rows
+    enriched, _, _ = enrich.enrich_frame(sample)
+    return enriched, summary, data
+
+
+def cut_range(enriched):
+    bounds = filters.get_index(enriched).date_bounds()
+    return bounds[0] + pd.Timedelta(days=40), bounds[1] - pd.Timedelta(days=40)
+
+
+def test_partition_view_matches_its_rows(streamed):
+    enriched, _, _ = streamed
+    view, state = streaming.partition_view(enriched, cut_range(enriched), {"LoyaltyTier": ["Gold", "Silver"]})
+    ctx = sections.SectionContext(enriched, view, state)
+    assert ctx.dataset != enriched.attrs["dataset_key"]
+
+    corr = correlation.correlations(ctx, COLUMNS, streaming.FILTER_DIMS)
+    pd.testing.assert_frame_equal(corr, ctx.filtered[COLUMNS].corr(), rtol=1e-8, atol=1e-10)
+    # Nothing is stored under the range's key from the sample
+    assert ctx.dataset not in correlation.stats_cache
+
+
+def test_evicted_statistics_are_not_rebuilt_from_the_sample(streamed):
+    enriched, summary, _ = streamed
+    correlation.stats_cache.pop(summary.dataset_key)
+    view, state = filters.filtered_view(enriched, filters.get_index(enriched), cut_range(enriched), {})
+    ctx = sections.SectionContext(enriched, view, state)
+    assert ctx.sampled
+
+    corr = correlation.correlations(ctx, COLUMNS, streaming.FILTER_DIMS)
+    pd.testing.assert_frame_equal(corr, ctx.filtered[COLUMNS].corr(), rtol=1e-8, atol=1e-10)
+    assert summary.dataset_key not in correlation.stats_cache
+
+
+def test_sampled_partial_months_match_every_row(streamed):
+    enriched, summary, data = streamed
+    date_range = cut_range(enriched)
+    selections = {"LoyaltyTier": ["Gold", "Silver"]}
+    view, state = filters.filtered_view(enriched, filters.get_index(enriched), date_range, selections)
+    ctx = sections.SectionContext(enriched, view, state)
+    assert ctx.sampled and summary.dataset_key in correlation.stats_cache
+
+    corr = correlation.correlations(ctx, COLUMNS, streaming.FILTER_DIMS)
+    # The months the range cuts through are read in full, like the months it covers
+    rows = enrich.add_derived_columns(data.copy(), enrich.DEFAULT_UNIT_PRICES)
+    rows = rows[rows["Date"].between(*date_range) & rows["LoyaltyTier"].isin(selections["LoyaltyTier"])]
+    pd.testing.assert_frame_equal(corr, rows[COLUMNS].corr(), rtol=1e-8, atol=1e-10)
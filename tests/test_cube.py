@@ -0,0 +1,51 @@
+# test_cube.py
+"""Rows without a date count towards a cube's totals and the headline figures, but towards no period."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+import synthetic
+
+import analytics
+import enrich
+import streaming
+from cube import TimeCube, default_metrics
+
+
+@pytest.fixture
+def data():
+    data = synthetic.generate(2000, 13)
+    data.loc[data.index[::7], "Date"] = pd.NaT
+    return enrich.add_derived_columns(data, enrich.DEFAULT_UNIT_PRICES)
+
+
+def test_undated_rows_count_towards_totals_only(data):
+    cube = TimeCube.from_frame(data, dims=["ReservationStatus"], dropna=False)
+    totals = cube.totals({"Revenue": ("TotalRevenue", "sum"), "Rows": (None, "rows")})
+    assert totals["Rows"].iloc[0] == len(data)
+    assert np.isclose(totals["Revenue"].iloc[0], data["TotalRevenue"].sum())
+
+    monthly = cube.rollup("M", {"Rows": (None, "rows")})
+    assert monthly["Rows"].sum() == data["Date"].notna().sum()
+    assert cube.filter(cube.date_bounds()).base["Rows"].sum() == data["Date"].notna().sum()
+
+
+def test_headline_figures_without_any_valid_date(data):
+    data = data.assign(Date=pd.NaT)
+    story = analytics.story_metrics(data)
+    assert story["total_rows"] == len(data)
+    assert np.isclose(story["total_revenue"], data["TotalRevenue"].sum())
+    assert story["min_date"] is None
+    assert np.isclose(analytics.kpis(data)["total_revenue"], data["TotalRevenue"].sum())
+
+
+def test_streamed_summary_counts_undated_rows():
+    raw = synthetic.generate(3000, 17)
+    raw.loc[raw.index[::5], "Date"] = pd.NaT
+    _, summary = streaming.stream_csv(io.BytesIO(raw.to_csv(index=False).encode()), "test-cube-undated-csv",
+                                      chunk_rows=1000, sample_rows=500)
+    whole = enrich.add_derived_columns(raw.copy(), enrich.DEFAULT_UNIT_PRICES)
+    totals = summary.cube.totals(default_metrics(whole))
+    assert summary.cube.base["Rows"].sum() == len(raw)
+    assert np.isclose(totals["TotalRevenue"].iloc[0], whole["TotalRevenue"].sum())
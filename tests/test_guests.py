@@ -0,0 +1,57 @@
+# test_guests.py
+"""Guest aggregates of a whole dataset are persisted and read back; those of a streamed sample are not."""
+import io
+
+import pandas as pd
+import pytest
+import synthetic
+
+import enrich
+import filters
+import guests
+import sections
+import store
+import streaming
+
+
+@pytest.fixture
+def guest_store(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    dataset_store = store.DatasetStore(str(tmp_path))
+    monkeypatch.setattr(guests, "dataset_store", dataset_store)
+    monkeypatch.setattr(guests, "GUEST_DIR", str(tmp_path / "_guests"))
+    monkeypatch.setattr(streaming, "dataset_store", dataset_store)
+    return dataset_store
+
+
+def whole_context(enriched):
+    view, state = filters.filtered_view(enriched, filters.get_index(enriched), None, {})
+    return sections.SectionContext(enriched, view, state)
+
+
+def test_whole_dataset_aggregates_are_read_back(guest_store):
+    data = synthetic.generate(2000, 9)
+    data.attrs["content_hash"] = "test-guests-whole"
+    enriched, _, _ = enrich.enrich_frame(data)
+    ctx = whole_context(enriched)
+    built = guests.guest_features(ctx)
+
+    # A later session: nothing in memory, the table comes from disk
+    guests.feature_cache.pop(ctx.dataset)
+    table = guests.load(ctx.dataset)
+    assert table is not None
+    pd.testing.assert_frame_equal(table, guests.aggregate(enriched))
+    pd.testing.assert_frame_equal(guests.guest_features(ctx), built)
+
+
+def test_sampled_aggregates_stay_in_memory(guest_store):
+    data = synthetic.generate(3000, 5).sort_values("Date", kind="stable", ignore_index=True)
+    key = "test-guests-streamed-csv"
+    sample, summary = streaming.stream_csv(io.BytesIO(data.to_csv(index=False).encode()), key,
+                                           chunk_rows=500, sample_rows=200)
+    enriched, _, _ = enrich.enrich_frame(sample)
+    ctx = whole_context(enriched)
+    assert ctx.sampled
+
+    assert guests.guest_features(ctx) is not None
+    assert guests.load(ctx.dataset) is None
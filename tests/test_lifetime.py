@@ -0,0 +1,73 @@
+# test_lifetime.py
+"""The BG/NBD and Gamma-Gamma log-likelihoods against direct formulas, and their gradients against finite differences."""
+import numpy as np
+import pytest
+
+import lifetime
+
+special = pytest.importorskip("scipy.special")
+
+
+def finite_difference(func, params, step=1e-6):
+    gradient = np.zeros_like(params)
+    for i in range(len(params)):
+        up, down = params.copy(), params.copy()
+        up[i] += step
+        down[i] -= step
+        gradient[i] = (func(up) - func(down)) / (2 * step)
+    return gradient
+
+
+@pytest.fixture
+def histories():
+    rng = np.random.default_rng(7)
+    n = 400
+    T = rng.uniform(5, 100, n)
+    x = rng.poisson(2, n).astype("float64")
+    t_x = np.where(x > 0, rng.uniform(0, 1, n) * T, 0.0)
+    weights = rng.integers(1, 5, n).astype("float64")
+    return x, t_x, T, weights
+
+
+def test_bgnbd_loglik_matches_direct_formula(histories):
+    x, t_x, T, weights = histories
+    r, alpha, a, b = params = np.array([0.8, 4.0, 0.7, 2.5])
+    value, _ = lifetime._bgnbd_loglik(params, x, t_x, T, weights)
+
+    head = special.betaln(a, b + x) - special.betaln(a, b) + special.gammaln(r + x) - special.gammaln(r)
+    likelihood = (alpha / (alpha + T)) ** r / (alpha + T) ** x
+    dropped = np.where(x > 0, a / (b + x - 1) * (alpha / (alpha + t_x)) ** r / (alpha + t_x) ** x, 0.0)
+    expected = np.sum(weights * (head + np.log(likelihood + dropped))) / weights.sum()
+    assert value == pytest.approx(expected, rel=1e-10)
+
+
+def test_bgnbd_gradient_matches_finite_differences(histories):
+    x, t_x, T, weights = histories
+    params = np.array([0.8, 4.0, 0.7, 2.5])
+    _, gradient = lifetime._bgnbd_loglik(params, x, t_x, T, weights)
+    numeric = finite_difference(lambda p: lifetime._bgnbd_loglik(p, x, t_x, T, weights)[0], params)
+    np.testing.assert_allclose(gradient, numeric, rtol=1e-5, atol=1e-8)
+
+
+def test_gamma_gamma_loglik_and_gradient():
+    rng = np.random.default_rng(11)
+    x = rng.integers(1, 8, 300).astype("float64")
+    m = rng.gamma(3.0, 0.5, 300)
+    loglik = lifetime._gamma_gamma_loglik(x, m)
+    p, q, v = params = np.array([2.0, 3.5, 1.2])
+    value, gradient = loglik(params)
+
+    expected = np.mean(
+        special.gammaln(p * x + q) - special.gammaln(p * x) - special.gammaln(q) + q * np.log(v)
+        + (p * x - 1) * np.log(m) + p * x * np.log(x) - (p * x + q) * np.log(x * m + v)
+    )
+    assert value == pytest.approx(expected, rel=1e-10)
+    numeric = finite_difference(lambda params: loglik(params)[0], params)
+    np.testing.assert_allclose(gradient, numeric, rtol=1e-5, atol=1e-8)
+
+
+def test_guests_without_repeat_visits_are_alive(histories):
+    x, t_x, T, _ = histories
+    alive = lifetime.probability_alive(np.array([0.8, 4.0, 0.7, 2.5]), x, t_x, T)
+    assert np.all(alive[x == 0] == 1)
+    assert np.all((alive > 0) & (alive <= 1))
@@ -0,0 +1,50 @@
+# test_streaming.py
+"""A streamed file's summary stays cached, and its batch-merged cubes match those of the whole file."""
+import io
+
+import pandas as pd
+import pytest
+import synthetic
+
+import enrich
+import streaming
+from cache import LRUCache
+from cube import default_metrics
+
+
+def normalized(cube):
+    keys = ["Day", *cube.dims]
+    base = cube.base.astype({dim: str for dim in cube.dims})
+    return base.sort_values(keys, ignore_index=True)[sorted(base.columns)]
+
+
+@pytest.fixture
+def data():
+    return synthetic.generate(6000, 11)
+
+
+def test_summary_over_the_budget_is_still_cached(data, monkeypatch):
+    # A budget far below the summary's size, as a wide file at 1M rows is for the default one
+    monkeypatch.setattr(streaming, "summary_cache", LRUCache(1024, sizer=lambda summary: summary.nbytes))
+    key = "test-streaming-wide-csv"
+    sample, summary = streaming.stream_csv(io.BytesIO(data.to_csv(index=False).encode()), key,
+                                           chunk_rows=1000, sample_rows=500)
+    assert summary.nbytes > 1024
+    assert streaming.get_summary(sample) is summary
+    assert streaming.summary_cache.stats()["rejected"] == 0
+    # The main cube is split by the filter dims only; the other dims have cubes of their own
+    assert summary.cube.dims == streaming.FILTER_DIMS
+    assert {"ReservationStatus", "Company"} <= set(summary.breakdowns)
+
+
+def test_batched_merge_matches_the_whole_file(data):
+    chunk_rows = len(data) // (3 * streaming.MERGE_BATCH)
+    _, summary = streaming.stream_csv(io.BytesIO(data.to_csv(index=False).encode()), "test-streaming-batches-csv",
+                                      chunk_rows=chunk_rows, sample_rows=500)
+    assert summary.n_chunks > 2 * streaming.MERGE_BATCH
+
+    whole = enrich.add_derived_columns(data.copy(), enrich.DEFAULT_UNIT_PRICES)
+    cube, breakdowns = streaming.frame_cubes(whole, default_metrics(whole))
+    pd.testing.assert_frame_equal(normalized(summary.cube), normalized(cube), check_dtype=False)
+    for dim, breakdown in breakdowns.items():
+        pd.testing.assert_frame_equal(normalized(summary.breakdowns[dim]), normalized(breakdown), check_dtype=False)